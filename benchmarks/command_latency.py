@@ -0,0 +1,55 @@
+"""
+Command-to-ack latency benchmark: legacy vs terminated-line framing
+Runs MultiLaserController against the simulated board once per firmware
+protocol version and reports how long each toggle takes to be acknowledged
+
+Usage:
+    python benchmarks/command_latency.py [--commands N]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from laser_controller import MultiLaserController
+from laser_simulator import PROTOCOL_LEGACY, PROTOCOL_LINE, SimulatedLaserBoard
+
+
+def measure(protocol_version: int, commands: int) -> list:
+    """
+    Toggle laser 1 repeatedly and collect round-trip times
+
+    Args:
+        protocol_version: Firmware protocol version to simulate
+        commands: Number of toggle commands to send
+
+    Returns:
+        list: Round-trip times in seconds
+    """
+    with SimulatedLaserBoard(protocol_version=protocol_version) as board:
+        # Text commands at the starting rate, so only the framing differs
+        with MultiLaserController(
+            port=board.port, binary=False, max_baud_rate=None
+        ) as controller:
+            return [controller.send_command("1").round_trip for _ in range(commands)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--commands", type=int, default=10)
+    args = parser.parse_args()
+
+    for label, version in (("legacy", PROTOCOL_LEGACY), ("line", PROTOCOL_LINE)):
+        round_trips = measure(version, args.commands)
+        print(
+            f"{label:>6} (protocol v{version}): "
+            f"mean {statistics.mean(round_trips) * 1000:8.2f} ms, "
+            f"max {max(round_trips) * 1000:8.2f} ms over {len(round_trips)} commands"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Controller benchmark: throughput, latency percentiles, connect time, jitter
+Drives MultiLaserController against a real port or the simulated board and
+writes the results as JSON so runs can be compared across baud rates and
+firmware versions
+
+Usage:
+    python benchmarks/controller_benchmark.py [--port PORT] [--baud N]
+        [--max-baud N] [--protocol N] [--commands N] [--pipeline-depth N]
+        [--threads N] [--watchdog SECONDS] [--output results.json]
+
+Without --port the simulated board is used, with byte timing at --baud.
+With --max-baud the link is negotiated up to that rate after connecting.
+With --watchdog the heartbeat's keepalive overhead and misses are reported.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from laser_controller import LaserSequence, MultiLaserController
+from laser_simulator import PROTOCOL_VERSION, SimulatedLaserBoard
+
+
+def percentile(samples: List[float], percent: float) -> float:
+    """
+    Nearest-rank percentile
+
+    Args:
+        samples: Values to rank
+        percent: Percentile (0-100)
+
+    Returns:
+        float: Sample at the given percentile
+    """
+    ranked = sorted(samples)
+    index = max(0, min(len(ranked) - 1, round(percent / 100 * len(ranked)) - 1))
+    return ranked[index]
+
+
+def time_calls(operation: Callable[[int], object], count: int) -> Dict[str, float]:
+    """
+    Call an operation repeatedly and summarise its latency
+
+    Args:
+        operation: Called with the iteration number; returns once acknowledged
+        count: Number of calls
+
+    Returns:
+        Dict[str, float]: Calls per second and latency percentiles in ms
+    """
+    latencies = []
+    start = time.perf_counter()
+    for i in range(count):
+        sent = time.perf_counter()
+        operation(i)
+        latencies.append(time.perf_counter() - sent)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "count": count,
+        "per_second": round(count / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+    }
+
+
+def time_pipelined(
+    controller: MultiLaserController, commands: List[str]
+) -> Dict[str, float]:
+    """
+    Send a burst of commands through the in-flight window
+
+    Returns:
+        Dict[str, float]: Commands per second for the whole burst
+    """
+    writes = controller.write_calls
+    start = time.perf_counter()
+    controller.send_commands(commands)
+    elapsed = time.perf_counter() - start
+    return {
+        "count": len(commands),
+        "window": controller.window,
+        "per_second": round(len(commands) / elapsed, 1),
+        "writes": controller.write_calls - writes,
+    }
+
+
+def time_concurrent(
+    controller: MultiLaserController, threads: int, count: int
+) -> Dict[str, float]:
+    """
+    Call set_laser from several threads at once, with no external locking
+
+    Returns:
+        Dict[str, float]: Commands per second across all threads, and the
+            write() calls the writer thread needed for them
+    """
+    lasers = controller.num_lasers
+
+    def produce(offset: int) -> None:
+        for i in range(count):
+            controller.set_laser((i + offset) % lasers + 1, i % 2 == 0)
+
+    workers = [
+        threading.Thread(target=produce, args=(offset,)) for offset in range(threads)
+    ]
+    writes = controller.write_calls
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "threads": threads,
+        "count": threads * count,
+        "per_second": round(threads * count / elapsed, 1),
+        "writes": controller.write_calls - writes,
+    }
+
+
+def benchmark_flash(
+    controller: MultiLaserController, flashes: int, flash_duration: float
+) -> Dict[str, object]:
+    """
+    Flash laser 1 and report how closely the run kept to its nominal length
+
+    Host-timed runs also report per-edge lateness from the deadline scheduler.
+    """
+    nominal = 2 * flash_duration * flashes
+    start = time.perf_counter()
+    controller.flash_laser(1, flashes, flash_duration)
+    elapsed = time.perf_counter() - start
+
+    result: Dict[str, object] = {
+        "mode": "hardware" if controller.supports_sequences else "host",
+        "flashes": flashes,
+        "flash_duration_s": flash_duration,
+        "nominal_s": round(nominal, 6),
+        "elapsed_s": round(elapsed, 6),
+    }
+    if not controller.supports_sequences and controller.pattern_jitter:
+        result["edge_lateness"] = controller.pattern_jitter.summary()
+    return result
+
+
+def benchmark_host_jitter(
+    controller: MultiLaserController, flashes: int, flash_duration: float
+) -> Dict[str, object]:
+    """Edge lateness of the same flash pattern played from the host"""
+    sequence = LaserSequence.flash(1, flash_duration, num_lasers=controller.num_lasers)
+    controller.run_sequence_on_host(sequence, flashes)
+    return controller.pattern_jitter.summary()
+
+
+def run(args: argparse.Namespace, port: str) -> Dict[str, object]:
+    """Run every benchmark against one port and collect the results"""
+    controller = MultiLaserController(
+        port=port,
+        baud_rate=args.baud,
+        auto_connect=False,
+        max_baud_rate=args.max_baud,
+        pipeline_depth=args.pipeline_depth,
+        watchdog_timeout=args.watchdog,
+    )
+    start = time.perf_counter()
+    controller.connect()
+    connect_time = time.perf_counter() - start
+
+    try:
+        lasers = controller.num_lasers
+        commands = {
+            "toggle_laser": time_calls(
+                lambda i: controller.toggle_laser(i % lasers + 1), args.commands
+            ),
+            "set_laser": time_calls(
+                lambda i: controller.set_laser(i % lasers + 1, (i // lasers) % 2 == 0),
+                args.commands,
+            ),
+            "turn_on_all": time_calls(
+                lambda i: controller.turn_on_all(), args.commands
+            ),
+        }
+        burst = [
+            f"{'on' if (i // lasers) % 2 == 0 else 'off'} {i % lasers + 1}"
+            for i in range(args.commands)
+        ]
+        commands["pipelined_set_laser"] = time_pipelined(controller, burst)
+        commands["concurrent_set_laser"] = time_concurrent(
+            controller, args.threads, args.commands // args.threads
+        )
+        controller.turn_off_all()
+
+        results = {
+            "protocol_version": controller.protocol_version,
+            "link_baud_rate": controller.link_baud_rate,
+            "connect_s": round(connect_time, 4),
+            "commands": commands,
+            "flash": benchmark_flash(controller, args.flashes, args.flash_duration),
+            "host_edge_lateness": benchmark_host_jitter(
+                controller, args.flashes, args.flash_duration
+            ),
+        }
+        if controller.heartbeat is not None:
+            results["heartbeat"] = controller.heartbeat.summary(
+                controller.link_baud_rate
+            )
+        results["metrics"] = controller.metrics_snapshot()
+        return results
+    finally:
+        controller.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", help="Real device port (default: simulator)")
+    parser.add_argument("--baud", type=int, default=9600)
+    parser.add_argument(
+        "--max-baud", type=int, help="Negotiate up to this rate (default: off)"
+    )
+    parser.add_argument(
+        "--protocol",
+        type=int,
+        default=PROTOCOL_VERSION,
+        help="Firmware protocol version to simulate",
+    )
+    parser.add_argument("--commands", type=int, default=100)
+    parser.add_argument("--pipeline-depth", type=int, default=8)
+    parser.add_argument(
+        "--threads", type=int, default=4, help="Callers for the concurrent test"
+    )
+    parser.add_argument(
+        "--watchdog",
+        type=float,
+        help="Arm the firmware watchdog with this timeout in seconds (default: off)",
+    )
+    parser.add_argument("--flashes", type=int, default=20)
+    parser.add_argument("--flash-duration", type=float, default=0.01)
+    parser.add_argument("--output", help="Write JSON here (default: stdout)")
+    args = parser.parse_args()
+
+    board: Optional[SimulatedLaserBoard] = None
+    if args.port is None:
+        board = SimulatedLaserBoard(
+            protocol_version=args.protocol, baud_rate=args.baud
+        ).start()
+
+    try:
+        results = run(args, args.port or board.port)
+    finally:
+        if board:
+            board.stop()
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "port": args.port or "simulator",
+        "baud_rate": args.baud,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
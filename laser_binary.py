@@ -0,0 +1,178 @@
+"""
+Binary Serial Protocol for the Laser TTL Controller
+Frame encoding shared by MultiLaserController and the simulated board
+(protocol version 7 and later)
+
+Requests are 3 bytes and replies are 3 bytes, against tens of bytes for the
+text commands and their replies. The top bit of the first byte marks a
+binary frame; text commands and replies are plain ASCII, so both framings
+can share the port and the text protocol stays usable from a serial monitor.
+
+Request: [0x80 | opcode << 3 | arg] [sequence number] [CRC8 of bytes 0-1]
+Reply:   [0x80 | sequence number]   [status << 4 | mask] [CRC8 of bytes 0-1]
+
+Sequence numbers run from 1 to 127; replies with sequence number 0 are
+unsolicited events. The mask in every reply is the laser state after the
+command (bit n - 1 = laser n), so each reply doubles as a status report.
+The single byte STOP_BYTE (protocol version 9) is an emergency stop, and
+KEEPALIVE_BYTE (protocol version 10) feeds the firmware's host watchdog.
+"""
+
+import re
+from typing import Optional, Tuple
+
+# The first byte of every binary frame has this bit set
+FRAME_FLAG = 0x80
+FRAME_LENGTH = 3
+
+# Sequence numbers: 0 is reserved for events
+EVENT_SEQUENCE = 0
+MAX_SEQUENCE = 0x7F
+
+# Request opcodes (4 bits)
+OP_PING = 0
+OP_TOGGLE = 1
+OP_ON = 2
+OP_OFF = 3
+OP_MASK = 4
+OP_ALL_ON = 5
+OP_ALL_OFF = 6
+OP_STATUS = 7
+OP_SINGLE_BYTE = 15  # Only sent as STOP_BYTE or KEEPALIVE_BYTE
+
+# Single-byte emergency stop (protocol version 9): acted on as soon as the
+# firmware reads it, except as the checksum byte of a frame, so it is sent
+# twice and the second copy always lands
+STOP_BYTE = FRAME_FLAG | OP_SINGLE_BYTE << 3 | 0x07
+
+# Single-byte keepalive (protocol version 10): any byte resets the firmware's
+# watchdog, so this is only needed when nothing else has been sent. Like
+# STOP_BYTE it is never mistaken for the start of a frame.
+KEEPALIVE_BYTE = FRAME_FLAG | OP_SINGLE_BYTE << 3 | 0x06
+
+# Reply status codes (upper nibble of the second byte)
+STATUS_OK = 0
+STATUS_INVALID = 1  # Argument out of range
+STATUS_UNKNOWN = 2  # Unknown opcode
+STATUS_BAD_CRC = 3  # Request checksum mismatch
+
+# Event codes, sent with EVENT_SEQUENCE
+EVENT_SWITCH = 8  # A physical switch changed a laser
+EVENT_SEQUENCE_DONE = 9
+EVENT_SEQUENCE_ABORTED = 10
+EVENT_STOPPED = 11  # Confirms an emergency stop; every laser is OFF
+EVENT_WATCHDOG = 12  # The host went silent, so every laser was turned OFF
+
+# Error text for failed replies, worded like the firmware's text errors
+STATUS_ERRORS = {
+    STATUS_INVALID: "Invalid argument",
+    STATUS_UNKNOWN: "Unknown command",
+    STATUS_BAD_CRC: "Invalid frame checksum",
+}
+
+# Text commands with a binary equivalent
+_TEXT_COMMANDS = {
+    "all_on": (OP_ALL_ON, 0),
+    "all_off": (OP_ALL_OFF, 0),
+    "status": (OP_STATUS, 0),
+}
+_TEXT_WITH_ARG = re.compile(r"^(on|off|mask) (\d)$")
+_TEXT_ARG_OPCODES = {"on": OP_ON, "off": OP_OFF, "mask": OP_MASK}
+
+
+def crc8(data: bytes) -> int:
+    """
+    CRC-8 with polynomial 0x07 and initial value 0 (CRC-8/SMBUS)
+
+    Args:
+        data: Bytes to check
+
+    Returns:
+        int: 8-bit checksum
+    """
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+def encode_request(opcode: int, arg: int, sequence: int) -> bytes:
+    """
+    Build a request frame
+
+    Args:
+        opcode: OP_* constant
+        arg: Laser number or mask (0-7)
+        sequence: Sequence number (1-127)
+
+    Returns:
+        bytes: 3-byte frame
+    """
+    header = bytes([FRAME_FLAG | (opcode & 0x0F) << 3 | (arg & 0x07), sequence])
+    return header + bytes([crc8(header)])
+
+
+def decode_request(frame: bytes) -> Tuple[int, int, int, bool]:
+    """
+    Split a request frame into its fields
+
+    Returns:
+        Tuple[int, int, int, bool]: opcode, arg, sequence number, and whether
+            the checksum matched
+    """
+    opcode = (frame[0] >> 3) & 0x0F
+    arg = frame[0] & 0x07
+    sequence = frame[1] & MAX_SEQUENCE
+    return opcode, arg, sequence, crc8(frame[:2]) == frame[2]
+
+
+def encode_reply(sequence: int, status: int, mask: int) -> bytes:
+    """
+    Build a reply or event frame
+
+    Args:
+        sequence: Sequence number being answered (EVENT_SEQUENCE for events)
+        status: STATUS_* or EVENT_* code
+        mask: Laser states after the command
+
+    Returns:
+        bytes: 3-byte frame
+    """
+    header = bytes([FRAME_FLAG | (sequence & MAX_SEQUENCE), (status << 4) | mask])
+    return header + bytes([crc8(header)])
+
+
+def decode_reply(frame: bytes) -> Optional[Tuple[int, int, int]]:
+    """
+    Split a reply frame into its fields
+
+    Returns:
+        Optional[Tuple[int, int, int]]: sequence number, status and mask, or
+            None if the checksum does not match
+    """
+    if crc8(frame[:2]) != frame[2]:
+        return None
+    return frame[0] & MAX_SEQUENCE, frame[1] >> 4, frame[1] & 0x0F
+
+
+def text_to_request(command: str) -> Optional[Tuple[int, int]]:
+    """
+    Find the binary equivalent of a text command
+
+    Args:
+        command: Text command, e.g. "on 2" or "all_off"
+
+    Returns:
+        Optional[Tuple[int, int]]: (opcode, arg), or None if the command only
+            exists in the text protocol
+    """
+    if command in ("1", "2", "3"):
+        return OP_TOGGLE, int(command)
+    if command in _TEXT_COMMANDS:
+        return _TEXT_COMMANDS[command]
+    arg_match = _TEXT_WITH_ARG.match(command)
+    if arg_match and int(arg_match.group(2)) <= 7:
+        return _TEXT_ARG_OPCODES[arg_match.group(1)], int(arg_match.group(2))
+    return None
@@ -0,0 +1,165 @@
+"""
+Command Coalescing for the Laser TTL Controller
+Merges rapid laser state changes into the fewest serial commands
+
+Changes requested within a short window are collected as per-laser target
+states. When the window closes, only the lasers whose target differs from
+their acknowledged state are sent, so a double-clicked toggle or an on/off
+pair costs nothing on the wire, and several lasers changing together cost
+a single mask command.
+
+Used by MultiLaserController when created with a coalesce_window.
+
+Example:
+    controller = MultiLaserController(port="/dev/ttyUSB0", coalesce_window=0.02)
+    controller.turn_on_laser(1)
+    controller.turn_off_laser(1)  # Nothing is sent for this pair
+    controller.set_laser(2, True)
+    controller.set_laser(3, True)
+    controller.flush_coalesced()  # One 'mask 6' command
+"""
+
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+
+class CommandCoalescer:
+    """
+    Collects per-laser target states and flushes them after a quiet window
+
+    The window starts with the first change after a flush, so a burst of
+    changes is sent at most `window` seconds after it began. Flushes run
+    one at a time, on a timer thread or on the caller of flush().
+
+    discard() never waits for a flush that is already sending. Instead it
+    marks that flush superseded, and the sender checks superseded() before
+    it queues each command, so nothing from the flush can follow the
+    all-off or stop that called discard().
+
+    Attributes:
+        window: Seconds to collect changes before sending them
+        requested: State changes requested since creation
+        flushes: Flushes that had at least one change to send
+        discarded: Changes dropped by discard() (e.g. by an all-off)
+    """
+
+    def __init__(self, window: float, send: Callable[[Dict[int, bool]], bool]):
+        """
+        Initialise the CommandCoalescer
+
+        Args:
+            window: Seconds to collect changes before sending them
+            send: Called with the merged targets (laser number -> True for
+                ON) when the window closes; returns True if the firmware
+                accepted them
+        """
+        self.window = window
+        self.requested = 0
+        self.flushes = 0
+        self.discarded = 0
+        self._send = send
+        self._targets: Dict[int, bool] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._generation = 0  # Bumped by every discard()
+        self._flushing: Optional[Tuple[threading.Thread, int]] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def target(self, laser_number: int, default: bool) -> bool:
+        """
+        State a laser will be set to once pending changes are sent
+
+        Args:
+            laser_number: Laser number (1-based index)
+            default: State to report if no change is pending (normally the
+                acknowledged state)
+
+        Returns:
+            bool: True if the laser will be ON
+        """
+        with self._lock:
+            return self._targets.get(laser_number, default)
+
+    def request(self, targets: Dict[int, bool]) -> None:
+        """
+        Merge new target states, replacing earlier targets for the same lasers
+
+        Args:
+            targets: True for ON, keyed by laser number
+        """
+        with self._lock:
+            self._targets.update(targets)
+            self.requested += len(targets)
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> bool:
+        """
+        Send pending changes now instead of waiting for the window to close
+
+        Returns:
+            bool: True if there was nothing to send or the send succeeded
+        """
+        with self._flush_lock:
+            with self._lock:
+                targets, self._targets = self._targets, {}
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                generation = self._generation
+            if not targets:
+                return True
+            self.flushes += 1
+            self._flushing = (threading.current_thread(), generation)
+            try:
+                return self._send(targets)
+            finally:
+                self._flushing = None
+
+    def superseded(self) -> bool:
+        """
+        Whether the calling thread is sending a flush that discard() dropped
+
+        Returns:
+            bool: True if the caller is running flush() and discard() has
+                been called since it took its targets
+        """
+        flushing = self._flushing
+        return (
+            flushing is not None
+            and flushing[0] is threading.current_thread()
+            and flushing[1] != self._generation
+        )
+
+    def discard(self) -> int:
+        """
+        Drop pending changes without sending them
+
+        A flush already sending is not waited for; the commands it has yet
+        to queue are dropped instead (see superseded()).
+
+        Returns:
+            int: Number of lasers whose pending change was dropped
+        """
+        with self._lock:
+            self._generation += 1
+            dropped = len(self._targets)
+            self._targets.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self.discarded += dropped
+        return dropped
+
+    @property
+    def pending(self) -> int:
+        """Lasers with a change waiting to be sent"""
+        return len(self._targets)
+
+    def __repr__(self) -> str:
+        return (
+            f"CommandCoalescer(window={self.window}s, pending={self.pending}, "
+            f"requested={self.requested}, flushes={self.flushes})"
+        )
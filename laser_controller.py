@@ -12,10 +12,22 @@ Date: 2025-09-19
 
 import serial
 import time
-from typing import Dict, Optional, Union
+import re
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Union
 from enum import Enum
 import logging
 
+import laser_binary
+from laser_coalescer import CommandCoalescer
+from laser_heartbeat import Heartbeat
+from laser_journal import KIND_RECEIVED, KIND_SENT, CommandJournal
+from laser_metrics import ControllerMetrics
+from laser_usage import UsageStore, UsageTracker, find_box_serial
+from laser_scheduler import DeadlineScheduler, JitterHistogram
+
 
 class LaserState(Enum):
     """Enumeration for laser states"""
@@ -30,21 +42,526 @@ class LaserControllerError(Exception):
     pass
 
 
+# Reply formats printed by laser_ttl_controller.ino
+_TOGGLE_REPLY = re.compile(r"^Laser (\d+) \(Pin \d+\) is now (ON|OFF)")
+_STATUS_LINE = re.compile(r"^Laser (\d+) \(Pin \d+\): (ON|OFF)")
+_ALL_ON_REPLY = "All active lasers turned ON"
+_ALL_OFF_REPLY = "All lasers turned OFF"
+_MASK_REPLY = re.compile(r"^Laser mask \d+:")
+_MASK_STATE = re.compile(r"(\d+)=(ON|OFF)")
+_ERROR_PREFIXES = ("Unknown command", "Invalid", "Usage:")
+_VERSION_REPLY = re.compile(r"^Protocol version: (\d+)")
+_SWITCH_EVENT = re.compile(r"^SW (\d+) (ON|OFF)$")
+_SEQUENCE_EVENT = re.compile(r"^SEQ (DONE|ABORTED)$")
+_WATCHDOG_EVENT = "WATCHDOG TRIPPED"
+_STATUS_HEADER = "=== Current Laser Status ==="
+_LASER_COMMAND = re.compile(r"^(?:(?:on|off) )?(\d+)$")
+
+# Serial protocol versions (PROTOCOL_VERSION in the firmware sketches)
+PROTOCOL_LEGACY = 1  # Commands framed by Serial.readString(), no 'version'
+PROTOCOL_LINE = 2  # Newline-terminated commands processed on arrival
+PROTOCOL_MASK = 3  # Adds 'mask N' to set every laser in one command
+PROTOCOL_ABSOLUTE = 4  # Adds absolute 'on N' / 'off N' commands
+PROTOCOL_EVENTS = 5  # Physical switch changes reported as 'SW N ON|OFF'
+PROTOCOL_SEQUENCE = 6  # Adds hardware-timed sequences ('seq_add', 'seq_run')
+PROTOCOL_BINARY = 7  # Adds 3-byte binary frames alongside text (laser_binary)
+PROTOCOL_BAUD = 8  # Adds 'baud N' to switch to a faster rate after connecting
+PROTOCOL_STOP = 9  # Adds the single-byte emergency stop (laser_binary.STOP_BYTE)
+PROTOCOL_WATCHDOG = 10  # Adds 'watchdog N' and laser_binary.KEEPALIVE_BYTE
+PROTOCOL_SEQUENCE_END = 11  # 'seq_run R M' leaves mask M on when a sequence ends
+
+# Rate the firmware boots at, and the rates it accepts in 'baud N'
+# (DEFAULT_BAUD_RATE and SUPPORTED_BAUD_RATES in the sketches)
+DEFAULT_BAUD_RATE = 9600
+SUPPORTED_BAUD_RATES = (9600, 19200, 38400, 57600, 115200)
+
+# Firmware limits (MAX_COMMAND_LENGTH and MAX_SEQUENCE_STEPS in the sketches)
+_MAX_COMMAND_LENGTH = 64
+MAX_SEQUENCE_STEPS = 64
+
+# Pipelined commands must fit in the Arduino's serial receive buffer, or
+# bytes arriving while the firmware is busy printing a reply are lost
+_RX_BUFFER_SIZE = 64
+
+# Binary sequence numbers run 1-127, so the window must stay well below that
+MAX_PIPELINE_DEPTH = 32
+
+# Legacy firmware only processes a command after this much serial silence
+_LEGACY_READ_STALL = 1.0
+
+# Poll interval of the background reader (also bounds ack timeout resolution)
+_READ_POLL_INTERVAL = 0.05
+
+# Boot banner printed by setup() in both sketches
+_BANNER_START = "=== Configurable Arduino Laser TTL Controller ==="
+_BANNER_END = "Setup complete."
+
+# Readiness pings on connect: the first goes out after _PING_DELAY unless a
+# banner is arriving, then one per _PING_INTERVAL (longer than the legacy
+# stall, so at most one ping is ever unanswered)
+_PING_DELAY = 0.1
+_PING_INTERVAL = 1.5
+_UNKNOWN_REPLY = "Unknown command"
+
+# The firmware reverts a rate switch that is not confirmed within
+# BAUD_CONFIRM_TIMEOUT_MS; the confirming ping gets a much shorter timeout
+_BAUD_CONFIRM_TIMEOUT = 1.0
+_BAUD_PING_TIMEOUT = 0.25
+
+# Longest wait for the firmware to confirm an emergency stop byte before
+# falling back to 'all_off'. The firmware may first have to finish printing
+# the reply it is working on (a status report takes about 150 ms at 9600).
+_STOP_CONFIRM_TIMEOUT = 0.5
+
+# Delay between reconnection attempts after the link drops: the first
+# attempt is immediate, then the delay doubles up to the maximum
+_RECONNECT_INITIAL_DELAY = 0.25
+_RECONNECT_MAX_DELAY = 5.0
+
+# Commands with the same effect however often they run, so one that was in
+# flight when the link dropped can safely be sent again
+_RETRYABLE_COMMAND = re.compile(
+    r"^(?:(?:on|off|mask|watchdog) \d+|all_on|all_off|seq_abort|seq_clear"
+    r"|status|config|version|ping)$"
+)
+
+# Watchdog timeouts accepted by 'watchdog N', in seconds
+MIN_WATCHDOG_TIMEOUT = 0.1
+MAX_WATCHDOG_TIMEOUT = 60.0
+
+_LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+_logging_configured = False
+_logging_lock = threading.Lock()
+
+
+def _configure_logging() -> None:
+    """
+    Print this module's INFO messages to stderr, once per process
+
+    Skipped when the application has already configured logging (e.g. with
+    logging.basicConfig()), since the messages would then be printed twice.
+    """
+    global _logging_configured
+    with _logging_lock:
+        if _logging_configured:
+            return
+        _logging_configured = True
+        logger = logging.getLogger(__name__)
+        if logger.handlers or logging.getLogger().handlers:
+            return
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+        logger.addHandler(handler)
+        if logger.level == logging.NOTSET:
+            logger.setLevel(logging.INFO)
+
+
+def _reply_belongs(command: str, line: str) -> bool:
+    """
+    Decide whether a line can start the reply to a command
+
+    Lines that cannot are left over from commands whose replies are no
+    longer awaited (timed out, or cancelled by an emergency stop), and must
+    not be taken as the reply to the next command.
+
+    Args:
+        command: Command awaiting its reply
+        line: First reply line
+
+    Returns:
+        bool: False only for lines that cannot start this command's reply
+    """
+    if line.startswith(_ERROR_PREFIXES):
+        return True
+    if command == "all_on":
+        return line == _ALL_ON_REPLY
+    if command in ("all_off", "seq_abort"):
+        return line == _ALL_OFF_REPLY
+    if command == "status":
+        return line == _STATUS_HEADER
+    if command == "version":
+        return bool(_VERSION_REPLY.match(line))
+    if command.startswith("mask "):
+        return bool(_MASK_REPLY.match(line))
+    laser_match = _LASER_COMMAND.match(command)
+    if laser_match:
+        toggle_match = _TOGGLE_REPLY.match(line)
+        return bool(toggle_match) and toggle_match.group(1) == laser_match.group(1)
+    # Unknown reply shape - accept anything
+    return not _VERSION_REPLY.match(line)
+
+
+def _sequence_activity(
+    steps: List[Tuple[int, int]], num_lasers: int, start_mask: int, played_us: int
+) -> Tuple[Dict[int, Tuple[int, int, int, int, int]], int]:
+    """
+    Add up what a sequence table did to each laser, without walking every edge
+
+    Args:
+        steps: (mask, duration in us) steps of the table
+        num_lasers: Number of lasers
+        start_mask: Laser states before the table started
+        played_us: How long the table played, over all repeats
+
+    Returns:
+        Tuple: Per laser, (on-time in us, switch-ons, switch-offs, longest
+            on-period in us, how long it had been on at the end), and the
+            mask of the last step played
+    """
+    cycle_us = sum(duration_us for _, duration_us in steps)
+    if not cycle_us or played_us <= 0:
+        return {}, start_mask
+
+    full_cycles, remainder_us = divmod(played_us, cycle_us)
+    partial = []
+    offset = 0
+    for mask, duration_us in steps:
+        if offset >= remainder_us:
+            break
+        partial.append((mask, min(duration_us, remainder_us - offset)))
+        offset += duration_us
+    # A run of ON steps can only span more than two cycles if the laser is
+    # on in every step, so the last two cycles and the partial one hold every
+    # shape of run
+    tail = steps * min(full_cycles, 2) + partial
+    boundaries = max(full_cycles - 1, 0) + (1 if full_cycles and partial else 0)
+
+    def edges(states: List[bool]) -> Tuple[int, int]:
+        pairs = list(zip(states, states[1:]))
+        return (
+            sum(1 for a, b in pairs if not a and b),
+            sum(1 for a, b in pairs if a and not b),
+        )
+
+    activity = {}
+    for i in range(num_lasers):
+        bit = 1 << i
+        cycle = [bool(mask & bit) for mask, _ in steps]
+        played = [bool(mask & bit) for mask, _ in partial]
+        cycle_ons, cycle_offs = edges(cycle)
+        wrap_ons, wrap_offs = edges([cycle[-1], cycle[0]])
+        partial_ons, partial_offs = edges(played)
+        start_ons, start_offs = edges([bool(start_mask & bit), cycle[0]])
+
+        on_us = full_cycles * sum(
+            duration_us for mask, duration_us in steps if mask & bit
+        ) + sum(duration_us for mask, duration_us in partial if mask & bit)
+        ons = start_ons + full_cycles * cycle_ons + boundaries * wrap_ons + partial_ons
+        offs = (
+            start_offs
+            + full_cycles * cycle_offs
+            + boundaries * wrap_offs
+            + partial_offs
+        )
+
+        if full_cycles and all(cycle):
+            longest_us = run_us = played_us
+        else:
+            longest_us = run_us = 0
+            for mask, duration_us in tail:
+                run_us = run_us + duration_us if mask & bit else 0
+                longest_us = max(longest_us, run_us)
+        activity[i + 1] = (on_us, ons, offs, longest_us, run_us)
+    return activity, tail[-1][0]
+
+
+def _reply_complete(command: str, lines: List[str], num_lasers: int) -> bool:
+    """
+    Decide whether the lines received so far form the whole reply to a command
+
+    The firmware does not terminate its replies, so framing relies on the
+    known shape of each command's output.
+
+    Args:
+        command: Command the reply belongs to
+        lines: Non-empty reply lines received so far
+        num_lasers: Number of lasers reported by 'status'
+
+    Returns:
+        bool: True once the reply is complete
+    """
+    first = lines[0]
+    if first.startswith("Usage:"):
+        return len(lines) >= 2  # Usage line followed by an example line
+    if first.startswith(_ERROR_PREFIXES):
+        return True
+    if command == "status":
+        return len(lines) >= num_lasers + 1  # Header plus one line per laser
+    if command == "config":
+        last = lines[-1]
+        return len(lines) > 1 and len(last) >= 10 and set(last) == {"="}
+    if command.startswith("set_logic"):
+        return len(lines) >= 3
+    return True
+
+
+class CommandReply:
+    """
+    Parsed firmware reply to a single command
+
+    Attributes:
+        command: Command string that produced this reply
+        lines: Raw reply lines (without line endings)
+        round_trip: Seconds from writing the command to receiving the full reply
+        states: Laser states reported by the reply, keyed by laser number
+        error: Firmware error message, or None if the command was accepted
+    """
+
+    def __init__(
+        self, command: str, lines: List[str], round_trip: float, num_lasers: int
+    ):
+        self.command = command
+        self.lines = lines
+        self.round_trip = round_trip
+        self.states: Dict[int, LaserState] = {}
+        self.error: Optional[str] = None
+
+        for line in lines:
+            toggle_match = _TOGGLE_REPLY.match(line) or _STATUS_LINE.match(line)
+            if toggle_match:
+                laser_number = int(toggle_match.group(1))
+                self.states[laser_number] = LaserState[toggle_match.group(2)]
+            elif _MASK_REPLY.match(line):
+                for laser_number, state in _MASK_STATE.findall(line):
+                    self.states[int(laser_number)] = LaserState[state]
+            elif line == _ALL_ON_REPLY or line == _ALL_OFF_REPLY:
+                state = LaserState.ON if line == _ALL_ON_REPLY else LaserState.OFF
+                for i in range(1, num_lasers + 1):
+                    self.states[i] = state
+            elif line.startswith(_ERROR_PREFIXES) and self.error is None:
+                self.error = line
+
+    @classmethod
+    def from_binary(
+        cls,
+        command: str,
+        status: int,
+        mask: int,
+        round_trip: float,
+        num_lasers: int,
+    ) -> "CommandReply":
+        """
+        Build a reply from a binary frame
+
+        Every binary reply carries the full laser mask, so states are
+        reported for all lasers whatever the command was.
+        """
+        reply = cls(command, [], round_trip, num_lasers)
+        if status == laser_binary.STATUS_OK:
+            for i in range(num_lasers):
+                reply.states[i + 1] = (
+                    LaserState.ON if mask & (1 << i) else LaserState.OFF
+                )
+        else:
+            reply.error = laser_binary.STATUS_ERRORS.get(
+                status, f"Invalid reply status {status}"
+            )
+        return reply
+
+    @property
+    def ok(self) -> bool:
+        """True if the firmware accepted the command"""
+        return self.error is None
+
+    def __repr__(self) -> str:
+        return (
+            f"CommandReply(command='{self.command}', ok={self.ok}, "
+            f"round_trip={self.round_trip * 1000:.1f}ms)"
+        )
+
+
+class LaserSequence:
+    """
+    Table of (mask, duration) steps for hardware-timed playback
+
+    The firmware plays the table with micros() timing once uploaded with
+    MultiLaserController.upload_sequence(), so edge timing no longer depends
+    on the host or the serial link. Durations are stored in whole
+    microseconds, the firmware's timing unit.
+    """
+
+    def __init__(self, num_lasers: int = 3):
+        """
+        Initialise an empty sequence
+
+        Args:
+            num_lasers: Number of lasers the masks refer to (default: 3)
+        """
+        self.num_lasers = num_lasers
+        self.steps: List[Tuple[int, int]] = []
+
+    def add_step(
+        self,
+        lasers: Union[int, Dict[int, Union[bool, LaserState]]],
+        duration: float,
+    ) -> "LaserSequence":
+        """
+        Append a step
+
+        Args:
+            lasers: Bitmask (bit n - 1 = laser n), or states keyed by laser
+                number where unlisted lasers are OFF
+            duration: How long the step lasts in seconds
+
+        Returns:
+            LaserSequence: self, so calls can be chained
+        """
+        if isinstance(lasers, dict):
+            mask = 0
+            for laser_number, state in lasers.items():
+                if not (1 <= laser_number <= self.num_lasers):
+                    raise ValueError(
+                        f"Laser number must be between 1 and {self.num_lasers}"
+                    )
+                if state == LaserState.ON or state is True:
+                    mask |= 1 << (laser_number - 1)
+        else:
+            mask = lasers
+
+        if not (0 <= mask < (1 << self.num_lasers)):
+            raise ValueError(
+                f"Laser mask must be between 0 and {(1 << self.num_lasers) - 1}"
+            )
+        duration_us = round(duration * 1_000_000)
+        if duration_us < 1:
+            raise ValueError("Step duration must be at least 1 microsecond")
+        if len(self.steps) >= MAX_SEQUENCE_STEPS:
+            raise ValueError(f"Sequences are limited to {MAX_SEQUENCE_STEPS} steps")
+
+        self.steps.append((mask, duration_us))
+        return self
+
+    @classmethod
+    def flash(
+        cls,
+        laser_number: int,
+        flash_duration: float,
+        base_mask: int = 0,
+        num_lasers: int = 3,
+    ) -> "LaserSequence":
+        """
+        One flash period: laser on for flash_duration, then off for as long
+
+        Args:
+            laser_number: Laser to flash
+            flash_duration: On and off time in seconds
+            base_mask: States of the other lasers, held during the flash
+            num_lasers: Number of lasers
+
+        Returns:
+            LaserSequence: Two-step sequence; play it flash_count times
+        """
+        bit = 1 << (laser_number - 1)
+        sequence = cls(num_lasers)
+        sequence.add_step(base_mask | bit, flash_duration)
+        sequence.add_step(base_mask & ~bit, flash_duration)
+        return sequence
+
+    @classmethod
+    def sequential(
+        cls, delay_seconds: float, pause_seconds: float = 0.1, num_lasers: int = 3
+    ) -> "LaserSequence":
+        """
+        One cycle of the sequential pattern: each laser alone in turn
+
+        Args:
+            delay_seconds: How long each laser stays on, and the pause
+                between cycles
+            pause_seconds: All-off gap before each laser turns on
+            num_lasers: Number of lasers
+
+        Returns:
+            LaserSequence: One cycle; play it once per cycle
+        """
+        sequence = cls(num_lasers)
+        for laser_number in range(1, num_lasers + 1):
+            sequence.add_step(0, pause_seconds)
+            sequence.add_step(1 << (laser_number - 1), delay_seconds)
+        sequence.add_step(0, delay_seconds)
+        return sequence
+
+    @property
+    def duration(self) -> float:
+        """Length of one playback of the table in seconds"""
+        return sum(duration_us for _, duration_us in self.steps) / 1_000_000
+
+    def to_commands(self) -> List[str]:
+        """
+        Encode the table as firmware commands
+
+        Steps are packed into as few 'seq_add' lines as fit the firmware's
+        command buffer.
+
+        Returns:
+            List[str]: 'seq_clear' followed by 'seq_add' commands
+        """
+        commands = ["seq_clear"]
+        line = "seq_add"
+        for mask, duration_us in self.steps:
+            token = f" {mask}:{duration_us}"
+            if len(line) + len(token) > _MAX_COMMAND_LENGTH and line != "seq_add":
+                commands.append(line)
+                line = "seq_add"
+            line += token
+        if line != "seq_add":
+            commands.append(line)
+        return commands
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def __repr__(self) -> str:
+        return f"LaserSequence(steps={len(self.steps)}, duration={self.duration:.6f}s)"
+
+
+class _PendingCommand:
+    """Command awaiting its reply from the firmware"""
+
+    def __init__(self, command: str, timeout: float):
+        self.command = command
+        self.timeout = timeout
+        self.future: Future = Future()
+        self.lines: List[str] = []
+        self.sent_at: Optional[float] = None
+        self.sequence: Optional[int] = None  # Set when sent as a binary frame
+        self.data: Optional[bytes] = None  # Encoded when first due to be sent
+
+
 class MultiLaserController:
     """
     Python class for controlling multiple lasers through Arduino MCU
 
-    Simple state tracking - lasers only change state when explicitly toggled.
-    No polling or background updates needed.
+    Every command is matched to the firmware's reply by a background reader
+    thread, and laser states are only updated from acknowledged replies, in
+    the order the replies arrive. States are read from the firmware once at
+    connect time; after that, physical switch events pushed by the firmware
+    keep them current, so no polling is needed.
+
+    All methods are thread-safe. Callers only queue commands; a single
+    writer thread sends whatever is due in one write() call, so any number
+    of threads can share one controller without an external lock.
     """
 
     def __init__(
         self,
         port: str,
-        baud_rate: int = 9600,
+        baud_rate: int = DEFAULT_BAUD_RATE,
         timeout: float = 2.0,
         num_lasers: int = 3,
         auto_connect: bool = True,
+        reset_on_connect: bool = True,
+        ready_timeout: float = 3.0,
+        binary: bool = True,
+        max_baud_rate: Optional[int] = 115200,
+        pipeline_depth: int = 8,
+        max_queued: int = 64,
+        coalesce_window: Optional[float] = None,
+        watchdog_timeout: Optional[float] = None,
+        heartbeat_interval: Optional[float] = None,
+        auto_reconnect: bool = True,
+        reconnect_timeout: float = 30.0,
+        journal_path: Optional[str] = None,
+        usage_path: Optional[str] = None,
     ):
         """
         Initialise the MultiLaserController
@@ -52,33 +569,197 @@ class MultiLaserController:
         Args:
             port: Serial port name (e.g., 'COM3' on Windows, '/dev/ttyUSB0' on Linux)
             baud_rate: Serial communication baud rate (default: 9600)
-            timeout: Serial read timeout in seconds (default: 2.0)
+            timeout: Time to wait for a command acknowledgement in seconds (default: 2.0)
             num_lasers: Number of lasers connected to the Arduino (default: 3)
             auto_connect: Whether to automatically connect on initialisation
+            reset_on_connect: Assert DTR when opening the port, which resets
+                boards with auto-reset. False keeps DTR low so a running
+                board is not reset (default: True)
+            ready_timeout: Longest time to wait for the firmware to boot and
+                answer on connect, in seconds (default: 3.0)
+            binary: Use binary frames for laser commands when the firmware
+                supports them (default: True)
+            max_baud_rate: Fastest rate to negotiate up to after connecting at
+                baud_rate, if the firmware supports 'baud N' (default: 115200;
+                None stays at baud_rate)
+            pipeline_depth: Most commands sent ahead of their replies
+                (default: 8; 1 waits for every reply before the next write).
+                Legacy firmware always uses 1.
+            max_queued: Most commands waiting to be sent; submit_command()
+                blocks while the queue is full (default: 64)
+            coalesce_window: Collect laser state changes for this many
+                seconds and send only their net effect (default: None, every
+                change is sent at once). See laser_coalescer.
+            watchdog_timeout: Have the firmware turn every laser OFF when
+                the host has been silent for this many seconds, e.g. because
+                the process died (default: None, no watchdog). Needs
+                protocol v10 firmware. See laser_heartbeat.
+            heartbeat_interval: Seconds of silence after which a keepalive
+                is sent (default: a quarter of watchdog_timeout)
+            auto_reconnect: Reopen the port when a read or write fails,
+                restore the laser states and resend pending commands
+                (default: True)
+            reconnect_timeout: Seconds to keep trying to reconnect before
+                giving up and disconnecting (default: 30.0)
+            journal_path: Record every command and reply in this ring file
+                (default: None, no journal). See laser_journal.
+            usage_path: Accumulate each laser's on-time and switch-ons in
+                this SQLite file, keyed by the box's USB serial number
+                (default: None, no accounting). See laser_usage.
         """
+        if not (1 <= pipeline_depth <= MAX_PIPELINE_DEPTH):
+            raise ValueError(
+                f"Pipeline depth must be between 1 and {MAX_PIPELINE_DEPTH}"
+            )
+        if watchdog_timeout is not None and not (
+            MIN_WATCHDOG_TIMEOUT <= watchdog_timeout <= MAX_WATCHDOG_TIMEOUT
+        ):
+            raise ValueError(
+                f"Watchdog timeout must be between {MIN_WATCHDOG_TIMEOUT} and "
+                f"{MAX_WATCHDOG_TIMEOUT} seconds"
+            )
+        if heartbeat_interval is None and watchdog_timeout is not None:
+            heartbeat_interval = watchdog_timeout / 4
+        if watchdog_timeout is not None and not (
+            0 < heartbeat_interval < watchdog_timeout
+        ):
+            raise ValueError("Heartbeat interval must be shorter than the timeout")
         self.port = port
         self.baud_rate = baud_rate
         self.timeout = timeout
         self.num_lasers = num_lasers
+        self.reset_on_connect = reset_on_connect
+        self.ready_timeout = ready_timeout
+        self.binary = binary
+        self.max_baud_rate = max_baud_rate
+        self.pipeline_depth = pipeline_depth
+        self.max_queued = max_queued
+        self.watchdog_timeout = watchdog_timeout
+        self.auto_reconnect = auto_reconnect
+        self.reconnect_timeout = reconnect_timeout
 
         # Serial connection
         self.serial_conn: Optional[serial.Serial] = None
         self.connected = False
 
-        # State tracking - assume all lasers start OFF
+        # Request/response engine - commands wait in _queued until written,
+        # then sit in _in_flight until the reader thread matches their reply.
+        # Up to pipeline_depth commands are in flight at once: binary replies
+        # are matched by sequence number, text replies in the order sent.
+        self._lock = threading.Lock()
+        self._queue_space = threading.Condition(self._lock)
+        self._queued: Deque[_PendingCommand] = deque()
+        self._in_flight: Deque[_PendingCommand] = deque()
+        self._in_flight_bytes = 0
+        self._reader_thread: Optional[threading.Thread] = None
+        self._reader_running = False
+
+        # Single writer thread - _pump() moves due commands into _outbox and
+        # the writer sends everything there with one write() call. Commands
+        # are in _in_flight from the moment they enter _outbox; sent_at is
+        # set when the writer takes them. Bumping _write_epoch discards a
+        # batch the writer has taken but not yet written. _write_lock is held
+        # for a whole write(), so it is never taken while holding _lock.
+        self._outbox: List[_PendingCommand] = []
+        self._writer_wake = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()
+        self._write_epoch = 0
+        self._writer_thread: Optional[threading.Thread] = None
+        self._writer_running = False
+        self._last_write = 0.0
+        self.write_calls = 0
+        self.commands_written = 0
+        self._link_up = False
+        self.last_reply: Optional[CommandReply] = None
+
+        # Recovery from a dropped link - commands submitted while
+        # reconnecting are held until the laser states have been restored
+        self.reconnecting = False
+        self._held: Deque[_PendingCommand] = deque()
+        self._restore_target: Dict[int, bool] = {}
+        self._recovery_lock = threading.Lock()
+        self._recovery_thread: Optional[threading.Thread] = None
+        self._recovery_cancelled = threading.Event()
+        self._connection_listeners: List[Callable[[str], None]] = []
+
+        # Connection health, see connection_health()
+        self.drops = 0
+        self.recoveries = 0
+        self.failed_recoveries = 0
+        self.replayed_commands = 0
+        self.last_recovery_time: Optional[float] = None
+        self.recovery_time = JitterHistogram(bin_width_us=100_000)
+
+        # Command counters and round-trip histograms, see metrics_snapshot()
+        # and laser_metrics.MetricsExporter
+        self.metrics = ControllerMetrics()
+
+        # Optional binary record of all traffic, appended to by the writer
+        # and reader threads
+        self.journal: Optional[CommandJournal] = None
+        if journal_path is not None:
+            self.journal = CommandJournal(journal_path)
+
+        # Optional per-laser usage accounting, started on connect once the
+        # box's serial number is known
+        self.usage_path = usage_path
+        self.usage: Optional[UsageTracker] = None
+        self.box_serial: Optional[str] = None
+
+        # Negotiated on connect - assume legacy framing until the firmware
+        # reports otherwise
+        self.protocol_version = PROTOCOL_LEGACY
+        self.binary_mode = False
+        self._next_sequence = 1
+        self.link_baud_rate = baud_rate
+
+        # Resolved by the reader thread when a hardware sequence ends, which
+        # leaves the lasers in _sequence_end_mask
+        self._sequence_future: Optional[Future] = None
+        self._sequence_end_mask = 0
+
+        # Copy of the last table uploaded, for run_sequence()'s default
+        # timeout when it plays the current table, and the table playing now
+        # with its repeats, start mask and start time, for usage accounting
+        self._uploaded_sequence: Optional[LaserSequence] = None
+        self._sequence_playing: Optional[
+            Tuple[List[Tuple[int, int]], int, int, float, float]
+        ] = None
+
+        # Deadline scheduler for host-timed patterns on older firmware; one
+        # pattern plays at a time
+        self.scheduler = DeadlineScheduler()
+        self._host_pattern_lock = threading.Lock()
+
+        # Emergency stop confirmation (set by the reader thread) and the
+        # time from calling emergency_stop() to all lasers being OFF
+        self._stop_confirmed = threading.Event()
+        self.last_stop_latency: Optional[float] = None
+        self.stop_latency = JitterHistogram(bin_width_us=500)
+
+        # Optional merging of rapid state changes into their net effect
+        self.coalescer: Optional[CommandCoalescer] = None
+        if coalesce_window:
+            self.coalescer = CommandCoalescer(coalesce_window, self._send_targets)
+
+        # Optional host watchdog, fed by keepalives whenever the link is idle
+        self.heartbeat: Optional[Heartbeat] = None
+        self.watchdog_trips = 0
+        self._watchdog_armed = False
+        if watchdog_timeout is not None:
+            self.heartbeat = Heartbeat(
+                heartbeat_interval, self._send_keepalive, lambda: self._last_write
+            )
+
+        # State tracking - assume all lasers start OFF until synced
         self.laser_states: Dict[int, LaserState] = {}
         for i in range(1, num_lasers + 1):
             self.laser_states[i] = LaserState.OFF
+        self._state_listeners: List[Callable[[Dict[int, LaserState]], None]] = []
 
-        # Logging setup
+        # Logging setup - the handler is shared by every controller
+        _configure_logging()
         self.logger = logging.getLogger(__name__)
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
-        handler.setFormatter(formatter)
-        self.logger.addHandler(handler)
-        self.logger.setLevel(logging.INFO)
 
         if auto_connect:
             self.connect()
@@ -91,76 +772,1101 @@ class MultiLaserController:
             bool: True if connection successful, False otherwise
 
         Raises:
-            LaserControllerError: If connection fails
+            LaserControllerError: If connection fails. The port is closed
+                again so that it is not left locked.
         """
         try:
-            self.serial_conn = serial.Serial(
-                port=self.port,
-                baudrate=self.baud_rate,
-                timeout=self.timeout,
-                write_timeout=self.timeout,
+            synced = self._open_link(self.baud_rate)
+            if self.usage_path is not None:
+                self._start_usage()
+        except Exception as e:
+            self._abandon_link()
+            if not isinstance(e, serial.SerialException):
+                raise
+            self.logger.error("Serial connection failed: %s", e)
+            raise LaserControllerError(f"Could not connect to {self.port}: {e}")
+
+        # Make sure all lasers are OFF on startup
+        if not synced or any(
+            state == LaserState.ON for state in self.laser_states.values()
+        ):
+            self.turn_off_all()
+        return True
+
+    def _start_usage(self) -> None:
+        """Start accounting laser usage for the box on this port"""
+        self.box_serial = find_box_serial(self.port) or self.port
+        if self.usage is None or self.usage.serial_number != self.box_serial:
+            self.usage = UsageTracker(UsageStore(self.usage_path), self.box_serial)
+        with self._lock:
+            # Lasers found on have been on since at least now
+            self.usage.record(
+                {
+                    laser_number: state == LaserState.ON
+                    for laser_number, state in self.laser_states.items()
+                }
             )
+        self.usage.start()
 
-            # Wait for Arduino to initialise
-            time.sleep(2)
+    def _open_link(self, baud_rate: int) -> bool:
+        """
+        Open the port, run the connection handshake and read the laser states
 
-            # Flush any initial data
-            self.serial_conn.reset_input_buffer()
-            self.serial_conn.reset_output_buffer()
+        Shared by connect() and by reconnection after the link drops.
 
-            # Test connection
-            if self.serial_conn.is_open:
-                self.connected = True
-                self.logger.info(f"Connected to laser controller on {self.port}")
+        Args:
+            baud_rate: Rate to open the port at
 
-                # Ensure all lasers are OFF on startup
-                self.turn_off_all()
-                return True
-            else:
-                raise LaserControllerError("Failed to open serial connection")
+        Returns:
+            bool: True if the laser states were read from the firmware
 
-        except serial.SerialException as e:
-            self.logger.error(f"Serial connection failed: {e}")
-            raise LaserControllerError(f"Could not connect to {self.port}: {e}")
+        Raises:
+            serial.SerialException: If the port cannot be opened
+            LaserControllerError: If the port does not stay open
+        """
+        self.serial_conn = serial.Serial(
+            baudrate=baud_rate,
+            timeout=_READ_POLL_INTERVAL,
+            write_timeout=self.timeout,
+        )
+        if not self.reset_on_connect:
+            # Set before opening so the auto-reset line is never pulsed
+            self.serial_conn.dtr = False
+            self.serial_conn.rts = False
+        self.serial_conn.port = self.port
+        self.serial_conn.open()
+
+        # Wait for the firmware to boot (or answer, if it was not reset)
+        start = time.perf_counter()
+        pinged_version = self._wait_until_ready()
+
+        # Test connection
+        if not self.serial_conn.is_open:
+            raise LaserControllerError("Failed to open serial connection")
+
+        self.connected = True
+        self._link_up = True
+        self.binary_mode = False
+        self._start_writer()
+        self._start_reader()
+        if pinged_version is not None:
+            self.protocol_version = pinged_version
+        else:
+            self.protocol_version = self._negotiate_protocol()
+        self.binary_mode = (
+            self.binary
+            and self.protocol_version >= PROTOCOL_BINARY
+            and self._enable_binary()
+        )
+        self.link_baud_rate = baud_rate
+        if self.protocol_version >= PROTOCOL_BAUD:
+            self._negotiate_baud_rate()
+        if self.heartbeat is not None:
+            self._arm_watchdog()
+        self.logger.info(
+            "Connected to laser controller on %s "
+            "(protocol v%s%s, %s baud, ready in %.2f s)",
+            self.port,
+            self.protocol_version,
+            ", binary" if self.binary_mode else "",
+            self.link_baud_rate,
+            time.perf_counter() - start,
+        )
+        if self.journal is not None:
+            self.journal.note(
+                f"connected {self.port} v{self.protocol_version} "
+                f"{self.link_baud_rate} baud"
+            )
+
+        # Start from the hardware's actual state
+        return self.sync_states()
+
+    def _abandon_link(self) -> None:
+        """Undo a connection attempt that failed part-way through"""
+        if self.heartbeat is not None and self.heartbeat.running:
+            self.heartbeat.stop()
+        self.connected = False
+        self.binary_mode = False
+        if self.serial_conn is not None:
+            self._close_link()
+        self._fail_pending(LaserControllerError("Connection failed"))
+
+    def _close_link(self) -> None:
+        """Stop the reader and close the port, ignoring errors from a dead link"""
+        self._link_up = False
+        self._stop_writer()
+        self._stop_reader()
+        try:
+            self.serial_conn.close()
+        except (serial.SerialException, OSError):
+            pass
 
     def disconnect(self) -> None:
         """Close the serial connection"""
+        if self.reconnecting:
+            self._cancel_recovery()
         if self.serial_conn and self.serial_conn.is_open:
-            # Turn off all lasers before disconnecting
+            # Turn off all lasers before disconnecting, and put the firmware
+            # back on the rate it boots at for the next connection
             try:
                 self.turn_off_all()
+                if self._watchdog_armed:
+                    self.send_command("watchdog 0")
+                    self._watchdog_armed = False
+                if self.link_baud_rate != self.baud_rate:
+                    self.send_command(f"baud {self.baud_rate}")
             except:
                 pass  # Ignore errors during cleanup
 
-            self.serial_conn.close()
+            if self.heartbeat is not None and self.heartbeat.running:
+                self.heartbeat.stop()
+                self.logger.info(
+                    "Heartbeat stats: %s", self.heartbeat.summary(self.link_baud_rate)
+                )
             self.connected = False
+            self.binary_mode = False
+            self._close_link()
+            self._fail_pending(LaserControllerError("Connection closed"))
+            if self.journal is not None:
+                self.journal.note(f"disconnected {self.port}")
+                self.journal.flush()
             self.logger.info("Disconnected from laser controller")
+        elif self.connected:
+            # The link dropped and was not recovered
+            self.connected = False
+            self._fail_pending(LaserControllerError("Connection closed"))
+        if self.usage is not None:
+            self.usage.stop()
 
-    def _send_command(self, command: str) -> bool:
+    def _wait_until_ready(self) -> Optional[int]:
+        """
+        Wait until the firmware is ready for commands
+
+        Ready means either the end of the setup() banner after a reset, or a
+        reply to a 'version' ping when the board was not reset (no DTR, or a
+        board without auto-reset). Gives up after ready_timeout.
+
+        Returns:
+            Optional[int]: Protocol version if a ping was answered, else None
+        """
+        start = time.monotonic()
+        deadline = start + self.ready_timeout
+        next_ping = start + (_PING_DELAY if self.reset_on_connect else 0.0)
+        buffer = bytearray()
+        booting = False
+
+        while time.monotonic() < deadline:
+            buffer.extend(self.serial_conn.read(self.serial_conn.in_waiting or 1))
+            while b"\n" in buffer:
+                raw_line, _, buffer = buffer.partition(b"\n")
+                line = raw_line.decode("utf-8", errors="replace").strip()
+                if line and self.journal is not None:
+                    self.journal.append(KIND_RECEIVED, raw_line.rstrip(b"\r"))
+                if line == _BANNER_END:
+                    self.logger.debug("Firmware banner received")
+                    return None
+                if line == _BANNER_START:
+                    booting = True
+
+                version_match = _VERSION_REPLY.match(line)
+                if version_match:
+                    return int(version_match.group(1))
+                if line.startswith(_UNKNOWN_REPLY) and not booting:
+                    return PROTOCOL_LEGACY
+
+            now = time.monotonic()
+            if not booting and now >= next_ping:
+                if self.journal is not None:
+                    self.journal.append(KIND_SENT, b"version\n")
+                self.serial_conn.write(b"version\n")
+                next_ping = now + _PING_INTERVAL
+
+        self.logger.warning(
+            "No banner or ping reply within %s s, continuing", self.ready_timeout
+        )
+        self.serial_conn.reset_input_buffer()
+        return None
+
+    def _enable_binary(self) -> bool:
+        """
+        Switch laser commands to binary frames after a successful binary ping
+
+        Returns:
+            bool: True if the firmware answered the ping
+        """
+        self.binary_mode = True
+        try:
+            reply = self.send_command("ping")
+        except LaserControllerError as e:
+            self.logger.warning("Binary ping failed, using text commands: %s", e)
+            self.binary_mode = False
+            return False
+        return reply.ok
+
+    def _negotiate_baud_rate(self) -> int:
+        """
+        Move the link to the fastest rate both ends can use
+
+        Each candidate rate from max_baud_rate down is requested with
+        'baud N', then confirmed with a ping at the new rate. If the ping
+        goes unanswered the firmware reverts on its own, so the host goes
+        back to the previous rate and tries the next one down.
+
+        Returns:
+            int: Rate the link ended up on (link_baud_rate)
+        """
+        if self.max_baud_rate is None:
+            return self.link_baud_rate
+
+        candidates = sorted(
+            (
+                rate
+                for rate in SUPPORTED_BAUD_RATES
+                if self.link_baud_rate < rate <= self.max_baud_rate
+            ),
+            reverse=True,
+        )
+        for rate in candidates:
+            try:
+                reply = self.send_command(f"baud {rate}")
+            except LaserControllerError as e:
+                self.logger.warning("Baud rate negotiation failed: %s", e)
+                break
+            if not reply.ok:
+                continue
+
+            switched_at = time.monotonic()
+            self.serial_conn.baudrate = rate
+            try:
+                ping = self.send_command(
+                    "ping" if self.binary_mode else "version",
+                    timeout=_BAUD_PING_TIMEOUT,
+                )
+                # Garbled text can still look like a reply, so text links
+                # must return the version line itself
+                if ping.ok and (
+                    self.binary_mode
+                    or any(_VERSION_REPLY.match(line) for line in ping.lines)
+                ):
+                    self.link_baud_rate = rate
+                    return rate
+            except LaserControllerError:
+                pass
+
+            # Unconfirmed - wait for the firmware to fall back, then retry
+            self.logger.warning("No reply at %s baud, falling back", rate)
+            self.serial_conn.baudrate = self.link_baud_rate
+            time.sleep(max(0.0, switched_at + _BAUD_CONFIRM_TIMEOUT - time.monotonic()))
+            self.serial_conn.reset_input_buffer()
+        return self.link_baud_rate
+
+    def _arm_watchdog(self) -> bool:
+        """
+        Arm the firmware's host watchdog and start the heartbeat
+
+        Returns:
+            bool: True if the firmware accepted the watchdog timeout
+        """
+        if self.protocol_version < PROTOCOL_WATCHDOG:
+            self.logger.warning(
+                "Firmware protocol v%s has no watchdog; "
+                "lasers will stay on if this process dies",
+                self.protocol_version,
+            )
+            return False
+        if self._transact(f"watchdog {round(self.watchdog_timeout * 1000)}") is None:
+            return False
+        self._watchdog_armed = True
+        self.heartbeat.start()
+        return True
+
+    def _send_keepalive(self) -> bool:
+        """
+        Write one keepalive byte, between commands (heartbeat thread)
+
+        Returns:
+            bool: False if the write failed
+        """
+        with self._lock:
+            link_up = self._link_up
+        if not link_up:
+            return False
+        # _lock is not held across the write, which can block for as long as
+        # write_timeout behind the writer thread
+        try:
+            with self._write_lock:
+                self.serial_conn.write(bytes([laser_binary.KEEPALIVE_BYTE]))
+        except (serial.SerialException, OSError) as e:
+            self.logger.error("Keepalive failed: %s", e)
+            return False
+        self._last_write = time.perf_counter()
+        self.metrics.record_bytes_written(1)
+        return True
+
+    def _negotiate_protocol(self) -> int:
+        """
+        Ask the firmware which serial protocol it speaks
+
+        Legacy firmware has no 'version' command and answers "Unknown command"
+        once its readString() stall has elapsed, which selects the legacy path.
+
+        Returns:
+            int: Protocol version (PROTOCOL_LEGACY or newer)
+        """
+        try:
+            reply = self.send_command(
+                "version", timeout=self.timeout + _LEGACY_READ_STALL
+            )
+        except LaserControllerError as e:
+            self.logger.warning("Protocol handshake failed, assuming legacy: %s", e)
+            return PROTOCOL_LEGACY
+
+        for line in reply.lines:
+            version_match = _VERSION_REPLY.match(line)
+            if version_match:
+                return int(version_match.group(1))
+        return PROTOCOL_LEGACY
+
+    @property
+    def window(self) -> int:
+        """Commands that may be in flight at once with the current firmware"""
+        if self.protocol_version >= PROTOCOL_LINE:
+            return self.pipeline_depth
+        # Legacy firmware reads everything that arrives as one command
+        return 1
+
+    @property
+    def ack_timeout(self) -> float:
+        """Time to wait for a reply, allowing for the legacy readString() stall"""
+        if self.protocol_version >= PROTOCOL_LINE:
+            return self.timeout
+        return self.timeout + _LEGACY_READ_STALL
+
+    def _start_writer(self) -> None:
+        """Start the thread that performs every command write"""
+        self._writer_running = True
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop, name=f"laser-writer-{self.port}", daemon=True
+        )
+        self._writer_thread.start()
+
+    def _stop_writer(self) -> None:
+        """Stop the writer thread; commands it had not written are dropped"""
+        with self._lock:
+            self._writer_running = False
+            self._discard_unwritten()
+            self._writer_wake.notify()
+        if (
+            self._writer_thread
+            and self._writer_thread is not threading.current_thread()
+        ):
+            self._writer_thread.join(timeout=1.0)
+        self._writer_thread = None
+
+    def _writer_loop(self) -> None:
+        """Write everything in the outbox with one write() per wake-up"""
+        while True:
+            with self._lock:
+                while self._writer_running and not self._outbox:
+                    self._writer_wake.wait()
+                if not self._writer_running:
+                    return
+                batch, self._outbox = self._outbox, []
+                epoch = self._write_epoch
+                sent_at = time.perf_counter()
+                for pending in batch:
+                    pending.sent_at = sent_at
+                self._last_write = sent_at
+
+            data = b"".join(p.data for p in batch)
+            try:
+                with self._write_lock:
+                    if epoch != self._write_epoch:
+                        continue  # Cancelled (e.g. by an emergency stop)
+                    if self.journal is not None:
+                        # Recorded first, so no reply can precede its command
+                        for pending in batch:
+                            self.journal.append(
+                                KIND_SENT, pending.data, pending.sequence or 0
+                            )
+                    self.serial_conn.write(data)
+            except (serial.SerialException, OSError) as e:
+                self.logger.error("Communication error: %s", e)
+                if self.journal is not None:
+                    self.journal.note(f"write failed: {e}")
+                self._write_failed(batch, LaserControllerError(f"Write failed: {e}"))
+                continue
+
+            self.write_calls += 1
+            self.commands_written += len(batch)
+            self.metrics.record_written([p.command for p in batch], len(data))
+            if self.logger.isEnabledFor(logging.DEBUG):
+                for pending in batch:
+                    self.logger.debug("Sent command: %s", pending.command)
+
+    def _write_failed(
+        self, batch: List[_PendingCommand], error: LaserControllerError
+    ) -> None:
+        """Reconnect after a failed write, or fail the commands in the batch"""
+        with self._lock:
+            if self.auto_reconnect and self.connected and not self.reconnecting:
+                # The reconnect decides which of the batch to send again
+                self._link_up = False
+                self._start_recovery(error)
+                return
+            failed = [pending for pending in batch if pending in self._in_flight]
+            for pending in failed:
+                self._retire(pending)
+            self._pump()
+
+        for pending in failed:
+            self.metrics.record_failed(pending.command)
+            pending.future.set_exception(error)
+
+    def _discard_unwritten(self) -> None:
+        """Keep the writer from sending anything it has not yet written (lock held)"""
+        self._outbox.clear()
+        self._write_epoch += 1
+
+    def _start_reader(self) -> None:
+        """Start the background thread that frames and matches replies"""
+        self._reader_running = True
+        self._reader_thread = threading.Thread(
+            target=self._reader_loop, name=f"laser-reader-{self.port}", daemon=True
+        )
+        self._reader_thread.start()
+
+    def _stop_reader(self) -> None:
+        """Stop the background reader thread"""
+        self._reader_running = False
+        if (
+            self._reader_thread
+            and self._reader_thread is not threading.current_thread()
+        ):
+            self._reader_thread.join(timeout=1.0)
+        self._reader_thread = None
+
+    def _reader_loop(self) -> None:
+        """Read reply lines, match them to in-flight commands and expire timeouts"""
+        buffer = bytearray()
+        while self._reader_running:
+            try:
+                data = self.serial_conn.read(self.serial_conn.in_waiting or 1)
+            except (serial.SerialException, OSError, TypeError) as e:
+                if self._reader_running:
+                    self.logger.error("Communication error: %s", e)
+                    self._link_failed(LaserControllerError(f"Read failed: {e}"))
+                break
+
+            self.metrics.record_bytes_read(len(data))
+            buffer.extend(data)
+            while buffer:
+                if buffer[0] & laser_binary.FRAME_FLAG:
+                    # Binary frame - text from the firmware is plain ASCII
+                    if len(buffer) < laser_binary.FRAME_LENGTH:
+                        break
+                    frame = bytes(buffer[: laser_binary.FRAME_LENGTH])
+                    if self._handle_frame(frame):
+                        if self.journal is not None:
+                            self.journal.append(
+                                KIND_RECEIVED,
+                                frame,
+                                frame[0] & laser_binary.MAX_SEQUENCE,
+                            )
+                        del buffer[: laser_binary.FRAME_LENGTH]
+                    else:
+                        del buffer[:1]  # Resynchronise one byte at a time
+                    continue
+                if b"\n" not in buffer:
+                    break
+                raw_line, _, buffer = buffer.partition(b"\n")
+                line = raw_line.decode("utf-8", errors="replace").strip()
+                if line:
+                    if self.journal is not None:
+                        self.journal.append(KIND_RECEIVED, raw_line.rstrip(b"\r"))
+                    self._handle_line(line)
+
+            self._expire_in_flight()
+
+    def _handle_line(self, line: str) -> None:
+        """
+        Attach a reply line to the oldest in-flight command
+
+        Args:
+            line: Reply line with line ending stripped
+        """
+        switch_match = _SWITCH_EVENT.match(line)
+        if switch_match:
+            # Pushed by the firmware whenever a physical switch takes control
+            laser_number = int(switch_match.group(1))
+            state = LaserState[switch_match.group(2)]
+            self.logger.info(
+                "Laser %s turned %s by physical switch", laser_number, state.name
+            )
+            self._apply_states({laser_number: state})
+            return
+
+        sequence_match = _SEQUENCE_EVENT.match(line)
+        if sequence_match:
+            self._finish_sequence(sequence_match.group(1) == "DONE")
+            return
+
+        if line == _WATCHDOG_EVENT:
+            self._watchdog_tripped()
+            return
+
+        with self._lock:
+            # Binary commands are answered by frames, never by text lines
+            pending = next(
+                (
+                    p
+                    for p in self._in_flight
+                    if p.sequence is None and p.sent_at is not None
+                ),
+                None,
+            )
+            # Stale replies (e.g. to a readiness ping answered after the
+            # banner) must not shift every later reply by one
+            if pending is None or (
+                not pending.lines and not _reply_belongs(pending.command, line)
+            ):
+                self.logger.debug("Unsolicited output: %s", line)
+                return
+
+            pending.lines.append(line)
+            if not _reply_complete(pending.command, pending.lines, self.num_lasers):
+                return
+
+            self._retire(pending)
+            reply = CommandReply(
+                pending.command,
+                pending.lines,
+                time.perf_counter() - pending.sent_at,
+                self.num_lasers,
+            )
+            # Apply acknowledged state before anyone waiting on the reply wakes
+            changes = self._update_states(reply.states)
+            self.last_reply = reply
+            self._pump()
+
+        self.metrics.record_reply(reply.command, reply.ok, reply.round_trip)
+        self.logger.debug(
+            "Reply to '%s' in %.1f ms", reply.command, reply.round_trip * 1000
+        )
+        pending.future.set_result(reply)
+        self._notify_state_listeners(changes)
+
+    def _handle_frame(self, frame: bytes) -> bool:
         """
-        Send a command to the Arduino
+        Resolve the in-flight command a binary reply answers, or apply an event
+
+        Args:
+            frame: Candidate binary frame
+
+        Returns:
+            bool: False if the checksum did not match
+        """
+        decoded = laser_binary.decode_reply(frame)
+        if decoded is None:
+            self.logger.debug("Discarding corrupt frame %s", frame.hex())
+            return False
+        sequence, status, mask = decoded
+
+        if sequence == laser_binary.EVENT_SEQUENCE:
+            self._handle_binary_event(status, mask)
+            return True
+
+        with self._lock:
+            pending = next((p for p in self._in_flight if p.sequence == sequence), None)
+            if pending is None:
+                self.logger.debug("Unsolicited reply to sequence %s", sequence)
+                return True
+
+            self._retire(pending)
+            reply = CommandReply.from_binary(
+                pending.command,
+                status,
+                mask,
+                time.perf_counter() - pending.sent_at,
+                self.num_lasers,
+            )
+            changes = self._update_states(reply.states)
+            self.last_reply = reply
+            self._pump()
+
+        self.metrics.record_reply(reply.command, reply.ok, reply.round_trip)
+        self.logger.debug(
+            "Reply to '%s' in %.1f ms", reply.command, reply.round_trip * 1000
+        )
+        pending.future.set_result(reply)
+        self._notify_state_listeners(changes)
+        return True
+
+    def _handle_binary_event(self, event: int, mask: int) -> None:
+        """Apply a binary event, mirroring the text events in _handle_line"""
+        states = {
+            i + 1: LaserState.ON if mask & (1 << i) else LaserState.OFF
+            for i in range(self.num_lasers)
+        }
+        if event == laser_binary.EVENT_SWITCH:
+            self.logger.info("Laser states changed by physical switch")
+            self._apply_states(states)
+        elif event == laser_binary.EVENT_SEQUENCE_DONE:
+            self._finish_sequence(True, mask)
+        elif event == laser_binary.EVENT_SEQUENCE_ABORTED:
+            self._finish_sequence(False, mask)
+        elif event == laser_binary.EVENT_STOPPED:
+            self._apply_states(states)
+            self._stop_confirmed.set()
+        elif event == laser_binary.EVENT_WATCHDOG:
+            self._watchdog_tripped()
+        else:
+            self.logger.debug("Unknown binary event %s", event)
+
+    def _finish_sequence(self, completed: bool, mask: Optional[int] = None) -> None:
+        """
+        Resolve the running hardware sequence
+
+        Args:
+            completed: True if the sequence ran to the end, False if aborted
+            mask: Laser states reported with a binary event. Text events carry
+                none: a completed sequence leaves the requested end mask and an
+                aborted one leaves every laser off.
+        """
+        self.logger.info(
+            "Hardware sequence %s", "completed" if completed else "aborted"
+        )
+        if mask is None:
+            mask = self._sequence_end_mask if completed else 0
+        with self._lock:
+            changes = self._account_sequence(mask, completed)
+        self._notify_state_listeners(changes)
+        future, self._sequence_future = self._sequence_future, None
+        if future is not None and not future.done():
+            future.set_result(completed)
+
+    def _account_sequence(
+        self, end_mask: int, completed: bool
+    ) -> Dict[int, LaserState]:
+        """
+        Count the switching and on-time of the table the firmware played,
+        then set the states it ended with (lock held)
+
+        The firmware reports no edges while it plays, so the table is added
+        up from its steps and the time it played for.
+
+        Returns:
+            Dict[int, LaserState]: Lasers whose state differs from before the
+                sequence
+        """
+        states = {
+            i + 1: LaserState.ON if end_mask & (1 << i) else LaserState.OFF
+            for i in range(self.num_lasers)
+        }
+        playing, self._sequence_playing = self._sequence_playing, None
+        if playing is None:
+            return self._update_states(states)
+
+        steps, repeats, start_mask, started, started_perf = playing
+        total_us = repeats * sum(duration_us for _, duration_us in steps)
+        played_us = round((time.perf_counter() - started_perf) * 1e6)
+        if completed:
+            played_us = total_us
+        elif repeats:
+            played_us = min(played_us, total_us)
+        activity, last_mask = _sequence_activity(
+            steps, self.num_lasers, start_mask, played_us
+        )
+
+        switches: Dict[Tuple[int, str], int] = {}
+        for laser_number, (_, ons, offs, _, _) in activity.items():
+            bit = 1 << (laser_number - 1)
+            if end_mask & bit and not last_mask & bit:
+                ons += 1
+            elif last_mask & bit and not end_mask & bit:
+                offs += 1
+            switches[(laser_number, "ON")] = ons
+            switches[(laser_number, "OFF")] = offs
+        self.metrics.add_switches(switches)
+
+        if self.usage is not None:
+            now = time.time()
+            self.usage.record_played(
+                started,
+                now,
+                {n: on_us / 1e6 for n, (on_us, _, _, _, _) in activity.items()},
+                {n: ons for n, (_, ons, _, _, _) in activity.items()},
+                {n: longest / 1e6 for n, (_, _, _, longest, _) in activity.items()},
+                {
+                    n: run_us / 1e6
+                    for n, (_, _, _, _, run_us) in activity.items()
+                    if end_mask & last_mask & (1 << (n - 1))
+                },
+            )
+            self.usage.record(
+                {n: True for n in states if end_mask & ~last_mask & (1 << (n - 1))},
+                now,
+            )
+
+        changes = {
+            laser_number: state
+            for laser_number, state in states.items()
+            if self.laser_states[laser_number] != state
+        }
+        self.laser_states.update(changes)
+        return changes
+
+    def _watchdog_tripped(self) -> None:
+        """Record a watchdog trip; the firmware has turned every laser off"""
+        self.watchdog_trips += 1
+        self.logger.error("Watchdog turned all lasers off: the host went silent")
+        self._apply_states({i: LaserState.OFF for i in range(1, self.num_lasers + 1)})
+
+    def _update_states(self, states: Dict[int, LaserState]) -> Dict[int, LaserState]:
+        """
+        Merge reported states into laser_states (lock held)
+
+        Args:
+            states: Reported laser states keyed by laser number
+
+        Returns:
+            Dict[int, LaserState]: Only the lasers whose state changed
+        """
+        changes = {
+            laser_number: state
+            for laser_number, state in states.items()
+            if laser_number in self.laser_states
+            and self.laser_states[laser_number] != state
+        }
+        self.laser_states.update(changes)
+        if changes:
+            self.metrics.record_switches(
+                {laser_number: state.name for laser_number, state in changes.items()}
+            )
+            if self.usage is not None:
+                self.usage.record(
+                    {
+                        laser_number: state == LaserState.ON
+                        for laser_number, state in changes.items()
+                    }
+                )
+        return changes
+
+    def _apply_states(self, states: Dict[int, LaserState]) -> None:
+        """Merge reported states and notify listeners of any changes"""
+        with self._lock:
+            changes = self._update_states(states)
+        self._notify_state_listeners(changes)
+
+    def _notify_state_listeners(self, changes: Dict[int, LaserState]) -> None:
+        """Call every state listener with the lasers that changed"""
+        if not changes:
+            return
+        for listener in list(self._state_listeners):
+            try:
+                listener(dict(changes))
+            except Exception as e:
+                self.logger.error("State listener failed: %s", e)
+
+    def add_state_listener(
+        self, listener: Callable[[Dict[int, LaserState]], None]
+    ) -> None:
+        """
+        Register a callback for laser state changes
+
+        The callback receives a dict of the lasers that changed and their new
+        states. It runs on the reader thread, for acknowledged commands and
+        for physical switch events alike, so it should return quickly.
+
+        Args:
+            listener: Callable taking Dict[int, LaserState]
+        """
+        self._state_listeners.append(listener)
+
+    def remove_state_listener(
+        self, listener: Callable[[Dict[int, LaserState]], None]
+    ) -> None:
+        """Unregister a callback added with add_state_listener"""
+        if listener in self._state_listeners:
+            self._state_listeners.remove(listener)
+
+    def _expire_in_flight(self) -> None:
+        """Fail commands whose reply has not arrived within the timeout"""
+        with self._lock:
+            now = time.perf_counter()
+            expired = [
+                pending
+                for pending in self._in_flight
+                if pending.sent_at is not None
+                and now - pending.sent_at > pending.timeout
+            ]
+            for pending in expired:
+                self._retire(pending)
+            if expired:
+                self._pump()
+
+        for pending in expired:
+            self.metrics.record_failed(pending.command)
+            pending.future.set_exception(
+                LaserControllerError(
+                    f"No reply to '{pending.command}' within {pending.timeout} s"
+                )
+            )
+
+    def _fail_pending(self, error: Exception, held: bool = True) -> None:
+        """
+        Fail every queued and in-flight command with the given error
+
+        Args:
+            error: Exception to set on each command's future
+            held: Also fail commands held while reconnecting (default: True)
+        """
+        with self._lock:
+            pending_commands = list(self._in_flight) + list(self._queued)
+            self._discard_unwritten()
+            self._in_flight.clear()
+            self._in_flight_bytes = 0
+            self._queued.clear()
+            if held:
+                pending_commands.extend(self._held)
+                self._held.clear()
+            self._queue_space.notify_all()
+
+        for pending in pending_commands:
+            if not pending.future.done():
+                self.metrics.record_failed(pending.command)
+                pending.future.set_exception(error)
+
+    def _retire(self, pending: _PendingCommand) -> None:
+        """Take a command out of the in-flight window (lock held)"""
+        self._in_flight.remove(pending)
+        self._in_flight_bytes -= len(pending.data)
+
+    def _pump(self) -> None:
+        """
+        Hand queued commands to the writer while the in-flight window has
+        room (lock held)
+
+        Never blocks on I/O, so callers only ever hold the lock briefly.
+        """
+        window = self.window
+        while self._link_up and self._queued and len(self._in_flight) < window:
+            pending = self._queued[0]
+            if pending.data is None:
+                pending.data = self._encode(pending)
+            if (
+                self._in_flight
+                and self._in_flight_bytes + len(pending.data) > _RX_BUFFER_SIZE
+            ):
+                break  # Wait for replies to drain the firmware's buffer
+
+            self._queued.popleft()
+            self._queue_space.notify()
+            self._in_flight.append(pending)
+            self._in_flight_bytes += len(pending.data)
+            self._outbox.append(pending)
+            self._writer_wake.notify()
+
+    def _encode(self, pending: _PendingCommand) -> bytes:
+        """Bytes to write for a command: a binary frame if it has one (lock held)"""
+        request = None
+        if self.binary_mode:
+            if pending.command == "ping":
+                request = (laser_binary.OP_PING, 0)
+            else:
+                request = laser_binary.text_to_request(pending.command)
+        if request is None:
+            return (pending.command + "\n").encode("utf-8")
+
+        pending.sequence = self._next_sequence
+        self._next_sequence = self._next_sequence % laser_binary.MAX_SEQUENCE + 1
+        return laser_binary.encode_request(*request, pending.sequence)
+
+    def submit_command(
+        self, command: str, timeout: Optional[float] = None, block: bool = True
+    ) -> Future:
+        """
+        Queue a command without waiting for its reply
+
+        Commands are written in submission order, up to pipeline_depth ahead
+        of their replies, so a burst of commands costs little more than one
+        round trip. When max_queued commands are already waiting, this call
+        blocks until the window drains.
 
         Args:
             command: Command string to send
+            timeout: Seconds to wait for the reply once sent (default:
+                ack_timeout)
+            block: Wait for queue space; False raises instead (default: True)
 
         Returns:
-            bool: True if command sent successfully, False otherwise
+            Future: Resolves to a CommandReply once the firmware answers, or
+                raises LaserControllerError on timeout or communication failure
+
+        Raises:
+            LaserControllerError: If not connected, the queue is full and
+                block is False, or an all-off superseded the coalesced change
+                being sent
         """
         if not self.connected or not self.serial_conn:
             raise LaserControllerError("Not connected to laser controller")
 
+        pending = _PendingCommand(
+            command, self.ack_timeout if timeout is None else timeout
+        )
+        with self._queue_space:
+            # The reader thread frees space, so it must never wait for it
+            while (
+                len(self._queued) + len(self._held) >= self.max_queued
+                and threading.current_thread() is not self._reader_thread
+            ):
+                if not block:
+                    raise LaserControllerError(
+                        f"Command queue full ({self.max_queued} waiting)"
+                    )
+                self._queue_space.wait(_READ_POLL_INTERVAL)
+                if not self.connected:
+                    raise LaserControllerError("Not connected to laser controller")
+            if self.coalescer is not None and self.coalescer.superseded():
+                # An all-off or stop discarded this flush after it started;
+                # checked under the lock so nothing is queued behind it
+                raise LaserControllerError("Coalesced change superseded by all off")
+            if (
+                self.reconnecting
+                and threading.current_thread() is not self._recovery_thread
+            ):
+                self._held.append(pending)  # Sent once the link is restored
+            else:
+                self._queued.append(pending)
+                self._pump()
+            self.metrics.record_queue_depth(
+                len(self._queued) + len(self._in_flight) + len(self._held)
+            )
+        return pending.future
+
+    def send_commands(
+        self, commands: List[str], timeout: Optional[float] = None
+    ) -> List[CommandReply]:
+        """
+        Send several commands back to back and wait for all of their replies
+
+        Args:
+            commands: Command strings, sent in order
+            timeout: Seconds to wait for each reply (default: ack_timeout)
+
+        Returns:
+            List[CommandReply]: Replies in the same order as commands
+
+        Raises:
+            LaserControllerError: If any reply is missing or communication fails
+        """
+        if timeout is None:
+            timeout = self.ack_timeout
+        futures = [self.submit_command(command, timeout) for command in commands]
+        # Later commands wait behind earlier ones, so allow for the queue
+        margin = timeout * -(-len(commands) // self.window) + 1.0
+        return [self._wait_for_reply(future, margin) for future in futures]
+
+    def send_command(
+        self, command: str, timeout: Optional[float] = None
+    ) -> CommandReply:
+        """
+        Send a command and wait for the firmware's reply
+
+        Args:
+            command: Command string to send
+            timeout: Seconds to wait for the reply (default: ack_timeout)
+
+        Returns:
+            CommandReply: Parsed reply including the measured round-trip time
+
+        Raises:
+            LaserControllerError: If no reply arrives or communication fails
+        """
+        if timeout is None:
+            timeout = self.ack_timeout
+        future = self.submit_command(command, timeout)
+        # The reader thread expires the command after its timeout; the extra
+        # margin only guards against a stalled reader
+        return self._wait_for_reply(future, timeout + 1.0)
+
+    def _wait_for_reply(self, future: Future, timeout: float) -> CommandReply:
+        """
+        Wait for a submitted command's reply, and for as long as a reconnect
+        is in progress, since held commands are only sent once it finishes
+
+        Raises:
+            LaserControllerError: If the command failed or no reply arrived
+        """
+        while True:
+            try:
+                return future.result(timeout=timeout)
+            except FutureTimeoutError:
+                if (
+                    not self.reconnecting
+                    or threading.current_thread() is self._recovery_thread
+                ):
+                    raise LaserControllerError("No reply from laser controller")
+
+    def _transact(
+        self, command: str, flush_coalesced: bool = True
+    ) -> Optional[CommandReply]:
+        """
+        Send a command and return its reply if the firmware accepted it
+
+        Args:
+            command: Command string to send
+            flush_coalesced: Send coalesced state changes first, since they
+                were requested earlier (default: True)
+
+        Returns:
+            Optional[CommandReply]: The reply, or None if the command failed
+        """
+        if not self.metrics.tracing:
+            return self._send_and_check(command, flush_coalesced)
+
+        # Trace hooks wrap the whole call, including any coalesced flush
+        contexts = self.metrics.trace_start(command)
+        start = time.perf_counter()
+        reply = None
         try:
-            # Send command
-            command_bytes = (command + "\n").encode("utf-8")
-            self.serial_conn.write(command_bytes)
-            self.serial_conn.flush()
+            reply = self._send_and_check(command, flush_coalesced)
+            return reply
+        finally:
+            self.metrics.trace_end(
+                contexts, reply is not None, time.perf_counter() - start
+            )
 
-            self.logger.debug(f"Sent command: {command}")
-            return True
+    def _send_and_check(
+        self, command: str, flush_coalesced: bool
+    ) -> Optional[CommandReply]:
+        """Body of _transact(), without the trace hooks"""
+        if flush_coalesced and self.coalescer is not None and self.coalescer.pending:
+            self.coalescer.flush()
+        try:
+            reply = self.send_command(command)
+        except LaserControllerError as e:
+            if not self.connected:
+                raise
+            self.logger.error("Communication error: %s", e)
+            return None
+
+        if not reply.ok:
+            self.logger.error("Command '%s' rejected: %s", command, reply.error)
+            return None
+        return reply
 
-        except serial.SerialException as e:
-            self.logger.error(f"Communication error: {e}")
-            return False
+    def _send_command(self, command: str) -> bool:
+        """
+        Send a command to the Arduino and wait for its acknowledgement
+
+        Args:
+            command: Command string to send
+
+        Returns:
+            bool: True if the firmware acknowledged the command, False otherwise
+        """
+        return self._transact(command) is not None
 
     def toggle_laser(self, laser_number: int) -> bool:
         """
@@ -175,15 +1881,22 @@ class MultiLaserController:
         if not (1 <= laser_number <= self.num_lasers):
             raise ValueError(f"Laser number must be between 1 and {self.num_lasers}")
 
-        if self._send_command(str(laser_number)):
-            # Update local state - toggle current state
-            current_state = self.laser_states[laser_number]
-            new_state = (
-                LaserState.OFF if current_state == LaserState.ON else LaserState.ON
-            )
-            self.laser_states[laser_number] = new_state
+        if self.coalescer is not None:
+            current = self.laser_states[laser_number] == LaserState.ON
+            target = not self.coalescer.target(laser_number, current)
+            self.coalescer.request({laser_number: target})
+            return True
 
-            self.logger.info(f"Laser {laser_number} toggled to {new_state.name}")
+        reply = self._transact(str(laser_number))
+        if reply is not None:
+            # Local state was updated from the firmware's reported state
+            new_state = self.laser_states[laser_number]
+            self.logger.info(
+                "Laser %s toggled to %s (%.1f ms)",
+                laser_number,
+                new_state.name,
+                reply.round_trip * 1000,
+            )
             return True
         return False
 
@@ -191,6 +1904,11 @@ class MultiLaserController:
         """
         Set a specific laser to a desired state
 
+        With firmware protocol v4 or newer this sends an absolute 'on N' /
+        'off N' command, so the result is correct even if a physical switch
+        changed the laser behind the host's back. Older firmware only has
+        toggles, which rely on the cached state being accurate.
+
         Args:
             laser_number: Laser number (1-based index)
             state: Desired state (True/False or LaserState.ON/OFF)
@@ -198,19 +1916,141 @@ class MultiLaserController:
         Returns:
             bool: True if command successful, False otherwise
         """
+        if not (1 <= laser_number <= self.num_lasers):
+            raise ValueError(f"Laser number must be between 1 and {self.num_lasers}")
+
         if isinstance(state, LaserState):
             target_state = state
         else:
             target_state = LaserState.ON if state else LaserState.OFF
 
+        if self.coalescer is not None:
+            self.coalescer.request({laser_number: target_state == LaserState.ON})
+            return True
+        return self._send_laser_state(laser_number, target_state)
+
+    def _send_laser_state(self, laser_number: int, target_state: LaserState) -> bool:
+        """Send the command that sets one laser, bypassing the coalescer"""
+        if self.protocol_version >= PROTOCOL_ABSOLUTE:
+            command = "on" if target_state == LaserState.ON else "off"
+            reply = self._transact(f"{command} {laser_number}", False)
+            if reply is not None:
+                self.logger.info(
+                    "Laser %s set to %s (%.1f ms)",
+                    laser_number,
+                    target_state.name,
+                    reply.round_trip * 1000,
+                )
+                return True
+            return False
+
         current_state = self.laser_states[laser_number]
 
         # Only toggle if current state differs from target
         if current_state != target_state:
-            return self.toggle_laser(laser_number)
+            reply = self._transact(str(laser_number), False)
+            if reply is not None:
+                self.logger.info(
+                    "Laser %s toggled to %s (%.1f ms)",
+                    laser_number,
+                    self.laser_states[laser_number].name,
+                    reply.round_trip * 1000,
+                )
+                return True
+            return False
 
         return True  # Already in desired state
 
+    def set_states(self, states: Dict[int, Union[bool, LaserState]]) -> bool:
+        """
+        Set several lasers to desired states in a single transaction
+
+        Lasers not listed keep their current state. With firmware protocol
+        v3 or newer all channels change together in one round-trip; older
+        firmware falls back to one toggle per laser that needs to change.
+
+        Args:
+            states: Desired states keyed by laser number, e.g. {1: ON, 2: OFF}
+
+        Returns:
+            bool: True if command successful, False otherwise
+        """
+        targets = {}
+        for laser_number, state in states.items():
+            if not (1 <= laser_number <= self.num_lasers):
+                raise ValueError(
+                    f"Laser number must be between 1 and {self.num_lasers}"
+                )
+            targets[laser_number] = state == LaserState.ON or state is True
+
+        if self.coalescer is not None:
+            self.coalescer.request(targets)
+            return True
+
+        mask = self.get_mask()
+        for laser_number, laser_on in targets.items():
+            if laser_on:
+                mask |= 1 << (laser_number - 1)
+            else:
+                mask &= ~(1 << (laser_number - 1))
+        return self._send_mask(mask)
+
+    def set_mask(self, mask: int) -> bool:
+        """
+        Set every laser from a bitmask in a single transaction
+
+        Args:
+            mask: Bit (n - 1) set turns laser n ON, cleared turns it OFF
+
+        Returns:
+            bool: True if command successful, False otherwise
+        """
+        if not (0 <= mask < (1 << self.num_lasers)):
+            raise ValueError(
+                f"Laser mask must be between 0 and {(1 << self.num_lasers) - 1}"
+            )
+
+        if self.coalescer is not None:
+            self.coalescer.request(
+                {i: bool(mask & (1 << (i - 1))) for i in range(1, self.num_lasers + 1)}
+            )
+            return True
+        return self._send_mask(mask)
+
+    def _send_mask(self, mask: int) -> bool:
+        """Send the command(s) that set every laser, bypassing the coalescer"""
+        if self.protocol_version < PROTOCOL_MASK:
+            # Older firmware has no absolute command - toggle what differs
+            for i in range(1, self.num_lasers + 1):
+                if not self._send_laser_state(
+                    i, LaserState.ON if mask & (1 << (i - 1)) else LaserState.OFF
+                ):
+                    return False
+            return True
+
+        reply = self._transact(f"mask {mask}", False)
+        if reply is not None:
+            self.logger.info(
+                "Laser mask set to %s (%.1f ms)",
+                format(mask, f"0{self.num_lasers}b"),
+                reply.round_trip * 1000,
+            )
+            return True
+        return False
+
+    def get_mask(self) -> int:
+        """
+        Get current states of all lasers as a bitmask
+
+        Returns:
+            int: Bit (n - 1) is set when laser n is ON
+        """
+        mask = 0
+        for laser_number, state in self.laser_states.items():
+            if state == LaserState.ON:
+                mask |= 1 << (laser_number - 1)
+        return mask
+
     def turn_on_laser(self, laser_number: int) -> bool:
         """Turn on a specific laser"""
         return self.set_laser(laser_number, LaserState.ON)
@@ -219,22 +2059,66 @@ class MultiLaserController:
         """Turn off a specific laser"""
         return self.set_laser(laser_number, LaserState.OFF)
 
+    def _send_targets(self, targets: Dict[int, bool]) -> bool:
+        """
+        Send the net effect of coalesced changes in as few commands as possible
+
+        Args:
+            targets: True for ON, keyed by laser number
+
+        Returns:
+            bool: True if nothing needed sending or the firmware accepted it
+        """
+        changes = {
+            laser_number: LaserState.ON if laser_on else LaserState.OFF
+            for laser_number, laser_on in targets.items()
+            if (self.laser_states[laser_number] == LaserState.ON) != laser_on
+        }
+        self.logger.debug(
+            "Coalesced %s pending change(s) into %s", len(targets), len(changes)
+        )
+        if not changes:
+            return True  # Net effect is no change
+        if len(changes) == 1:
+            return self._send_laser_state(*next(iter(changes.items())))
+
+        mask = self.get_mask()
+        for laser_number, state in changes.items():
+            if state == LaserState.ON:
+                mask |= 1 << (laser_number - 1)
+            else:
+                mask &= ~(1 << (laser_number - 1))
+        return self._send_mask(mask)
+
+    def flush_coalesced(self) -> bool:
+        """
+        Send coalesced state changes now and wait for their acknowledgement
+
+        Returns:
+            bool: True if there was nothing to send or the firmware accepted it
+        """
+        if self.coalescer is None:
+            return True
+        return self.coalescer.flush()
+
     def turn_on_all(self) -> bool:
         """Turn on all lasers"""
+        if self.coalescer is not None:
+            self.coalescer.request({i: True for i in range(1, self.num_lasers + 1)})
+            return True
         if self._send_command("all_on"):
-            # Update all local states to ON
-            for i in range(1, self.num_lasers + 1):
-                self.laser_states[i] = LaserState.ON
+            # Local states were updated to ON from the acknowledgement
             self.logger.info("All lasers turned ON")
             return True
         return False
 
     def turn_off_all(self) -> bool:
         """Turn off all lasers"""
+        if self.coalescer is not None:
+            # All off supersedes any queued change, and must not wait for it
+            self.coalescer.discard()
         if self._send_command("all_off"):
-            # Update all local states to OFF
-            for i in range(1, self.num_lasers + 1):
-                self.laser_states[i] = LaserState.OFF
+            # Local states were updated to OFF from the acknowledgement
             self.logger.info("All lasers turned OFF")
             return True
         return False
@@ -254,21 +2138,280 @@ class MultiLaserController:
 
         return self.laser_states[laser_number]
 
+    def sync_states(self) -> bool:
+        """
+        Read every laser's state from the firmware's 'status' report
+
+        Only needed once per connection: afterwards states follow from
+        command acknowledgements and pushed switch events.
+
+        Returns:
+            bool: True if the status report was read successfully
+        """
+        # Pending coalesced changes are compared with these states when sent
+        reply = self._transact("status", False)
+        if reply is not None:
+            states = ", ".join(f"{k}={v.name}" for k, v in reply.states.items())
+            self.logger.info("Laser states synced from controller: %s", states)
+            return True
+        return False
+
     def get_all_laser_states(self) -> Dict[int, LaserState]:
         """
         Get current states of all lasers
 
+        No serial traffic is needed - the cached states track every
+        acknowledged command and every physical switch event.
+
         Returns:
             Dict[int, LaserState]: Dictionary mapping laser numbers to states
         """
         return self.laser_states.copy()
 
+    @property
+    def supports_sequences(self) -> bool:
+        """True if the firmware can play hardware-timed sequences"""
+        return self.protocol_version >= PROTOCOL_SEQUENCE
+
+    def upload_sequence(self, sequence: LaserSequence) -> bool:
+        """
+        Replace the firmware's sequence table
+
+        Args:
+            sequence: Steps to upload
+
+        Returns:
+            bool: True if every step was accepted
+        """
+        if not self.supports_sequences:
+            raise LaserControllerError(
+                f"Firmware protocol v{self.protocol_version} has no sequence support"
+            )
+        if sequence.num_lasers > self.num_lasers:
+            raise ValueError("Sequence addresses more lasers than the controller has")
+
+        self._uploaded_sequence = None
+        for command in sequence.to_commands():
+            if not self._send_command(command):
+                return False
+
+        self._uploaded_sequence = LaserSequence(sequence.num_lasers)
+        self._uploaded_sequence.steps = list(sequence.steps)
+        self.logger.info(
+            "Uploaded %s-step sequence (%.6f s)", len(sequence), sequence.duration
+        )
+        return True
+
+    def start_sequence(self, repeats: int = 1, end_mask: int = 0) -> Future:
+        """
+        Start playing the uploaded sequence without waiting for it to end
+
+        Args:
+            repeats: Times to play the table (0 = until aborted)
+            end_mask: Lasers to leave on when the sequence completes
+                (default: 0, all OFF). Needs protocol v11 firmware.
+
+        Returns:
+            Future: Resolves to True when the sequence completes, or False if
+                it was aborted (abort_sequence, turn_off_all, emergency_stop)
+        """
+        if repeats < 0:
+            raise ValueError("Repeats must be 0 (continuous) or more")
+        if not (0 <= end_mask < (1 << self.num_lasers)):
+            raise ValueError(
+                f"Laser mask must be between 0 and {(1 << self.num_lasers) - 1}"
+            )
+        command = f"seq_run {repeats}"
+        if end_mask:
+            if self.protocol_version < PROTOCOL_SEQUENCE_END:
+                raise LaserControllerError(
+                    f"Firmware protocol v{self.protocol_version} turns every "
+                    "laser off at the end of a sequence"
+                )
+            command += f" {end_mask}"
+
+        future: Future = Future()
+        self._sequence_future = future
+        self._sequence_end_mask = end_mask
+        table = self._uploaded_sequence
+        with self._lock:
+            if table is not None:
+                # On-periods are accounted from the table until it ends
+                start_mask = self.get_mask()
+                self._sequence_playing = (
+                    table.steps,
+                    repeats,
+                    start_mask,
+                    time.time(),
+                    time.perf_counter(),
+                )
+                if self.usage is not None:
+                    self.usage.record({n: False for n in range(1, self.num_lasers + 1)})
+        if not self._send_command(command):
+            self._sequence_future = None
+            with self._lock:
+                playing, self._sequence_playing = self._sequence_playing, None
+                if playing is not None and self.usage is not None:
+                    # Nothing played: reopen the on-periods closed above
+                    now = time.time()
+                    self.usage.record_played(
+                        now,
+                        now,
+                        {},
+                        {},
+                        {},
+                        {
+                            n: 0.0
+                            for n in range(1, self.num_lasers + 1)
+                            if playing[2] & (1 << (n - 1))
+                        },
+                    )
+            raise LaserControllerError("Firmware did not start the sequence")
+        return future
+
+    def run_sequence(
+        self,
+        sequence: Optional[LaserSequence] = None,
+        repeats: int = 1,
+        end_mask: int = 0,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """
+        Optionally upload a sequence, then play it and wait until it ends
+
+        Args:
+            sequence: Steps to upload first (default: play the current table)
+            repeats: Times to play the table (must be 1 or more)
+            end_mask: Lasers to leave on when the sequence completes
+                (default: 0, all OFF). Needs protocol v11 firmware.
+            timeout: Seconds to wait for the sequence to end (default: the
+                table's duration times repeats, plus ack_timeout)
+
+        Returns:
+            bool: True if the sequence completed, False if it failed or was
+                aborted. A sequence that has not ended within the timeout is
+                aborted.
+
+        Raises:
+            ValueError: If no timeout is given and the current table was not
+                uploaded with upload_sequence(), so its duration is unknown
+        """
+        if repeats < 1:
+            raise ValueError("run_sequence needs a finite number of repeats")
+        if sequence is not None and not self.upload_sequence(sequence):
+            return False
+        if timeout is None:
+            if self._uploaded_sequence is None:
+                raise ValueError(
+                    "Sequence duration unknown: upload it with upload_sequence() "
+                    "or pass a timeout"
+                )
+            timeout = self._uploaded_sequence.duration * repeats + self.ack_timeout
+
+        future = self.start_sequence(repeats, end_mask)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Do not leave a table playing that nothing is waiting for
+            self.logger.error("Hardware sequence did not report completion")
+            try:
+                self.abort_sequence()
+            except LaserControllerError:
+                pass
+            if self._sequence_future is future:
+                self._sequence_future = None
+            return False
+
+    def abort_sequence(self) -> bool:
+        """Stop a running hardware sequence and turn all lasers off"""
+        return self._send_command("seq_abort")
+
+    def run_sequence_on_host(
+        self, sequence: LaserSequence, repeats: int = 1, end_mask: int = 0
+    ) -> bool:
+        """
+        Play a sequence by sending one mask command per step from the host
+
+        Steps run on absolute deadlines (see laser_scheduler), so command
+        latency does not accumulate into drift. Edge lateness is recorded in
+        pattern_jitter. Like a hardware sequence, the lasers are set to
+        end_mask at the end; a run that fails or is stopped turns every
+        laser off. Concurrent calls play one after another, and an
+        emergency stop also ends the calls still waiting their turn.
+
+        Args:
+            sequence: Steps to play
+            repeats: Times to play the table (must be 1 or more)
+            end_mask: Lasers to leave on when the sequence completes
+                (default: 0, all OFF)
+
+        Returns:
+            bool: True if every step was acknowledged and the run was not
+                stopped
+        """
+        if repeats < 1:
+            raise ValueError("Host-timed sequences need a finite number of repeats")
+        # Taken first, so an emergency stop from here on is never missed
+        stop_event = self.scheduler.begin()
+
+        def apply(mask: int) -> None:
+            if not self.set_mask(mask):
+                stop_event.set()
+
+        steps = [
+            (lambda mask=mask: apply(mask), duration_us / 1_000_000)
+            for mask, duration_us in sequence.steps
+        ]
+        completed = False
+        with self._host_pattern_lock:
+            try:
+                completed = self.scheduler.run(steps, repeats, stop_event=stop_event)
+            finally:
+                # Go straight from the last step to end_mask, so lasers on in
+                # both never drop out
+                if completed and end_mask:
+                    completed = self.set_mask(end_mask)
+                else:
+                    self.turn_off_all()
+            self.logger.info(
+                "Host-timed sequence edge lateness: %s", self.pattern_jitter
+            )
+        return completed
+
+    @property
+    def pattern_jitter(self) -> Optional[JitterHistogram]:
+        """Edge lateness of the last host-timed pattern, if any"""
+        return self.scheduler.last_jitter
+
+    def _play_sequence(
+        self, sequence: LaserSequence, repeats: int, end_mask: int = 0
+    ) -> bool:
+        """
+        Play on the firmware when it supports sequences, else from the host,
+        leaving the lasers in end_mask without switching any of them off
+        that are on in both the last step and end_mask
+        """
+        if not self.supports_sequences:
+            return self.run_sequence_on_host(sequence, repeats, end_mask)
+        if self.protocol_version >= PROTOCOL_SEQUENCE_END or not end_mask:
+            return self.run_sequence(sequence, repeats, end_mask)
+
+        # Older firmware ends every sequence with all lasers off. That is
+        # only harmless if no laser is on at the end and meant to stay on.
+        if sequence.steps[-1][0] & end_mask:
+            return self.run_sequence_on_host(sequence, repeats, end_mask)
+        return self.run_sequence(sequence, repeats) and self.set_mask(end_mask)
+
     def flash_laser(
         self, laser_number: int, flash_count: int = 3, flash_duration: float = 0.5
     ) -> bool:
         """
         Flash a laser a specified number of times
 
+        Uses a hardware-timed sequence when the firmware supports it, so
+        flash edges are timed by the MCU rather than by the host. Older
+        firmware is driven from the host on drift-free deadlines.
+
         Args:
             laser_number: Laser to flash
             flash_count: Number of flashes
@@ -279,30 +2422,32 @@ class MultiLaserController:
         """
         if not (1 <= laser_number <= self.num_lasers):
             raise ValueError(f"Laser number must be between 1 and {self.num_lasers}")
+        if flash_count < 1:
+            return True
 
+        # The other lasers stay on throughout, and the sequence ends with
+        # the original states rather than with every laser off
+        original_mask = self.get_mask()
+        sequence = LaserSequence.flash(
+            laser_number, flash_duration, original_mask, self.num_lasers
+        )
         try:
-            original_state = self.get_laser_state(laser_number)
-
-            for _ in range(flash_count):
-                self.turn_on_laser(laser_number)
-                time.sleep(flash_duration)
-                self.turn_off_laser(laser_number)
-                time.sleep(flash_duration)
-
-            # Restore original state
-            if original_state == LaserState.ON:
-                self.turn_on_laser(laser_number)
-
-            self.logger.info(f"Flashed laser {laser_number} {flash_count} times")
-            return True
-        except Exception as e:
-            self.logger.error(f"Flash sequence failed: {e}")
+            completed = self._play_sequence(sequence, flash_count, original_mask)
+        except LaserControllerError as e:
+            self.logger.error("Flash sequence failed: %s", e)
             return False
 
+        if completed:
+            self.logger.info("Flashed laser %s %s times", laser_number, flash_count)
+        return completed
+
     def sequential_pattern(self, delay_seconds: float = 1.0, cycles: int = 1) -> bool:
         """
         Run a sequential pattern through all lasers
 
+        Uses a hardware-timed sequence when the firmware supports it, and
+        host-side deadlines otherwise.
+
         Args:
             delay_seconds: Delay between laser switches
             cycles: Number of complete cycles to run
@@ -310,35 +2455,346 @@ class MultiLaserController:
         Returns:
             bool: True if successful
         """
+        if cycles < 1:
+            return True
+
+        sequence = LaserSequence.sequential(delay_seconds, num_lasers=self.num_lasers)
         try:
-            for cycle in range(cycles):
-                self.logger.info(f"Sequential pattern cycle {cycle + 1}/{cycles}")
+            return self._play_sequence(sequence, cycles)
+        except LaserControllerError as e:
+            self.logger.error("Sequential pattern failed: %s", e)
+            return False
 
-                for laser_num in range(1, self.num_lasers + 1):
-                    self.turn_off_all()
-                    time.sleep(0.1)  # Brief pause
-                    self.turn_on_laser(laser_num)
-                    time.sleep(delay_seconds)
+    def emergency_stop(self) -> bool:
+        """
+        Emergency stop - turn off all lasers immediately
 
-                self.turn_off_all()
-                if cycle < cycles - 1:  # Don't delay after last cycle
-                    time.sleep(delay_seconds)
+        Takes priority over all other traffic: host-timed patterns stop,
+        coalesced, queued and in-flight commands are cancelled, and bytes
+        not yet sent are discarded from the output buffer. Firmware with
+        protocol v9 or newer is then sent the single-byte stop, which it
+        acts on before parsing anything else; older firmware gets
+        'all_off'. Safe to call from any thread.
 
-            return True
-        except Exception as e:
-            self.logger.error(f"Sequential pattern failed: {e}")
-            return False
+        The time until the firmware confirms is recorded in
+        last_stop_latency and the stop_latency histogram.
 
-    def emergency_stop(self) -> bool:
-        """Emergency stop - turn off all lasers immediately"""
+        Returns:
+            bool: True if the firmware confirmed that all lasers are off
+        """
+        start = time.perf_counter()
+        self.scheduler.stop()
+        if self.coalescer is not None:
+            self.coalescer.discard()
+
+        if self.reconnecting:
+            # Nothing is turned back on when the link is restored
+            self._restore_target = {i: False for i in range(1, self.num_lasers + 1)}
         try:
-            self.turn_off_all()
-            self.logger.warning("Emergency stop activated - all lasers off")
-            return True
+            if not self.connected or not self.serial_conn:
+                raise LaserControllerError("Not connected to laser controller")
+            if self.protocol_version >= PROTOCOL_STOP:
+                stopped = self._send_stop()
+            else:
+                self._cancel_pending()
+                stopped = self.turn_off_all()
         except Exception as e:
-            self.logger.error(f"Emergency stop failed: {e}")
+            self.logger.error("Emergency stop failed: %s", e)
+            self._fail_pending(LaserControllerError("Cancelled by emergency stop"))
             return False
 
+        latency = time.perf_counter() - start
+        if stopped:
+            self.last_stop_latency = latency
+            self.stop_latency.record(round(latency * 1e9))
+            self.logger.warning(
+                "Emergency stop activated - all lasers off (%.1f ms)", latency * 1000
+            )
+        else:
+            self.logger.error("Emergency stop was not acknowledged")
+        return stopped
+
+    def _cancel_pending(self) -> None:
+        """Drop unsent output and fail every queued and in-flight command"""
+        with self._lock:
+            self._discard_unwritten()
+        with self._write_lock:
+            self.serial_conn.reset_output_buffer()
+        self._fail_pending(LaserControllerError("Cancelled by emergency stop"))
+
+    def _send_stop(self) -> bool:
+        """
+        Send the stop byte and wait for the firmware's confirmation
+
+        Returns:
+            bool: True once confirmed (by the stop event, or by 'all_off' if
+                the event does not arrive in time)
+        """
+        self._stop_confirmed.clear()
+        with self._lock:
+            self._discard_unwritten()
+        # The writer may still be finishing a write; waiting for it must not
+        # hold up every other caller on _lock
+        with self._write_lock:
+            self.serial_conn.reset_output_buffer()
+            # The output buffer may have been cut mid-frame, leaving the
+            # stop byte to be read as that frame's checksum, hence the
+            # second copy
+            if self.journal is not None:
+                self.journal.append(KIND_SENT, bytes([laser_binary.STOP_BYTE]) * 2)
+            self.serial_conn.write(bytes([laser_binary.STOP_BYTE]) * 2)
+        self._last_write = time.perf_counter()
+        self.metrics.record_bytes_written(2)
+        self._fail_pending(LaserControllerError("Cancelled by emergency stop"))
+
+        if self._stop_confirmed.wait(_STOP_CONFIRM_TIMEOUT):
+            return True
+        self.logger.error("Stop byte not confirmed, sending all_off")
+        return self.turn_off_all()
+
+    def _link_failed(self, error: LaserControllerError) -> None:
+        """React to a failed read: reconnect if enabled, else fail commands"""
+        self._link_up = False
+        if not (self.auto_reconnect and self.connected):
+            self._fail_pending(error)
+        elif self.reconnecting:
+            # Dropped again mid-handshake; held commands wait for the retry
+            self._fail_pending(error, held=False)
+        else:
+            self._start_recovery(error)
+
+    def _start_recovery(self, error: LaserControllerError) -> None:
+        """Start the reconnection thread unless it is already running"""
+        with self._recovery_lock:
+            if self.reconnecting:
+                return
+            self.reconnecting = True
+            self._recovery_cancelled.clear()
+            self._recovery_thread = threading.Thread(
+                target=self._recover,
+                args=(error,),
+                name=f"laser-reconnect-{self.port}",
+                daemon=True,
+            )
+            self._recovery_thread.start()
+
+    def _cancel_recovery(self) -> None:
+        """Stop a reconnect in progress and wait for its thread to finish"""
+        self._recovery_cancelled.set()
+        thread = self._recovery_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(
+                timeout=self.ready_timeout + 2 * self.ack_timeout + _RECONNECT_MAX_DELAY
+            )
+
+    def _recover(self, error: LaserControllerError) -> None:
+        """
+        Reopen a dropped link, restore the laser states and resend commands
+
+        Runs on its own thread, retrying with backoff until reconnect_timeout.
+        Commands submitted meanwhile are held and sent once the states are
+        restored. Commands that were in flight are sent again if repeating
+        them is harmless, and failed otherwise.
+        """
+        start = time.perf_counter()
+        self.drops += 1
+        self.logger.error("Connection to %s lost (%s), reconnecting", self.port, error)
+        if self.journal is not None:
+            self.journal.note(f"connection lost: {error}")
+        self._notify_connection_listeners("lost")
+
+        with self._lock:
+            self._discard_unwritten()
+            # Commands the writer never sent are always safe to send
+            resend = [
+                p
+                for p in self._in_flight
+                if p.sent_at is None or _RETRYABLE_COMMAND.match(p.command)
+            ]
+            failed = [p for p in self._in_flight if p not in resend]
+            self._held.extendleft(reversed(resend + list(self._queued)))
+            self._in_flight.clear()
+            self._in_flight_bytes = 0
+            self._queued.clear()
+            for pending in self._held:
+                # Encoded again for whatever framing the new link uses
+                pending.data = pending.sequence = pending.sent_at = None
+            self._restore_target = {
+                laser_number: state == LaserState.ON
+                for laser_number, state in self.laser_states.items()
+            }
+        for pending in failed:
+            self.metrics.record_failed(pending.command)
+            pending.future.set_exception(
+                LaserControllerError(
+                    f"Connection lost before '{pending.command}' was acknowledged"
+                )
+            )
+
+        if self.heartbeat is not None:
+            self.heartbeat.stop()
+        self._close_link()
+
+        # Try the rate the link was on (the board may not have been reset)
+        # as well as the rate it boots at
+        rates = [self.link_baud_rate]
+        if self.baud_rate != self.link_baud_rate:
+            rates.append(self.baud_rate)
+        expected_protocol = self.protocol_version
+        attempt = 0
+        delay = 0.0
+        while not self._recovery_cancelled.wait(delay):
+            try:
+                if not self._open_link(rates[attempt % len(rates)]):
+                    raise LaserControllerError("Laser states could not be read")
+                if self.protocol_version != expected_protocol:
+                    raise LaserControllerError("Firmware did not answer the handshake")
+                break
+            except (LaserControllerError, serial.SerialException, OSError) as e:
+                self.logger.warning("Reconnect attempt %s failed: %s", attempt + 1, e)
+                self._close_link()
+                self._fail_pending(LaserControllerError("Reconnect failed"), held=False)
+
+            attempt += 1
+            if time.perf_counter() - start >= self.reconnect_timeout:
+                self.failed_recoveries += 1
+                self.logger.error(
+                    "Could not reconnect to %s within %s s",
+                    self.port,
+                    self.reconnect_timeout,
+                )
+                self._end_recovery(LaserControllerError("Connection lost"))
+                self._notify_connection_listeners("failed")
+                return
+            delay = min(
+                max(2 * delay, _RECONNECT_INITIAL_DELAY),
+                _RECONNECT_MAX_DELAY,
+                self.reconnect_timeout - (time.perf_counter() - start),
+            )
+
+        if self._recovery_cancelled.is_set():
+            self._end_recovery(LaserControllerError("Connection closed"))
+            return
+
+        # Bring the lasers back to their last acknowledged states. A held
+        # all_off would switch them straight off again, so leave them off.
+        with self._lock:
+            target = self._restore_target
+            if any(p.command in ("all_off", "seq_abort") for p in self._held):
+                target = {laser_number: False for laser_number in target}
+        replayed = len(resend)
+        if any(
+            (self.laser_states[laser_number] == LaserState.ON) != laser_on
+            for laser_number, laser_on in target.items()
+        ):
+            self.logger.info("Restoring laser states after reconnecting")
+            self._send_targets(target)
+            replayed += 1
+
+        with self._lock:
+            self._queued.extend(self._held)
+            self._held.clear()
+            self.reconnecting = False
+            self._pump()
+
+        latency = time.perf_counter() - start
+        self.recoveries += 1
+        self.replayed_commands += replayed
+        self.last_recovery_time = latency
+        self.recovery_time.record(round(latency * 1e9))
+        self.logger.warning(
+            "Reconnected to %s in %.2f s (%s command(s) replayed)",
+            self.port,
+            latency,
+            replayed,
+        )
+        self._notify_connection_listeners("restored")
+
+    def _end_recovery(self, error: LaserControllerError) -> None:
+        """Give up on a dropped link: fail held commands and disconnect"""
+        with self._lock:
+            self.reconnecting = False
+            self.connected = False
+        self._fail_pending(error)
+        if self.usage is not None:
+            self.usage.stop()
+
+    def _notify_connection_listeners(self, event: str) -> None:
+        """Call every connection listener with a reconnection event"""
+        for listener in list(self._connection_listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                self.logger.error("Connection listener failed: %s", e)
+
+    def add_connection_listener(self, listener: Callable[[str], None]) -> None:
+        """
+        Register a callback for automatic reconnection
+
+        The callback receives "lost" when the link drops, then "restored"
+        once it is back, or "failed" if reconnect_timeout passes first (the
+        controller is then disconnected). It runs on the reconnection thread.
+
+        Args:
+            listener: Callable taking the event name
+        """
+        self._connection_listeners.append(listener)
+
+    def remove_connection_listener(self, listener: Callable[[str], None]) -> None:
+        """Unregister a callback added with add_connection_listener"""
+        if listener in self._connection_listeners:
+            self._connection_listeners.remove(listener)
+
+    def connection_health(self) -> Dict[str, object]:
+        """Link drop and recovery statistics, e.g. for monitoring"""
+        return {
+            "connected": self.connected,
+            "reconnecting": self.reconnecting,
+            "drops": self.drops,
+            "recoveries": self.recoveries,
+            "failed_recoveries": self.failed_recoveries,
+            "replayed_commands": self.replayed_commands,
+            "last_recovery_s": (
+                None
+                if self.last_recovery_time is None
+                else round(self.last_recovery_time, 3)
+            ),
+            "max_recovery_s": round(self.recovery_time.max_us / 1e6, 3),
+        }
+
+    def queue_depth(self) -> Dict[str, int]:
+        """Commands waiting to be sent, awaiting replies, and held while reconnecting"""
+        with self._lock:
+            return {
+                "queued": len(self._queued),
+                "in_flight": len(self._in_flight),
+                "held": len(self._held),
+            }
+
+    def metrics_snapshot(self) -> Dict[str, object]:
+        """
+        Command metrics, queue depth, link health and emergency stop latency
+
+        Returns:
+            Dict[str, object]: JSON-serialisable snapshot, as served by
+                laser_metrics.MetricsExporter at /metrics.json
+        """
+        snapshot = {
+            "port": self.port,
+            "protocol_version": self.protocol_version,
+            "link_baud_rate": self.link_baud_rate,
+            "binary_mode": self.binary_mode,
+            "write_calls": self.write_calls,
+            "queue_depth": self.queue_depth(),
+            "commands": self.metrics.summary(),
+            "connection": self.connection_health(),
+            "emergency_stop": self.stop_latency.summary(),
+            "watchdog_trips": self.watchdog_trips,
+        }
+        if self.heartbeat is not None:
+            snapshot["heartbeat"] = self.heartbeat.summary(self.link_baud_rate)
+        return snapshot
+
     def __enter__(self):
         """Context manager entry"""
         if not self.connected:
@@ -0,0 +1,790 @@
+"""
+Asyncio Multi-Laser Controller
+Awaitable sibling of MultiLaserController for asyncio applications
+
+Serial I/O is non-blocking: replies are read from an event loop reader
+callback and every command returns an awaitable acknowledgement, so one
+event loop can drive many controllers (and other devices) without a thread
+per device.
+
+Requirements:
+- pyserial: pip install pyserial
+- Arduino running the provided laser control firmware
+
+Example:
+    async with AsyncMultiLaserController(port="/dev/ttyUSB0") as controller:
+        await controller.turn_on_laser(1)
+        await controller.flash_laser(2, flash_count=5, flash_duration=0.1)
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Union
+
+import serial
+
+import laser_binary
+from laser_controller import (
+    PROTOCOL_ABSOLUTE,
+    PROTOCOL_LEGACY,
+    PROTOCOL_LINE,
+    PROTOCOL_MASK,
+    PROTOCOL_STOP,
+    _BANNER_END,
+    _BANNER_START,
+    _LEGACY_READ_STALL,
+    _PING_DELAY,
+    _PING_INTERVAL,
+    _SEQUENCE_EVENT,
+    _STOP_CONFIRM_TIMEOUT,
+    _SWITCH_EVENT,
+    _UNKNOWN_REPLY,
+    _VERSION_REPLY,
+    CommandReply,
+    LaserControllerError,
+    LaserState,
+    _reply_belongs,
+    _reply_complete,
+)
+
+# Fallback poll interval where the event loop cannot watch the port's file
+# descriptor (e.g. Windows)
+_POLL_INTERVAL = 0.005
+
+
+class _AsyncPendingCommand:
+    """Command awaiting its reply from the firmware"""
+
+    def __init__(self, command: str, future: asyncio.Future):
+        self.command = command
+        self.future = future
+        self.lines = []
+        self.sent_at = time.perf_counter()
+
+
+class AsyncMultiLaserController:
+    """
+    Asyncio controller for multiple lasers through Arduino MCU
+
+    Mirrors MultiLaserController: the same commands, the same protocol
+    negotiation and the same acknowledgement-driven state tracking, with
+    every operation a coroutine. One command is in flight at a time, as the
+    firmware processes commands sequentially.
+    """
+
+    def __init__(
+        self,
+        port: str,
+        baud_rate: int = 9600,
+        timeout: float = 2.0,
+        num_lasers: int = 3,
+        reset_on_connect: bool = True,
+        ready_timeout: float = 3.0,
+    ):
+        """
+        Initialise the AsyncMultiLaserController
+
+        Args:
+            port: Serial port name (e.g., 'COM3' on Windows, '/dev/ttyUSB0' on Linux)
+            baud_rate: Serial communication baud rate (default: 9600)
+            timeout: Time to wait for a command acknowledgement in seconds (default: 2.0)
+            num_lasers: Number of lasers connected to the Arduino (default: 3)
+            reset_on_connect: Assert DTR when opening the port, which resets
+                boards with auto-reset. False keeps DTR low so a running
+                board is not reset (default: True)
+            ready_timeout: Longest time to wait for the firmware to boot and
+                answer on connect, in seconds (default: 3.0)
+        """
+        self.port = port
+        self.baud_rate = baud_rate
+        self.timeout = timeout
+        self.num_lasers = num_lasers
+        self.reset_on_connect = reset_on_connect
+        self.ready_timeout = ready_timeout
+
+        # Serial connection
+        self.serial_conn: Optional[serial.Serial] = None
+        self.connected = False
+        self.protocol_version = PROTOCOL_LEGACY
+
+        # Request/response engine
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._command_lock: Optional[asyncio.Lock] = None
+        self._in_flight: Deque[_AsyncPendingCommand] = deque()
+        self._rx_buffer = bytearray()
+        self._poll_task: Optional[asyncio.Task] = None
+        self._stop_confirmed: Optional[asyncio.Event] = None
+        # Bumped by every emergency stop; commands queued and patterns
+        # started before it are cancelled
+        self._stop_count = 0
+        self.last_reply: Optional[CommandReply] = None
+
+        # State tracking - assume all lasers start OFF until synced
+        self.laser_states: Dict[int, LaserState] = {}
+        for i in range(1, num_lasers + 1):
+            self.laser_states[i] = LaserState.OFF
+
+        self.logger = logging.getLogger(__name__)
+
+    async def connect(self) -> bool:
+        """
+        Establish serial connection to the Arduino
+
+        Returns:
+            bool: True if connection successful
+
+        Raises:
+            LaserControllerError: If connection fails
+        """
+        self._loop = asyncio.get_running_loop()
+        self._command_lock = asyncio.Lock()
+        self._stop_confirmed = asyncio.Event()
+
+        try:
+            # timeout=0 / write_timeout=0 make pyserial non-blocking
+            self.serial_conn = serial.Serial(
+                baudrate=self.baud_rate, timeout=0, write_timeout=0
+            )
+            if not self.reset_on_connect:
+                # Set before opening so the auto-reset line is never pulsed
+                self.serial_conn.dtr = False
+                self.serial_conn.rts = False
+            self.serial_conn.port = self.port
+            self.serial_conn.open()
+        except serial.SerialException as e:
+            self.logger.error("Serial connection failed: %s", e)
+            raise LaserControllerError(f"Could not connect to {self.port}: {e}")
+
+        # Wait for the firmware to boot (or answer, if it was not reset)
+        pinged_version = await self._wait_until_ready()
+
+        self._start_reader()
+        self.connected = True
+
+        if pinged_version is not None:
+            self.protocol_version = pinged_version
+        else:
+            self.protocol_version = await self._negotiate_protocol()
+        self.logger.info(
+            "Connected to laser controller on %s (protocol v%s)",
+            self.port,
+            self.protocol_version,
+        )
+
+        # Start from the hardware's actual state, then ensure all lasers are OFF
+        await self.sync_states()
+        await self.turn_off_all()
+        return True
+
+    async def _wait_until_ready(self) -> Optional[int]:
+        """
+        Wait until the firmware is ready for commands, polling the port
+
+        As in MultiLaserController, ready means either the end of the
+        setup() banner after a reset, or a reply to a 'version' ping when
+        the board was not reset. Gives up after ready_timeout.
+
+        Returns:
+            Optional[int]: Protocol version if a ping was answered, else None
+        """
+        start = self._loop.time()
+        deadline = start + self.ready_timeout
+        next_ping = start + (_PING_DELAY if self.reset_on_connect else 0.0)
+        buffer = bytearray()
+        booting = False
+
+        while self._loop.time() < deadline:
+            buffer.extend(self.serial_conn.read(self.serial_conn.in_waiting or 1))
+            while b"\n" in buffer:
+                raw_line, _, buffer = buffer.partition(b"\n")
+                line = raw_line.decode("utf-8", errors="replace").strip()
+                if line == _BANNER_END:
+                    self.logger.debug("Firmware banner received")
+                    return None
+                if line == _BANNER_START:
+                    booting = True
+
+                version_match = _VERSION_REPLY.match(line)
+                if version_match:
+                    return int(version_match.group(1))
+                if line.startswith(_UNKNOWN_REPLY) and not booting:
+                    return PROTOCOL_LEGACY
+
+            now = self._loop.time()
+            if not booting and now >= next_ping:
+                self.serial_conn.write(b"version\n")
+                next_ping = now + _PING_INTERVAL
+            await asyncio.sleep(_POLL_INTERVAL)
+
+        self.logger.warning(
+            "No banner or ping reply within %s s, continuing", self.ready_timeout
+        )
+        self.serial_conn.reset_input_buffer()
+        return None
+
+    async def disconnect(self) -> None:
+        """Turn all lasers off and close the serial connection"""
+        if self.serial_conn and self.serial_conn.is_open:
+            try:
+                await self.turn_off_all()
+            except Exception:
+                pass  # Ignore errors during cleanup
+
+            self.connected = False
+            self._stop_reader()
+            self.serial_conn.close()
+            self._fail_pending(LaserControllerError("Connection closed"))
+            self.logger.info("Disconnected from laser controller")
+
+    def _start_reader(self) -> None:
+        """Watch the port for incoming data on the event loop"""
+        try:
+            self._loop.add_reader(self.serial_conn.fileno(), self._on_readable)
+        except (AttributeError, NotImplementedError, OSError):
+            # No selectable descriptor - poll from a task instead
+            self._poll_task = self._loop.create_task(self._poll_reader())
+
+    def _stop_reader(self) -> None:
+        """Stop watching the port"""
+        if self._poll_task:
+            self._poll_task.cancel()
+            self._poll_task = None
+        else:
+            try:
+                self._loop.remove_reader(self.serial_conn.fileno())
+            except (AttributeError, NotImplementedError, OSError):
+                pass
+
+    async def _poll_reader(self) -> None:
+        """Fallback reader for ports without a selectable descriptor"""
+        while True:
+            self._on_readable()
+            await asyncio.sleep(_POLL_INTERVAL)
+
+    def _on_readable(self) -> None:
+        """Read whatever is available and handle complete lines"""
+        try:
+            data = self.serial_conn.read(self.serial_conn.in_waiting or 1)
+        except (serial.SerialException, OSError) as e:
+            self.logger.error("Communication error: %s", e)
+            self._stop_reader()
+            self._fail_pending(LaserControllerError(f"Read failed: {e}"))
+            return
+
+        self._rx_buffer.extend(data)
+        while self._rx_buffer:
+            if self._rx_buffer[0] & laser_binary.FRAME_FLAG:
+                # Binary frame (the stop confirmation) - text is plain ASCII
+                if len(self._rx_buffer) < laser_binary.FRAME_LENGTH:
+                    break
+                if self._handle_frame(
+                    bytes(self._rx_buffer[: laser_binary.FRAME_LENGTH])
+                ):
+                    del self._rx_buffer[: laser_binary.FRAME_LENGTH]
+                else:
+                    del self._rx_buffer[:1]  # Resynchronise one byte at a time
+                continue
+            if b"\n" not in self._rx_buffer:
+                break
+            raw_line, _, rest = self._rx_buffer.partition(b"\n")
+            self._rx_buffer = bytearray(rest)
+            line = raw_line.decode("utf-8", errors="replace").strip()
+            if line:
+                self._handle_line(line)
+
+    def _handle_frame(self, frame: bytes) -> bool:
+        """
+        Apply a binary event frame
+
+        Args:
+            frame: FRAME_LENGTH bytes starting with a byte that has
+                FRAME_FLAG set
+
+        Returns:
+            bool: True if the frame's checksum was valid
+        """
+        decoded = laser_binary.decode_reply(frame)
+        if decoded is None:
+            return False
+        sequence, event, mask = decoded
+        if sequence != laser_binary.EVENT_SEQUENCE:
+            self.logger.debug("Unsolicited binary reply: %s", frame.hex())
+            return True
+        for laser_number in self.laser_states:
+            self.laser_states[laser_number] = (
+                LaserState.ON if mask & (1 << (laser_number - 1)) else LaserState.OFF
+            )
+        if event == laser_binary.EVENT_STOPPED:
+            self._stop_confirmed.set()
+        return True
+
+    def _handle_line(self, line: str) -> None:
+        """
+        Attach a reply line to the in-flight command, or apply an event
+
+        Args:
+            line: Reply line with line ending stripped
+        """
+        switch_match = _SWITCH_EVENT.match(line)
+        if switch_match:
+            laser_number = int(switch_match.group(1))
+            state = LaserState[switch_match.group(2)]
+            if laser_number in self.laser_states:
+                self.laser_states[laser_number] = state
+            self.logger.info(
+                "Laser %s turned %s by physical switch", laser_number, state.name
+            )
+            return
+
+        if _SEQUENCE_EVENT.match(line):
+            # Hardware sequences leave every laser off when they end
+            for laser_number in self.laser_states:
+                self.laser_states[laser_number] = LaserState.OFF
+            self.logger.info("Hardware sequence ended: %s", line)
+            return
+
+        # Late replies to timed-out or cancelled commands must not be taken
+        # as the reply to the command now in flight
+        if not self._in_flight or (
+            not self._in_flight[0].lines
+            and not _reply_belongs(self._in_flight[0].command, line)
+        ):
+            self.logger.debug("Unsolicited output: %s", line)
+            return
+
+        pending = self._in_flight[0]
+        pending.lines.append(line)
+        if not _reply_complete(pending.command, pending.lines, self.num_lasers):
+            return
+
+        self._in_flight.popleft()
+        reply = CommandReply(
+            pending.command,
+            pending.lines,
+            time.perf_counter() - pending.sent_at,
+            self.num_lasers,
+        )
+        # Apply acknowledged state before the awaiting coroutine resumes
+        for laser_number, state in reply.states.items():
+            if laser_number in self.laser_states:
+                self.laser_states[laser_number] = state
+        self.last_reply = reply
+        if not pending.future.done():
+            pending.future.set_result(reply)
+
+    def _fail_pending(self, error: Exception) -> None:
+        """Fail every in-flight command with the given error"""
+        while self._in_flight:
+            pending = self._in_flight.popleft()
+            if not pending.future.done():
+                pending.future.set_exception(error)
+
+    @property
+    def ack_timeout(self) -> float:
+        """Time to wait for a reply, allowing for the legacy readString() stall"""
+        if self.protocol_version >= PROTOCOL_LINE:
+            return self.timeout
+        return self.timeout + _LEGACY_READ_STALL
+
+    async def send_command(
+        self, command: str, timeout: Optional[float] = None
+    ) -> CommandReply:
+        """
+        Send a command and await the firmware's reply
+
+        Args:
+            command: Command string to send
+            timeout: Seconds to wait for the reply (default: ack_timeout)
+
+        Returns:
+            CommandReply: Parsed reply including the measured round-trip time
+
+        Raises:
+            LaserControllerError: If no reply arrives or communication fails
+        """
+        if not self.connected or not self.serial_conn:
+            raise LaserControllerError("Not connected to laser controller")
+        if timeout is None:
+            timeout = self.ack_timeout
+
+        stop_count = self._stop_count
+        async with self._command_lock:
+            if self._stop_count != stop_count:
+                raise LaserControllerError("Cancelled by emergency stop")
+            pending = _AsyncPendingCommand(command, self._loop.create_future())
+            try:
+                # A command is far smaller than the OS transmit buffer, so a
+                # non-blocking write completes immediately
+                self.serial_conn.write((command + "\n").encode("utf-8"))
+            except serial.SerialException as e:
+                self.logger.error("Communication error: %s", e)
+                raise LaserControllerError(f"Write failed: {e}")
+
+            pending.sent_at = time.perf_counter()
+            self._in_flight.append(pending)
+            self.logger.debug("Sent command: %s", command)
+
+            try:
+                return await asyncio.wait_for(pending.future, timeout)
+            except asyncio.TimeoutError:
+                if pending in self._in_flight:
+                    self._in_flight.remove(pending)
+                raise LaserControllerError(
+                    f"No reply to '{command}' within {timeout} s"
+                )
+
+    async def _transact(self, command: str) -> Optional[CommandReply]:
+        """
+        Send a command and return its reply if the firmware accepted it
+
+        Args:
+            command: Command string to send
+
+        Returns:
+            Optional[CommandReply]: The reply, or None if the command failed
+        """
+        try:
+            reply = await self.send_command(command)
+        except LaserControllerError as e:
+            if not self.connected:
+                raise
+            self.logger.error("Communication error: %s", e)
+            return None
+
+        if not reply.ok:
+            self.logger.error("Command '%s' rejected: %s", command, reply.error)
+            return None
+        return reply
+
+    async def _negotiate_protocol(self) -> int:
+        """
+        Ask the firmware which serial protocol it speaks
+
+        Returns:
+            int: Protocol version (PROTOCOL_LEGACY or newer)
+        """
+        try:
+            reply = await self.send_command(
+                "version", timeout=self.timeout + _LEGACY_READ_STALL
+            )
+        except LaserControllerError as e:
+            self.logger.warning("Protocol handshake failed, assuming legacy: %s", e)
+            return PROTOCOL_LEGACY
+
+        for line in reply.lines:
+            version_match = _VERSION_REPLY.match(line)
+            if version_match:
+                return int(version_match.group(1))
+        return PROTOCOL_LEGACY
+
+    def _check_laser_number(self, laser_number: int) -> None:
+        if not (1 <= laser_number <= self.num_lasers):
+            raise ValueError(f"Laser number must be between 1 and {self.num_lasers}")
+
+    async def toggle_laser(self, laser_number: int) -> bool:
+        """
+        Toggle a specific laser on/off
+
+        Args:
+            laser_number: Laser number (1-based index)
+
+        Returns:
+            bool: True if command successful, False otherwise
+        """
+        self._check_laser_number(laser_number)
+
+        reply = await self._transact(str(laser_number))
+        if reply is not None:
+            self.logger.info(
+                "Laser %s toggled to %s (%.1f ms)",
+                laser_number,
+                self.laser_states[laser_number].name,
+                reply.round_trip * 1000,
+            )
+            return True
+        return False
+
+    async def set_laser(
+        self, laser_number: int, state: Union[bool, LaserState]
+    ) -> bool:
+        """
+        Set a specific laser to a desired state
+
+        Args:
+            laser_number: Laser number (1-based index)
+            state: Desired state (True/False or LaserState.ON/OFF)
+
+        Returns:
+            bool: True if command successful, False otherwise
+        """
+        self._check_laser_number(laser_number)
+
+        if isinstance(state, LaserState):
+            target_state = state
+        else:
+            target_state = LaserState.ON if state else LaserState.OFF
+
+        if self.protocol_version >= PROTOCOL_ABSOLUTE:
+            command = "on" if target_state == LaserState.ON else "off"
+            return await self._transact(f"{command} {laser_number}") is not None
+
+        # Older firmware only toggles - rely on the cached state
+        if self.laser_states[laser_number] != target_state:
+            return await self.toggle_laser(laser_number)
+        return True
+
+    async def set_states(self, states: Dict[int, Union[bool, LaserState]]) -> bool:
+        """
+        Set several lasers to desired states in a single transaction
+
+        Args:
+            states: Desired states keyed by laser number; others are unchanged
+
+        Returns:
+            bool: True if command successful, False otherwise
+        """
+        mask = self.get_mask()
+        for laser_number, state in states.items():
+            self._check_laser_number(laser_number)
+            if state == LaserState.ON or state is True:
+                mask |= 1 << (laser_number - 1)
+            else:
+                mask &= ~(1 << (laser_number - 1))
+
+        return await self.set_mask(mask)
+
+    async def set_mask(self, mask: int) -> bool:
+        """
+        Set every laser from a bitmask in a single transaction
+
+        Args:
+            mask: Bit (n - 1) set turns laser n ON, cleared turns it OFF
+
+        Returns:
+            bool: True if command successful, False otherwise
+        """
+        if not (0 <= mask < (1 << self.num_lasers)):
+            raise ValueError(
+                f"Laser mask must be between 0 and {(1 << self.num_lasers) - 1}"
+            )
+
+        if self.protocol_version < PROTOCOL_MASK:
+            for i in range(1, self.num_lasers + 1):
+                if not await self.set_laser(i, bool(mask & (1 << (i - 1)))):
+                    return False
+            return True
+
+        return await self._transact(f"mask {mask}") is not None
+
+    def get_mask(self) -> int:
+        """Get current states of all lasers as a bitmask"""
+        mask = 0
+        for laser_number, state in self.laser_states.items():
+            if state == LaserState.ON:
+                mask |= 1 << (laser_number - 1)
+        return mask
+
+    async def turn_on_laser(self, laser_number: int) -> bool:
+        """Turn on a specific laser"""
+        return await self.set_laser(laser_number, LaserState.ON)
+
+    async def turn_off_laser(self, laser_number: int) -> bool:
+        """Turn off a specific laser"""
+        return await self.set_laser(laser_number, LaserState.OFF)
+
+    async def turn_on_all(self) -> bool:
+        """Turn on all lasers"""
+        if await self._transact("all_on") is not None:
+            self.logger.info("All lasers turned ON")
+            return True
+        return False
+
+    async def turn_off_all(self) -> bool:
+        """Turn off all lasers"""
+        if await self._transact("all_off") is not None:
+            self.logger.info("All lasers turned OFF")
+            return True
+        return False
+
+    async def sync_states(self) -> bool:
+        """Read every laser's state from the firmware's 'status' report"""
+        return await self._transact("status") is not None
+
+    def get_laser_state(self, laser_number: int) -> LaserState:
+        """Get current state of a specific laser"""
+        self._check_laser_number(laser_number)
+        return self.laser_states[laser_number]
+
+    def get_all_laser_states(self) -> Dict[int, LaserState]:
+        """Get current states of all lasers"""
+        return self.laser_states.copy()
+
+    async def flash_laser(
+        self, laser_number: int, flash_count: int = 3, flash_duration: float = 0.5
+    ) -> bool:
+        """
+        Flash a laser a specified number of times
+
+        Args:
+            laser_number: Laser to flash
+            flash_count: Number of flashes
+            flash_duration: Duration of each flash in seconds
+
+        Returns:
+            bool: True if successful, False if it failed or an emergency
+                stop ended it
+        """
+        self._check_laser_number(laser_number)
+        stop_count = self._stop_count
+
+        try:
+            original_state = self.get_laser_state(laser_number)
+
+            for _ in range(flash_count):
+                self._check_stopped(stop_count)
+                await self.turn_on_laser(laser_number)
+                await asyncio.sleep(flash_duration)
+                self._check_stopped(stop_count)
+                await self.turn_off_laser(laser_number)
+                await asyncio.sleep(flash_duration)
+
+            # Restore original state
+            self._check_stopped(stop_count)
+            if original_state == LaserState.ON:
+                await self.turn_on_laser(laser_number)
+
+            self.logger.info("Flashed laser %s %s times", laser_number, flash_count)
+            return True
+        except LaserControllerError as e:
+            self.logger.error("Flash sequence failed: %s", e)
+            return False
+
+    async def sequential_pattern(
+        self, delay_seconds: float = 1.0, cycles: int = 1
+    ) -> bool:
+        """
+        Run a sequential pattern through all lasers
+
+        Args:
+            delay_seconds: Delay between laser switches
+            cycles: Number of complete cycles to run
+
+        Returns:
+            bool: True if successful, False if it failed or an emergency
+                stop ended it
+        """
+        stop_count = self._stop_count
+        try:
+            for cycle in range(cycles):
+                self.logger.info("Sequential pattern cycle %s/%s", cycle + 1, cycles)
+
+                for laser_num in range(1, self.num_lasers + 1):
+                    self._check_stopped(stop_count)
+                    await self.turn_off_all()
+                    await asyncio.sleep(0.1)  # Brief pause
+                    self._check_stopped(stop_count)
+                    await self.turn_on_laser(laser_num)
+                    await asyncio.sleep(delay_seconds)
+
+                self._check_stopped(stop_count)
+                await self.turn_off_all()
+                if cycle < cycles - 1:  # Don't delay after last cycle
+                    await asyncio.sleep(delay_seconds)
+
+            self._check_stopped(stop_count)
+            return True
+        except LaserControllerError as e:
+            self.logger.error("Sequential pattern failed: %s", e)
+            return False
+
+    def _check_stopped(self, stop_count: int) -> None:
+        """
+        End a pattern once an emergency stop has been called since it began
+
+        Args:
+            stop_count: _stop_count when the pattern started
+
+        Raises:
+            LaserControllerError: If an emergency stop has been called since
+        """
+        if self._stop_count != stop_count:
+            raise LaserControllerError("Pattern ended by emergency stop")
+
+    async def emergency_stop(self) -> bool:
+        """
+        Emergency stop - turn off all lasers immediately
+
+        Firmware with protocol v9 or newer is sent the single-byte stop
+        straight away, without waiting for the command in flight; it and
+        every command still waiting to be sent are cancelled. Older
+        firmware gets 'all_off' once the command in flight has its reply.
+        Running flash and sequential patterns end and return False, so they
+        cannot turn lasers back on.
+
+        Returns:
+            bool: True if the firmware confirmed that all lasers are off
+        """
+        # Running patterns and queued commands end here, whatever the firmware
+        self._stop_count += 1
+        try:
+            if not self.connected or not self.serial_conn:
+                raise LaserControllerError("Not connected to laser controller")
+            if self.protocol_version >= PROTOCOL_STOP:
+                stopped = await self._send_stop()
+            else:
+                stopped = await self.turn_off_all()
+        except Exception as e:
+            self.logger.error("Emergency stop failed: %s", e)
+            return False
+
+        if stopped:
+            self.logger.warning("Emergency stop activated - all lasers off")
+        else:
+            self.logger.error("Emergency stop was not acknowledged")
+        return stopped
+
+    async def _send_stop(self) -> bool:
+        """
+        Send the stop byte, bypassing the command lock, and await confirmation
+
+        Returns:
+            bool: True once confirmed (by the stop event, or by 'all_off' if
+                the event does not arrive in time)
+        """
+        self._stop_confirmed.clear()
+        try:
+            self.serial_conn.reset_output_buffer()
+            # Only text is sent, so no binary frame can have been cut short
+            # and a single stop byte is enough
+            self.serial_conn.write(bytes([laser_binary.STOP_BYTE]))
+        except serial.SerialException as e:
+            raise LaserControllerError(f"Write failed: {e}")
+        self.logger.debug("Sent stop byte")
+        self._fail_pending(LaserControllerError("Cancelled by emergency stop"))
+
+        try:
+            await asyncio.wait_for(self._stop_confirmed.wait(), _STOP_CONFIRM_TIMEOUT)
+            return True
+        except asyncio.TimeoutError:
+            self.logger.error("Stop byte not confirmed, sending all_off")
+            return await self.turn_off_all()
+
+    async def __aenter__(self):
+        """Async context manager entry"""
+        if not self.connected:
+            await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit - ensure all lasers are off"""
+        try:
+            await self.emergency_stop()
+        finally:
+            await self.disconnect()
+
+    def __repr__(self) -> str:
+        """String representation of the controller"""
+        status = "Connected" if self.connected else "Disconnected"
+        return f"AsyncMultiLaserController(port='{self.port}', lasers={self.num_lasers}, status='{status}')"
@@ -11,7 +11,10 @@ Author: Based on MultiLaserController by Kok-Wei Bong
 Date: 2025-09-29
 """
 
+import sqlite3
 import sys
+import threading
+import time
 from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -22,15 +25,48 @@ from PyQt6.QtWidgets import (
     QComboBox,
     QLabel,
     QMessageBox,
+    QGroupBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
 )
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, QObject, QThread, pyqtSignal, pyqtSlot
 from PyQt6.QtGui import QFont
 import serial.tools.list_ports
-from typing import List
+from typing import Dict, List, Optional
 
 # Import the MultiLaserController class
 # Assuming it's in the same directory or properly installed
-from laser_controller import MultiLaserController, LaserControllerError, LaserState
+from laser_controller import (
+    DEFAULT_BAUD_RATE,
+    SUPPORTED_BAUD_RATES,
+    LaserState,
+    MultiLaserController,
+)
+from laser_usage import DEFAULT_USAGE_PATH
+
+# Button presses closer together than this are merged into their net effect,
+# so a double-clicked toggle sends nothing
+COALESCE_WINDOW = 0.05
+
+# Lasers are turned off by the firmware if the GUI stops responding for this
+# long (firmware protocol v10 and later)
+WATCHDOG_TIMEOUT = 1.0
+
+# How often the usage panel is refreshed while connected
+USAGE_REFRESH_MS = 10000
+
+# Laser wavelengths, as fitted in the Multilaser Box
+LASER_WAVELENGTHS = {1: "1064 nm", 2: "1310 nm", 3: "1550 nm"}
+
+
+def format_duration(seconds: float) -> str:
+    """Format a usage duration in the largest sensible unit"""
+    if seconds >= 3600:
+        return f"{seconds / 3600:.1f} h"
+    if seconds >= 60:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds:.0f} s"
 
 
 class LEDIndicator(QLabel):
@@ -82,13 +118,252 @@ class LEDIndicator(QLabel):
             self.setText("OFF")
 
 
+class ControllerWorker(QObject):
+    """
+    Owns the MultiLaserController and performs all serial I/O
+
+    Lives on a background QThread; requests arrive as queued signals from
+    ControllerProxy and are handled one at a time in arrival order.
+    Results and acknowledged laser states are reported back through signals.
+    """
+
+    connected = pyqtSignal(str, int)  # port, negotiated baud rate
+    connection_failed = pyqtSignal(str)  # error message
+    disconnected = pyqtSignal(str)  # warning message, empty if clean
+    command_finished = pyqtSignal(str, bool)  # description, success
+    command_failed = pyqtSignal(str, str)  # title, error message
+    states_changed = pyqtSignal(dict)  # laser number -> LaserState
+    link_changed = pyqtSignal(str)  # "lost", "restored" or "failed"
+    usage_reported = pyqtSignal(str, dict)  # box serial, laser -> usage tuple
+
+    def __init__(self):
+        super().__init__()
+        self.controller: Optional[MultiLaserController] = None
+
+    @pyqtSlot(str, int, int, int)
+    def connect_controller(
+        self, port: str, baud_rate: int, max_baud_rate: int, num_lasers: int
+    ):
+        """Create and connect the controller (blocks this worker thread only)"""
+        controller = None
+        try:
+            controller = MultiLaserController(
+                port=port,
+                baud_rate=baud_rate,
+                num_lasers=num_lasers,
+                auto_connect=False,
+                max_baud_rate=max_baud_rate,
+                coalesce_window=COALESCE_WINDOW,
+                watchdog_timeout=WATCHDOG_TIMEOUT,
+                usage_path=DEFAULT_USAGE_PATH,
+            )
+            # Forward acknowledged changes and physical switch events
+            controller.add_state_listener(self._on_states_changed)
+            # Report automatic reconnection after a USB drop
+            controller.add_connection_listener(self.link_changed.emit)
+            controller.connect()
+        except Exception as e:
+            # Anything left uncaught here would be lost in the worker thread
+            # and leave the window waiting for a connection forever
+            if controller is not None:
+                try:
+                    controller.disconnect()  # Release a port left open
+                except Exception:
+                    pass
+            self.connection_failed.emit(str(e))
+            return
+
+        self.controller = controller
+        self.connected.emit(port, controller.link_baud_rate)
+        self.states_changed.emit(controller.get_all_laser_states())
+
+    @pyqtSlot()
+    def disconnect_controller(self):
+        """Turn all lasers off and close the serial connection"""
+        warning = ""
+        if self.controller:
+            try:
+                self.controller.disconnect()
+            except Exception as e:
+                warning = str(e)
+            finally:
+                self.controller = None
+        self.disconnected.emit(warning)
+
+    @pyqtSlot(str, tuple, str, str)
+    def run_command(self, method: str, args: tuple, description: str, title: str):
+        """
+        Call a MultiLaserController method and report the outcome
+
+        Args:
+            method: Name of the controller method to call
+            args: Positional arguments for the method
+            description: Status message to report on success
+            title: Dialogue title to report on failure
+        """
+        if not self.controller or not self.controller.connected:
+            return
+
+        try:
+            success = bool(getattr(self.controller, method)(*args))
+        except Exception as e:
+            self.command_failed.emit(title, str(e))
+            return
+
+        self.command_finished.emit(description, success)
+
+    @pyqtSlot()
+    def report_usage(self):
+        """
+        Report each laser's accumulated usage
+
+        Emits usage_reported with (total on seconds, on seconds in the last
+        24 h, on seconds in the last 7 days, switch-ons, longest on-period)
+        for every laser.
+        """
+        if not self.controller or self.controller.usage is None:
+            return
+
+        usage = self.controller.usage
+        now = time.time()
+        try:
+            totals = usage.totals()
+            last_day = usage.history(bucket_hours=1, since=now - 86400)
+            last_week = usage.history(bucket_hours=1, since=now - 7 * 86400)
+        except sqlite3.Error:
+            return  # The store is busy or unreadable; try again next refresh
+
+        report = {}
+        for laser in range(1, self.controller.num_lasers + 1):
+            total = totals.get(laser)
+            report[laser] = (
+                total.on_seconds if total else 0.0,
+                sum(on for _, on, _ in last_day.get(laser, [])),
+                sum(on for _, on, _ in last_week.get(laser, [])),
+                total.switch_ons if total else 0,
+                total.longest_on if total else 0.0,
+            )
+        self.usage_reported.emit(self.controller.box_serial or "", report)
+
+    @pyqtSlot()
+    def shutdown(self):
+        """Disconnect if needed and stop the worker thread's event loop"""
+        if self.controller:
+            self.disconnect_controller()
+        QThread.currentThread().quit()
+
+    def _on_states_changed(self, changes: Dict[int, LaserState]):
+        # Called on the controller's reader thread; the signal is queued to
+        # the GUI thread
+        if self.controller:
+            self.states_changed.emit(self.controller.get_all_laser_states())
+
+
+class ControllerProxy(QObject):
+    """
+    GUI-thread handle to a ControllerWorker running on its own QThread
+
+    Every method returns immediately; requests are queued to the worker and
+    completions arrive through the worker's signals.
+    """
+
+    _connect_requested = pyqtSignal(str, int, int, int)
+    _disconnect_requested = pyqtSignal()
+    _command_requested = pyqtSignal(str, tuple, str, str)
+    _usage_requested = pyqtSignal()
+    _shutdown_requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.thread = QThread()
+        self.thread.setObjectName("laser-controller-worker")
+        self.worker = ControllerWorker()
+        self.worker.moveToThread(self.thread)
+
+        self._connect_requested.connect(self.worker.connect_controller)
+        self._disconnect_requested.connect(self.worker.disconnect_controller)
+        self._command_requested.connect(self.worker.run_command)
+        self._usage_requested.connect(self.worker.report_usage)
+        self._shutdown_requested.connect(self.worker.shutdown)
+
+        self.thread.start()
+
+    def connect_controller(
+        self, port: str, baud_rate: int, max_baud_rate: int, num_lasers: int
+    ):
+        """Queue a connection request"""
+        self._connect_requested.emit(port, baud_rate, max_baud_rate, num_lasers)
+
+    def disconnect_controller(self):
+        """Queue a disconnection request"""
+        self._disconnect_requested.emit()
+
+    def run_command(
+        self, method: str, args: tuple = (), description: str = "", title: str = ""
+    ):
+        """Queue a controller method call (see ControllerWorker.run_command)"""
+        self._command_requested.emit(method, args, description, title)
+
+    def report_usage(self):
+        """Queue a usage report (see ControllerWorker.report_usage)"""
+        self._usage_requested.emit()
+
+    def emergency_stop(self):
+        """
+        Stop every laser without queueing behind the worker
+
+        The worker may be busy with a long command such as a flash pattern,
+        so the stop runs on its own thread (the controller is thread-safe)
+        and reports back through the worker's signals.
+        """
+        controller = self.worker.controller
+        if controller is None:
+            return
+        threading.Thread(
+            target=self._run_emergency_stop,
+            args=(controller,),
+            name="laser-emergency-stop",
+            daemon=True,
+        ).start()
+
+    def _run_emergency_stop(self, controller: MultiLaserController):
+        try:
+            success = controller.emergency_stop()
+        except Exception as e:
+            self.worker.command_failed.emit("Emergency Stop Error", str(e))
+            return
+
+        description = "EMERGENCY STOP ACTIVATED - All lasers OFF"
+        if success and controller.last_stop_latency is not None:
+            description += f" ({controller.last_stop_latency * 1000:.0f} ms)"
+        self.worker.command_finished.emit(description, success)
+
+    def shutdown(self, timeout_ms: int = 5000):
+        """Disconnect, stop the worker thread and wait for it to finish"""
+        self._shutdown_requested.emit()
+        self.thread.wait(timeout_ms)
+
+
 class LaserControlGUI(QMainWindow):
     """Main GUI window for laser controller"""
 
     def __init__(self):
         super().__init__()
-        self.controller = None
+        self.is_connected = False
         self.num_lasers = 3
+        self._baud_selection = "Auto"
+
+        # All serial I/O happens on the proxy's worker thread
+        self.controller_proxy = ControllerProxy(self)
+        worker = self.controller_proxy.worker
+        worker.connected.connect(self.on_connected)
+        worker.connection_failed.connect(self.on_connection_failed)
+        worker.disconnected.connect(self.on_disconnected)
+        worker.command_finished.connect(self.on_command_finished)
+        worker.command_failed.connect(self.on_command_failed)
+        worker.states_changed.connect(self.update_led_states)
+        worker.link_changed.connect(self.on_link_changed)
+        worker.usage_reported.connect(self.update_usage)
 
         # Store LED indicators and toggle buttons
         self.led_indicators = []
@@ -97,10 +372,16 @@ class LaserControlGUI(QMainWindow):
         self.init_ui()
         self.populate_com_ports()
 
+        # Usage totals are read on the worker thread, so refreshing never
+        # delays the controls
+        self.usage_timer = QTimer(self)
+        self.usage_timer.setInterval(USAGE_REFRESH_MS)
+        self.usage_timer.timeout.connect(self.controller_proxy.report_usage)
+
     def init_ui(self):
         """Initialise the user interface"""
         self.setWindowTitle("Multi-Laser Controller")
-        self.setGeometry(100, 100, 600, 300)
+        self.setGeometry(100, 100, 600, 480)
 
         # Create central widget and main layout
         central_widget = QWidget()
@@ -135,9 +416,15 @@ class LaserControlGUI(QMainWindow):
         baud_label.setFont(QFont("Arial", 10))
         connection_layout.addWidget(baud_label)
 
+        # "Auto" connects at the firmware's boot rate and negotiates the
+        # fastest rate; a number caps the negotiation at that rate
         self.baud_combo = QComboBox()
-        self.baud_combo.addItems(["9600", "19200", "38400", "57600", "115200"])
-        self.baud_combo.setCurrentText("9600")
+        self.baud_combo.addItem("Auto")
+        self.baud_combo.addItems([str(rate) for rate in SUPPORTED_BAUD_RATES])
+        self.baud_combo.setCurrentText("Auto")
+        self.baud_combo.setToolTip(
+            "Fastest serial rate to negotiate with the controller"
+        )
         connection_layout.addWidget(self.baud_combo)
 
         connection_layout.addSpacing(20)
@@ -302,6 +589,38 @@ class LaserControlGUI(QMainWindow):
 
         main_layout.addLayout(extra_controls_layout)
 
+        # === Usage Panel ===
+        self.usage_group = QGroupBox("Laser Usage")
+        usage_layout = QVBoxLayout(self.usage_group)
+        self.usage_table = QTableWidget(self.num_lasers, 6)
+        self.usage_table.setHorizontalHeaderLabels(
+            [
+                "Laser",
+                "Total On",
+                "Last 24 h",
+                "Last 7 Days",
+                "Switched On",
+                "Longest On",
+            ]
+        )
+        self.usage_table.verticalHeader().setVisible(False)
+        self.usage_table.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.Stretch
+        )
+        self.usage_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.usage_table.setSelectionMode(QTableWidget.SelectionMode.NoSelection)
+        for i in range(1, self.num_lasers + 1):
+            name = f"Laser {i}"
+            if i in LASER_WAVELENGTHS:
+                name += f" ({LASER_WAVELENGTHS[i]})"
+            self.usage_table.setItem(i - 1, 0, QTableWidgetItem(name))
+            for column in range(1, 6):
+                item = QTableWidgetItem("-")
+                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                self.usage_table.setItem(i - 1, column, item)
+        usage_layout.addWidget(self.usage_table)
+        main_layout.addWidget(self.usage_group)
+
         # Status bar
         self.statusBar().showMessage("Disconnected")
 
@@ -324,13 +643,13 @@ class LaserControlGUI(QMainWindow):
 
     def toggle_connection(self):
         """Connect or disconnect from the laser controller"""
-        if self.controller is None or not self.controller.connected:
+        if not self.is_connected:
             self.connect_to_controller()
         else:
             self.disconnect_from_controller()
 
     def connect_to_controller(self):
-        """Establish connection to the laser controller"""
+        """Request a connection to the laser controller"""
         port = self.port_combo.currentData()
         if port is None:
             QMessageBox.warning(
@@ -338,69 +657,88 @@ class LaserControlGUI(QMainWindow):
             )
             return
 
-        baud_rate = int(self.baud_combo.currentText())
+        # Remember the selection; the combo shows the negotiated rate while
+        # connected
+        self._baud_selection = self.baud_combo.currentText()
+        if self._baud_selection == "Auto":
+            max_baud_rate = max(SUPPORTED_BAUD_RATES)
+        else:
+            max_baud_rate = int(self._baud_selection)
 
-        try:
-            self.controller = MultiLaserController(
-                port=port,
-                baud_rate=baud_rate,
-                num_lasers=self.num_lasers,
-                auto_connect=False,
-            )
+        # Block further clicks until the worker reports back
+        self.connect_btn.setEnabled(False)
+        self.port_combo.setEnabled(False)
+        self.baud_combo.setEnabled(False)
+        self.refresh_btn.setEnabled(False)
+        self.statusBar().showMessage(f"Connecting to {port}...")
 
-            self.controller.connect()
+        self.controller_proxy.connect_controller(
+            port, DEFAULT_BAUD_RATE, max_baud_rate, self.num_lasers
+        )
 
-            # Update UI
-            self.connect_btn.setText("Disconnect")
-            self.connect_btn.setStyleSheet(
-                """
-                QPushButton {
-                    background-color: #f44336;
-                    color: white;
-                    font-weight: bold;
-                    padding: 8px;
-                    border-radius: 4px;
-                }
-                QPushButton:hover {
-                    background-color: #da190b;
-                }
+    def on_connected(self, port: str, baud_rate: int):
+        """Update UI once the worker has connected"""
+        self.is_connected = True
+
+        # Update UI
+        self.connect_btn.setEnabled(True)
+        self.connect_btn.setText("Disconnect")
+        self.connect_btn.setStyleSheet(
             """
-            )
+            QPushButton {
+                background-color: #f44336;
+                color: white;
+                font-weight: bold;
+                padding: 8px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #da190b;
+            }
+        """
+        )
 
-            # Enable controls
-            for btn in self.toggle_buttons:
-                btn.setEnabled(True)
-            self.all_on_btn.setEnabled(True)
-            self.all_off_btn.setEnabled(True)
-            self.emergency_btn.setEnabled(True)
+        # Enable controls
+        for btn in self.toggle_buttons:
+            btn.setEnabled(True)
+        self.all_on_btn.setEnabled(True)
+        self.all_off_btn.setEnabled(True)
+        self.emergency_btn.setEnabled(True)
 
-            # Disable connection settings
-            self.port_combo.setEnabled(False)
-            self.baud_combo.setEnabled(False)
-            self.refresh_btn.setEnabled(False)
+        # Connection settings stay disabled while connected, showing the rate
+        # the link actually runs at
+        self.baud_combo.setCurrentText(str(baud_rate))
+        self.statusBar().showMessage(f"Connected to {port} at {baud_rate} baud")
 
-            self.statusBar().showMessage(f"Connected to {port} at {baud_rate} baud")
+        self.controller_proxy.report_usage()
+        self.usage_timer.start()
 
-            # Update LED indicators
-            self.update_led_states()
+    def on_connection_failed(self, message: str):
+        """Restore connection settings after a failed connection attempt"""
+        self.connect_btn.setEnabled(True)
+        self.port_combo.setEnabled(True)
+        self.baud_combo.setEnabled(True)
+        self.refresh_btn.setEnabled(True)
+        self.statusBar().showMessage("Disconnected")
 
-        except LaserControllerError as e:
-            QMessageBox.critical(
-                self, "Connection Error", f"Failed to connect:\n{str(e)}"
-            )
-            self.controller = None
+        QMessageBox.critical(self, "Connection Error", f"Failed to connect:\n{message}")
 
     def disconnect_from_controller(self):
-        """Disconnect from the laser controller"""
-        if self.controller:
-            try:
-                self.controller.disconnect()
-            except Exception as e:
-                QMessageBox.warning(
-                    self, "Disconnection Warning", f"Error during disconnect:\n{str(e)}"
-                )
-            finally:
-                self.controller = None
+        """Request disconnection from the laser controller"""
+        self.connect_btn.setEnabled(False)
+        self.statusBar().showMessage("Disconnecting...")
+        self.controller_proxy.disconnect_controller()
+
+    def on_disconnected(self, warning: str):
+        """Update UI once the worker has disconnected"""
+        self.is_connected = False
+        self.connect_btn.setEnabled(True)
+        self.usage_timer.stop()  # The panel keeps the last figures
+
+        if warning:
+            QMessageBox.warning(
+                self, "Disconnection Warning", f"Error during disconnect:\n{warning}"
+            )
 
         # Update UI
         self.connect_btn.setText("Connect")
@@ -428,6 +766,7 @@ class LaserControlGUI(QMainWindow):
 
         # Enable connection settings
         self.port_combo.setEnabled(True)
+        self.baud_combo.setCurrentText(self._baud_selection)
         self.baud_combo.setEnabled(True)
         self.refresh_btn.setEnabled(True)
 
@@ -438,93 +777,103 @@ class LaserControlGUI(QMainWindow):
         self.statusBar().showMessage("Disconnected")
 
     def toggle_laser(self, laser_number: int):
-        """Turn on a specific laser and turn off all others"""
-        if not self.controller or not self.controller.connected:
+        """Toggle a specific laser"""
+        if not self.is_connected:
             return
 
-        try:
-            # # Turn off all lasers first TODO: debug turn_on_laser
-            # self.controller.turn_off_all()
-            # # Turn on the requested laser
-            # self.controller.turn_on_laser(laser_number)
-            # self.update_led_states()
-            # self.statusBar().showMessage(f"Laser {laser_number} ON (all others OFF)")
-
-            self.controller.toggle_laser(laser_number)
-            self.update_led_states()
-            self.statusBar().showMessage(f"Toggled Laser {laser_number}")
-
-        except Exception as e:
-            QMessageBox.critical(
-                self, "Control Error", f"Failed to control laser:\n{str(e)}"
-            )
+        # # Turn off all lasers first TODO: debug turn_on_laser
+        # self.controller.turn_off_all()
+        # # Turn on the requested laser
+        # self.controller.turn_on_laser(laser_number)
+        # self.statusBar().showMessage(f"Laser {laser_number} ON (all others OFF)")
+
+        self.controller_proxy.run_command(
+            "toggle_laser",
+            (laser_number,),
+            f"Toggled Laser {laser_number}",
+            "Control Error",
+        )
 
     def turn_all_on(self):
         """Turn all lasers on"""
-        if not self.controller or not self.controller.connected:
+        if not self.is_connected:
             return
 
-        try:
-            self.controller.turn_on_all()
-            self.update_led_states()
-            self.statusBar().showMessage("All lasers turned ON")
-        except Exception as e:
-            QMessageBox.critical(
-                self, "Control Error", f"Failed to turn on all lasers:\n{str(e)}"
-            )
+        self.controller_proxy.run_command(
+            "turn_on_all", (), "All lasers turned ON", "Control Error"
+        )
 
     def turn_all_off(self):
         """Turn all lasers off"""
-        if not self.controller or not self.controller.connected:
+        if not self.is_connected:
             return
 
-        try:
-            self.controller.turn_off_all()
-            self.update_led_states()
-            self.statusBar().showMessage("All lasers turned OFF")
-        except Exception as e:
-            QMessageBox.critical(
-                self, "Control Error", f"Failed to turn off all lasers:\n{str(e)}"
-            )
+        self.controller_proxy.run_command(
+            "turn_off_all", (), "All lasers turned OFF", "Control Error"
+        )
 
     def emergency_stop(self):
         """Emergency stop - turn off all lasers immediately"""
-        if not self.controller or not self.controller.connected:
+        if not self.is_connected:
             return
 
-        reply = QMessageBox.question(
-            self,
-            "Emergency Stop",
-            "Turn off all lasers immediately?",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-        )
+        # No confirmation dialogue: a stop must never wait for the operator
+        self.controller_proxy.emergency_stop()
 
-        if reply == QMessageBox.StandardButton.Yes:
-            try:
-                self.controller.emergency_stop()
-                self.update_led_states()
-                self.statusBar().showMessage(
-                    "EMERGENCY STOP ACTIVATED - All lasers OFF"
-                )
-            except Exception as e:
-                QMessageBox.critical(
-                    self,
-                    "Emergency Stop Error",
-                    f"Failed to execute emergency stop:\n{str(e)}",
-                )
+    def on_command_finished(self, description: str, success: bool):
+        """Report a completed command in the status bar"""
+        if success:
+            self.statusBar().showMessage(description)
+        else:
+            self.statusBar().showMessage(f"Command not acknowledged: {description}")
+
+    def on_command_failed(self, title: str, message: str):
+        """Report a command that raised an error"""
+        QMessageBox.critical(self, title, f"Command failed:\n{message}")
+
+    def on_link_changed(self, event: str):
+        """Report the controller reconnecting after the USB link dropped"""
+        if event == "lost":
+            self.statusBar().showMessage("Connection lost - reconnecting...")
+        elif event == "restored":
+            self.statusBar().showMessage("Connection restored, laser states re-applied")
+        elif event == "failed":
+            self.controller_proxy.disconnect_controller()
+            QMessageBox.critical(
+                self,
+                "Connection Lost",
+                "The laser controller could not be reconnected.\n"
+                "Check the USB cable, then connect again.",
+            )
 
-    def update_led_states(self):
-        """Update all LED indicators based on controller state"""
-        if not self.controller or not self.controller.connected:
+    def update_led_states(self, states: Dict[int, LaserState]):
+        """Update all LED indicators from acknowledged controller state"""
+        if not self.is_connected:
             return
 
         for i, led in enumerate(self.led_indicators, start=1):
-            state = self.controller.get_laser_state(i)
-            led.set_state(state == LaserState.ON)
+            led.set_state(states.get(i) == LaserState.ON)
+
+    def update_usage(self, box_serial: str, report: Dict[int, tuple]):
+        """Show accumulated laser usage reported by the worker"""
+        self.usage_group.setTitle(f"Laser Usage - Box {box_serial}")
+        for laser, (total, last_day, last_week, switch_ons, longest) in report.items():
+            row = laser - 1
+            if row >= self.usage_table.rowCount():
+                continue
+            values = [
+                format_duration(total),
+                format_duration(last_day),
+                format_duration(last_week),
+                str(switch_ons),
+                format_duration(longest),
+            ]
+            for column, text in enumerate(values, start=1):
+                self.usage_table.item(row, column).setText(text)
 
     def closeEvent(self, event):
         """Handle window close event"""
-        if self.controller and self.controller.connected:
+        if self.is_connected:
             reply = QMessageBox.question(
                 self,
                 "Confirm Exit",
@@ -532,13 +881,13 @@ class LaserControlGUI(QMainWindow):
                 QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
             )
 
-            if reply == QMessageBox.StandardButton.Yes:
-                self.disconnect_from_controller()
-                event.accept()
-            else:
+            if reply != QMessageBox.StandardButton.Yes:
                 event.ignore()
-        else:
-            event.accept()
+                return
+
+        # Turns lasers off if connected, then stops the worker thread
+        self.controller_proxy.shutdown()
+        event.accept()
 
 
 def main():
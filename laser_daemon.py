@@ -0,0 +1,912 @@
+"""
+Local Control Daemon for the Laser TTL Controller
+Owns each box's MultiLaserController for as long as it runs and shares the
+boxes with any number of local client processes
+
+Every `with MultiLaserController(...)` block opens the port, waits for the
+board to reset, turns every laser off and keeps other processes off the
+port until it closes. The daemon connects to each box once and keeps the
+connection. Scripts use LaserDaemonClient instead, which has the same
+methods as MultiLaserController, connects in well under a millisecond and
+finds the lasers as the last client left them.
+
+Requests and replies are single lines of JSON over a Unix socket, or over
+TCP on localhost where Unix sockets are not available (e.g. Windows).
+The Unix socket can only be opened by the user who started the daemon.
+TCP clients must first send a token, which the daemon writes to a file
+only that user can read.
+Each client connection is served on its own thread. The controllers are
+thread-safe and their writer thread sends everything queued by then in one
+write(), so requests from concurrent clients are serialised and batched on
+the wire by the controller itself.
+
+Requirements:
+- pyserial: pip install pyserial
+
+Running the daemon (Ctrl+C or SIGTERM turns every laser off and exits):
+    python laser_daemon.py --box bench_a=/dev/ttyUSB0 --box bench_b=/dev/ttyUSB1
+
+Example:
+    with LaserDaemonClient(box="bench_a") as lasers:
+        lasers.turn_on_laser(1)
+        print(lasers.get_all_laser_states())
+    # Laser 1 is still on for the next client
+"""
+
+import argparse
+import hmac
+import itertools
+import json
+import logging
+import os
+import secrets
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+from laser_controller import (
+    DEFAULT_BAUD_RATE,
+    LaserControllerError,
+    LaserSequence,
+    LaserState,
+    MultiLaserController,
+)
+from laser_metrics import MetricsExporter
+
+# A Unix socket path, or a (host, port) pair for TCP
+DaemonAddress = Union[str, Tuple[str, int]]
+
+DEFAULT_TCP_PORT = 9732
+if hasattr(socket, "AF_UNIX"):
+    DEFAULT_ADDRESS: DaemonAddress = os.path.join(
+        os.path.expanduser("~"), ".multilaser.sock"
+    )
+else:
+    DEFAULT_ADDRESS = ("127.0.0.1", DEFAULT_TCP_PORT)
+
+# Where a TCP daemon leaves its token for clients run by the same user
+DEFAULT_TOKEN_PATH = os.path.join(os.path.expanduser("~"), ".multilaser.token")
+
+# Controller methods and properties clients may call. Connecting and
+# disconnecting belong to the daemon, and start_sequence() returns a Future,
+# which cannot cross the socket (run_sequence() waits for it instead). Raw
+# commands are not offered: 'baud', 'watchdog 0', 'set_pin' and 'set_logic'
+# would change the box for every client and behind the controller's back.
+_METHODS = frozenset(
+    [
+        "toggle_laser",
+        "set_laser",
+        "set_states",
+        "set_mask",
+        "get_mask",
+        "turn_on_laser",
+        "turn_off_laser",
+        "turn_on_all",
+        "turn_off_all",
+        "flush_coalesced",
+        "get_laser_state",
+        "get_all_laser_states",
+        "sync_states",
+        "supports_sequences",
+        "upload_sequence",
+        "run_sequence",
+        "run_sequence_on_host",
+        "abort_sequence",
+        "flash_laser",
+        "sequential_pattern",
+        "emergency_stop",
+        "connection_health",
+        "queue_depth",
+        "metrics_snapshot",
+    ]
+)
+
+# Exceptions re-raised as themselves by the client; anything else arrives
+# as a LaserControllerError
+_ERROR_TYPES = {
+    "LaserControllerError": LaserControllerError,
+    "ValueError": ValueError,
+    "TypeError": TypeError,
+}
+
+
+def _sequence_to_json(sequence: LaserSequence) -> Dict[str, object]:
+    """Steps and laser count of a sequence, for a request"""
+    return {"num_lasers": sequence.num_lasers, "steps": sequence.steps}
+
+
+def _sequence_from_json(data: Dict[str, object]) -> LaserSequence:
+    """Rebuild a sequence sent by a client"""
+    sequence = LaserSequence(data["num_lasers"])
+    sequence.steps = [(int(mask), int(duration)) for mask, duration in data["steps"]]
+    return sequence
+
+
+def _to_json(value: object) -> object:
+    """Convert a controller result to plain JSON types"""
+    if isinstance(value, LaserState):
+        return value.name
+    if isinstance(value, dict):
+        return {str(key): _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    return value
+
+
+def _states_from_json(states: Dict[str, str]) -> Dict[int, LaserState]:
+    """Laser states keyed by laser number, from their JSON form"""
+    return {int(n): LaserState[state] for n, state in states.items()}
+
+
+def _json_line(message: Dict[str, object]) -> bytes:
+    """Encode a request or reply as one line of JSON"""
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _parse_request(request: object) -> Tuple[Optional[str], str, List, Dict]:
+    """
+    Check the shape of a decoded request
+
+    Returns:
+        Tuple[Optional[str], str, List, Dict]: Box, method, args and kwargs
+
+    Raises:
+        ValueError: If the request is not an object with a string "method"
+            and well-formed optional fields
+    """
+    if not isinstance(request, dict):
+        raise ValueError("A request must be a JSON object")
+    method = request.get("method")
+    if not isinstance(method, str):
+        raise ValueError('A request needs a string "method"')
+    box = request.get("box")
+    args = request.get("args", [])
+    kwargs = request.get("kwargs", {})
+    if box is not None and not isinstance(box, str):
+        raise ValueError('"box" must be a string')
+    if not isinstance(args, list):
+        raise ValueError('"args" must be a list')
+    if not isinstance(kwargs, dict):
+        raise ValueError('"kwargs" must be an object')
+    return box, method, args, kwargs
+
+
+class _ReusableTCPServer(socketserver.ThreadingTCPServer):
+    """Threading TCP server that can rebind a port still in TIME_WAIT"""
+
+    allow_reuse_address = True
+
+
+class LaserDaemon:
+    """
+    Serves the controllers for one or more boxes to local clients
+
+    Boxes are connected when the daemon starts and disconnected, with every
+    laser turned off, when it stops. Clients only ever change laser states;
+    they cannot reset or disconnect a box.
+
+    Attributes:
+        boxes: Box name mapped to its serial port
+        controllers: Box name mapped to its connected controller
+        address: Unix socket path or (host, port) being served
+        clients: Client connections currently open
+        requests_served: Requests answered since the daemon started
+        token: Token clients must send before their first request (always
+            set when serving TCP)
+    """
+
+    def __init__(
+        self,
+        boxes: Dict[str, str],
+        address: DaemonAddress = DEFAULT_ADDRESS,
+        journal_dir: Optional[str] = None,
+        metrics_port: Optional[int] = None,
+        token: Optional[str] = None,
+        **controller_kwargs,
+    ):
+        """
+        Initialise the LaserDaemon
+
+        Args:
+            boxes: Box name mapped to its serial port
+            address: Unix socket path, or (host, port) for TCP (default:
+                ~/.multilaser.sock, or 127.0.0.1:9732 without Unix sockets)
+            journal_dir: Keep a command journal per box in this directory,
+                named after the box (default: None). See laser_journal.
+            metrics_port: Also serve the controllers' metrics over HTTP on
+                this port (default: None, no exporter). See laser_metrics.
+            token: Token clients must send first (default: None; over TCP a
+                random token is made and written to DEFAULT_TOKEN_PATH)
+            **controller_kwargs: Passed to every MultiLaserController
+        """
+        if not boxes:
+            raise ValueError("The daemon needs at least one box")
+        self.boxes = dict(boxes)
+        self.address = address
+        self.journal_dir = journal_dir
+        self.controller_kwargs = controller_kwargs
+        self.token = token
+        self._token_path: Optional[str] = None
+        self.controllers: Dict[str, MultiLaserController] = {}
+        self.clients = 0
+        self.requests_served = 0
+        self._server: Optional[socketserver.BaseServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._count_lock = threading.Lock()
+        self.exporter: Optional[MetricsExporter] = None
+        if metrics_port is not None:
+            self.exporter = MetricsExporter(self.controllers, port=metrics_port)
+        self.logger = logging.getLogger(__name__)
+
+    def start(self) -> None:
+        """
+        Claim the address, connect every box and start serving
+
+        Raises:
+            LaserControllerError: If another daemon is serving the address or
+                a box cannot be connected
+        """
+        if self._server is not None:
+            return
+        self._server = self._bind()
+        try:
+            for name, port in self.boxes.items():
+                kwargs = dict(self.controller_kwargs, auto_connect=False)
+                if self.journal_dir is not None:
+                    kwargs["journal_path"] = os.path.join(
+                        self.journal_dir, f"{name}.journal"
+                    )
+                controller = MultiLaserController(port=port, **kwargs)
+                controller.connect()
+                self.controllers[name] = controller
+        except (LaserControllerError, OSError):
+            self.stop()
+            raise
+
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="laser-daemon", daemon=True
+        )
+        self._thread.start()
+        if self.exporter is not None:
+            self.exporter.start()
+        self.logger.info(
+            "Laser daemon serving %s on %s", ", ".join(self.boxes), self.address
+        )
+
+    def _bind(self) -> socketserver.BaseServer:
+        """Create the listening server for the configured address"""
+        daemon = self
+        tcp = not isinstance(self.address, str)
+
+        class Handler(socketserver.StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                if tcp:
+                    # Replies are single small writes; do not hold them back
+                    self.connection.setsockopt(
+                        socket.IPPROTO_TCP, socket.TCP_NODELAY, 1
+                    )
+
+            def handle(self):
+                daemon._count_client(1)
+                try:
+                    if daemon.token is not None:
+                        refusal = daemon._check_token(self.rfile.readline())
+                        self.wfile.write(refusal or _json_line({"result": True}))
+                        if refusal:
+                            return
+                    for line in self.rfile:
+                        self.wfile.write(daemon.handle_request(line))
+                except OSError:
+                    pass  # Client went away mid-reply
+                finally:
+                    daemon._count_client(-1)
+
+        if tcp:
+            server = _ReusableTCPServer(self.address, Handler)
+            self.address = server.server_address[:2]
+            if self.token is None:
+                # Any local user can reach a TCP port
+                self.token = secrets.token_hex(16)
+                self._write_token(DEFAULT_TOKEN_PATH)
+        else:
+            self._remove_stale_socket()
+            # Lasers are not something other users of the machine should
+            # drive. The socket is created owner-only, rather than chmod-ed
+            # after bind(), so no other user can connect in between.
+            old_umask = os.umask(0o177)
+            try:
+                server = socketserver.ThreadingUnixStreamServer(self.address, Handler)
+            finally:
+                os.umask(old_umask)
+        server.daemon_threads = True
+        return server
+
+    def _write_token(self, path: str) -> None:
+        """Leave the token where only this user's clients can read it"""
+        if os.path.exists(path):
+            os.unlink(path)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as token_file:
+            token_file.write(self.token)
+        self._token_path = path
+
+    def _check_token(self, line: bytes) -> Optional[bytes]:
+        """
+        Check a connection's first line for the daemon's token
+
+        Args:
+            line: JSON object with "token"
+
+        Returns:
+            Optional[bytes]: None if the token matches, else the error reply
+        """
+        try:
+            token = json.loads(line).get("token")
+        except (ValueError, AttributeError):
+            token = None
+        if isinstance(token, str) and hmac.compare_digest(token, self.token):
+            return None
+        self.logger.warning("Refused a client without the daemon's token")
+        return _json_line(
+            {
+                "id": None,
+                "error": "Laser daemon refused the connection: wrong or missing token",
+                "type": "LaserControllerError",
+            }
+        )
+
+    def _remove_stale_socket(self) -> None:
+        """Delete a socket file left by a daemon that did not exit cleanly"""
+        if not os.path.exists(self.address):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.address)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(self.address)
+            return
+        finally:
+            probe.close()
+        raise LaserControllerError(f"A laser daemon is already serving {self.address}")
+
+    def _count_client(self, change: int) -> None:
+        """Track open client connections"""
+        with self._count_lock:
+            self.clients += change
+
+    def handle_request(self, line: bytes) -> bytes:
+        """
+        Answer one request line
+
+        Args:
+            line: JSON object with "method" and optionally "id", "box",
+                "args" and "kwargs"
+
+        Returns:
+            bytes: JSON reply line with the request's "id" and either
+                "result" or "error" and "type"
+        """
+        request_id = None
+        try:
+            request = json.loads(line)
+            if isinstance(request, dict):
+                request_id = request.get("id")
+            result = self._dispatch(*_parse_request(request))
+            reply = {"id": request_id, "result": _to_json(result)}
+        except (LaserControllerError, ValueError, TypeError) as e:
+            # Reported by the base type the client re-raises (e.g. ValueError
+            # for a JSONDecodeError)
+            error_type = next(t for t in _ERROR_TYPES.values() if isinstance(e, t))
+            reply = {"id": request_id, "error": str(e), "type": error_type.__name__}
+        except Exception as e:
+            self.logger.exception("Daemon request failed")
+            reply = {
+                "id": request_id,
+                "error": f"{type(e).__name__}: {e}",
+                "type": "LaserControllerError",
+            }
+        with self._count_lock:
+            self.requests_served += 1
+        return _json_line(reply)
+
+    def _dispatch(
+        self, box: Optional[str], method: str, args: List, kwargs: Dict
+    ) -> object:
+        """Run one request against the named box's controller"""
+        if method == "boxes":
+            return self.boxes
+        name, controller = self._controller_for(box)
+        if method == "info":
+            return {
+                "box": name,
+                "port": controller.port,
+                "num_lasers": controller.num_lasers,
+                "protocol_version": controller.protocol_version,
+                "connected": controller.connected,
+                "reconnecting": controller.reconnecting,
+            }
+        if method not in _METHODS:
+            raise LaserControllerError(f"Unknown daemon method '{method}'")
+
+        # Undo what JSON did to the arguments that are not plain values
+        if method == "set_states":
+            if args:
+                args[0] = {int(n): state for n, state in args[0].items()}
+            if "states" in kwargs:
+                kwargs["states"] = {
+                    int(n): state for n, state in kwargs["states"].items()
+                }
+        elif method in ("upload_sequence", "run_sequence", "run_sequence_on_host"):
+            if args and args[0] is not None:
+                args[0] = _sequence_from_json(args[0])
+            if kwargs.get("sequence") is not None:
+                kwargs["sequence"] = _sequence_from_json(kwargs["sequence"])
+
+        attribute = getattr(controller, method)
+        if not callable(attribute):
+            return attribute
+        return attribute(*args, **kwargs)
+
+    def _controller_for(self, box: Optional[str]) -> Tuple[str, MultiLaserController]:
+        """Find a box's controller; the box may be omitted if there is only one"""
+        if box is None:
+            if len(self.controllers) != 1:
+                raise LaserControllerError(
+                    f"Name a box: the daemon serves {', '.join(self.boxes)}"
+                )
+            return next(iter(self.controllers.items()))
+        controller = self.controllers.get(box)
+        if controller is None:
+            raise LaserControllerError(
+                f"Unknown box '{box}': the daemon serves {', '.join(self.boxes)}"
+            )
+        return box, controller
+
+    def stop(self) -> None:
+        """Stop serving, then disconnect every box (turning its lasers off)"""
+        if self._server is not None:
+            if self._thread is not None:
+                self._server.shutdown()
+                self._thread.join(timeout=1.0)
+                self._thread = None
+            self._server.server_close()
+            self._server = None
+            if isinstance(self.address, str) and os.path.exists(self.address):
+                os.unlink(self.address)
+            if self._token_path is not None and os.path.exists(self._token_path):
+                os.unlink(self._token_path)
+                self._token_path = None
+        if self.exporter is not None:
+            self.exporter.stop()
+        for controller in self.controllers.values():
+            controller.disconnect()
+        self.controllers.clear()
+
+    @property
+    def running(self) -> bool:
+        """True while clients are being served"""
+        return self._thread is not None
+
+    def serve_until_stopped(self) -> None:
+        """Start, then serve until Ctrl+C or SIGTERM"""
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        self.start()
+        try:
+            while True:
+                time.sleep(1.0)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def __repr__(self) -> str:
+        return (
+            f"LaserDaemon(boxes={list(self.boxes)}, address={self.address!r}, "
+            f"clients={self.clients})"
+        )
+
+
+class _ClientConnection:
+    """One thread's socket to the daemon"""
+
+    def __init__(
+        self, address: DaemonAddress, timeout: Optional[float], token: Optional[str]
+    ):
+        if isinstance(address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            self.sock.settimeout(timeout)
+            self.sock.connect(address)
+        except OSError:
+            self.sock.close()
+            raise
+        self.reader = self.sock.makefile("rb")
+        if token is not None:
+            try:
+                self.sock.sendall(_json_line({"token": token}))
+                reply = json.loads(self.reader.readline() or b"{}")
+            except (OSError, ValueError):
+                self.close()
+                raise
+            if "error" in reply or "result" not in reply:
+                self.close()
+                raise LaserControllerError(
+                    reply.get("error", "Laser daemon closed the connection")
+                )
+
+    def close(self) -> None:
+        self.reader.close()
+        self.sock.close()
+
+
+class LaserDaemonClient:
+    """
+    Drop-in stand-in for MultiLaserController that talks to a LaserDaemon
+
+    Methods have the same names, arguments and return values as
+    MultiLaserController's, and raise the same exceptions. Unlike a
+    controller, connecting neither resets the board nor turns the lasers
+    off, and disconnecting (or leaving a with block) only closes the socket:
+    the lasers stay as they are. Call turn_off_all() or emergency_stop()
+    explicitly where a script must leave them off.
+
+    Thread-safe: each thread gets its own connection to the daemon, so
+    threads sharing a client do not wait for each other's replies.
+
+    Attributes:
+        box: Box name, filled in from the daemon if not given
+        port: Box's serial port, as reported by the daemon
+        num_lasers: Number of lasers on the box
+        protocol_version: Box's firmware protocol version
+    """
+
+    def __init__(
+        self,
+        box: Optional[str] = None,
+        address: DaemonAddress = DEFAULT_ADDRESS,
+        timeout: Optional[float] = None,
+        auto_connect: bool = True,
+        token: Optional[str] = None,
+    ):
+        """
+        Initialise the LaserDaemonClient
+
+        Args:
+            box: Box name (default: None, the daemon's only box)
+            address: Daemon's Unix socket path or (host, port) (default:
+                DEFAULT_ADDRESS, as used by the daemon)
+            timeout: Seconds to wait for any reply (default: None, wait as
+                long as the controller does; patterns can run for minutes)
+            auto_connect: Whether to connect to the daemon on initialisation
+            token: Token a TCP daemon requires (default: None, read from
+                DEFAULT_TOKEN_PATH for TCP addresses if it exists)
+        """
+        self.box = box
+        self.address = address
+        self.timeout = timeout
+        if token is None and not isinstance(address, str):
+            try:
+                with open(DEFAULT_TOKEN_PATH) as token_file:
+                    token = token_file.read().strip()
+            except OSError:
+                pass  # The daemon will refuse the connection
+        self._token = token
+        self.port: Optional[str] = None
+        self.num_lasers = 0
+        self.protocol_version = 0
+        self._local = threading.local()
+        self._connections: List[_ClientConnection] = []
+        self._connections_lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+        if auto_connect:
+            self.connect()
+
+    def connect(self) -> bool:
+        """
+        Connect to the daemon and look up the box
+
+        Returns:
+            bool: True once the daemon has answered
+
+        Raises:
+            LaserControllerError: If the daemon is not running or does not
+                serve the box
+        """
+        info = self._call("info")
+        self.box = info["box"]
+        self.port = info["port"]
+        self.num_lasers = info["num_lasers"]
+        self.protocol_version = info["protocol_version"]
+        return True
+
+    def disconnect(self) -> None:
+        """Close every thread's connection to the daemon; lasers are left as they are"""
+        with self._connections_lock:
+            connections = self._connections
+            self._connections = []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+    def _connection(self) -> _ClientConnection:
+        """The calling thread's connection, opened on first use"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            try:
+                connection = _ClientConnection(self.address, self.timeout, self._token)
+            except OSError as e:
+                raise LaserControllerError(
+                    f"Laser daemon is not running at {self.address}: {e}"
+                )
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _drop_connection(self, connection: _ClientConnection) -> None:
+        """Forget a broken connection so the next call opens a new one"""
+        self._local.connection = None
+        with self._connections_lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+        connection.close()
+
+    def _call(self, method: str, *args, **kwargs) -> object:
+        """
+        Send one request and wait for its reply
+
+        Raises:
+            LaserControllerError: If the daemon cannot be reached or the
+                controller raised it
+            ValueError, TypeError: If the controller raised them
+        """
+        request = {"id": next(self._ids), "box": self.box, "method": method}
+        if args:
+            request["args"] = args
+        if kwargs:
+            request["kwargs"] = kwargs
+        data = _json_line(request)
+
+        connection = self._connection()
+        try:
+            connection.sock.sendall(data)
+            line = connection.reader.readline()
+        except OSError as e:
+            self._drop_connection(connection)
+            raise LaserControllerError(f"Laser daemon request failed: {e}")
+        if not line:
+            self._drop_connection(connection)
+            raise LaserControllerError("Laser daemon closed the connection")
+
+        reply = json.loads(line)
+        if "error" in reply:
+            error_type = _ERROR_TYPES.get(reply.get("type"), LaserControllerError)
+            raise error_type(reply["error"])
+        return reply["result"]
+
+    def boxes(self) -> Dict[str, str]:
+        """Every box the daemon serves, mapped to its serial port"""
+        return self._call("boxes")
+
+    @property
+    def connected(self) -> bool:
+        """True if the daemon is reachable and connected to the box"""
+        try:
+            return self._call("info")["connected"]
+        except LaserControllerError:
+            return False
+
+    @property
+    def laser_states(self) -> Dict[int, LaserState]:
+        """Current laser states, as held by the daemon"""
+        return self.get_all_laser_states()
+
+    def toggle_laser(self, laser_number: int) -> bool:
+        """Toggle a specific laser on/off"""
+        return self._call("toggle_laser", laser_number)
+
+    def set_laser(self, laser_number: int, state: Union[bool, LaserState]) -> bool:
+        """Set a specific laser to a given state"""
+        if isinstance(state, LaserState):
+            state = state.value
+        return self._call("set_laser", laser_number, state)
+
+    def set_states(self, states: Dict[int, Union[bool, LaserState]]) -> bool:
+        """Set several lasers at once"""
+        states = {
+            n: state.value if isinstance(state, LaserState) else state
+            for n, state in states.items()
+        }
+        return self._call("set_states", states)
+
+    def set_mask(self, mask: int) -> bool:
+        """Set every laser from a bitmask"""
+        return self._call("set_mask", mask)
+
+    def get_mask(self) -> int:
+        """Get current states of all lasers as a bitmask"""
+        return self._call("get_mask")
+
+    def turn_on_laser(self, laser_number: int) -> bool:
+        """Turn on a specific laser"""
+        return self._call("turn_on_laser", laser_number)
+
+    def turn_off_laser(self, laser_number: int) -> bool:
+        """Turn off a specific laser"""
+        return self._call("turn_off_laser", laser_number)
+
+    def flush_coalesced(self) -> bool:
+        """Send pending coalesced changes now"""
+        return self._call("flush_coalesced")
+
+    def turn_on_all(self) -> bool:
+        """Turn on all lasers"""
+        return self._call("turn_on_all")
+
+    def turn_off_all(self) -> bool:
+        """Turn off all lasers"""
+        return self._call("turn_off_all")
+
+    def get_laser_state(self, laser_number: int) -> LaserState:
+        """Get current state of a specific laser"""
+        return LaserState[self._call("get_laser_state", laser_number)]
+
+    def sync_states(self) -> bool:
+        """Read every laser's state from the firmware"""
+        return self._call("sync_states")
+
+    def get_all_laser_states(self) -> Dict[int, LaserState]:
+        """Get current states of all lasers"""
+        return _states_from_json(self._call("get_all_laser_states"))
+
+    @property
+    def supports_sequences(self) -> bool:
+        """True if the firmware can play hardware-timed sequences"""
+        return self._call("supports_sequences")
+
+    def upload_sequence(self, sequence: LaserSequence) -> bool:
+        """Replace the firmware's sequence table"""
+        return self._call("upload_sequence", _sequence_to_json(sequence))
+
+    def run_sequence(
+        self,
+        sequence: Optional[LaserSequence] = None,
+        repeats: int = 1,
+        end_mask: int = 0,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """Optionally upload a sequence, then play it and wait until it ends"""
+        if sequence is not None:
+            sequence = _sequence_to_json(sequence)
+        return self._call("run_sequence", sequence, repeats, end_mask, timeout)
+
+    def run_sequence_on_host(
+        self, sequence: LaserSequence, repeats: int = 1, end_mask: int = 0
+    ) -> bool:
+        """Play a sequence by sending one mask command per step from the daemon"""
+        return self._call(
+            "run_sequence_on_host", _sequence_to_json(sequence), repeats, end_mask
+        )
+
+    def abort_sequence(self) -> bool:
+        """Stop a running hardware sequence and turn all lasers off"""
+        return self._call("abort_sequence")
+
+    def flash_laser(
+        self, laser_number: int, flash_count: int = 3, flash_duration: float = 0.5
+    ) -> bool:
+        """Flash a laser a specified number of times"""
+        return self._call("flash_laser", laser_number, flash_count, flash_duration)
+
+    def sequential_pattern(self, delay_seconds: float = 1.0, cycles: int = 1) -> bool:
+        """Run a sequential pattern through all lasers"""
+        return self._call("sequential_pattern", delay_seconds, cycles)
+
+    def emergency_stop(self) -> bool:
+        """Emergency stop - turn off all lasers immediately"""
+        return self._call("emergency_stop")
+
+    def connection_health(self) -> Dict[str, object]:
+        """Link drop and recovery statistics for the box"""
+        return self._call("connection_health")
+
+    def queue_depth(self) -> Dict[str, int]:
+        """Commands waiting to be sent, awaiting replies, and held while reconnecting"""
+        return self._call("queue_depth")
+
+    def metrics_snapshot(self) -> Dict[str, object]:
+        """The box controller's metrics snapshot"""
+        return self._call("metrics_snapshot")
+
+    def __enter__(self):
+        """Context manager entry"""
+        if self.port is None:
+            self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit - close the connection, leaving the lasers as they are"""
+        self.disconnect()
+
+    def __repr__(self) -> str:
+        return f"LaserDaemonClient(box='{self.box}', address={self.address!r})"
+
+
+def _parse_box(value: str) -> Tuple[str, str]:
+    """NAME=PORT, or just PORT to use the port as the name"""
+    name, _, port = value.rpartition("=")
+    return (name or port), port
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Keep laser boxes connected and share them with local clients"
+    )
+    parser.add_argument(
+        "--box",
+        action="append",
+        required=True,
+        metavar="NAME=PORT",
+        help="Box to serve (repeat for several boxes)",
+    )
+    address = parser.add_mutually_exclusive_group()
+    address.add_argument("--socket", help="Unix socket path to listen on")
+    address.add_argument("--tcp", type=int, help="Listen on this TCP port on 127.0.0.1")
+    parser.add_argument("--baud", type=int, default=DEFAULT_BAUD_RATE)
+    parser.add_argument("--lasers", type=int, default=3)
+    parser.add_argument(
+        "--no-reset", action="store_true", help="Do not reset the boards on connect"
+    )
+    parser.add_argument(
+        "--watchdog",
+        type=float,
+        help="Turn the lasers off if the daemon goes silent for this many seconds",
+    )
+    parser.add_argument("--journal-dir", help="Keep a command journal per box here")
+    parser.add_argument("--usage", help="SQLite file for laser usage accounting")
+    parser.add_argument("--metrics-port", type=int, help="Serve metrics over HTTP")
+    parser.add_argument(
+        "--token-file",
+        help="Read the token TCP clients must send from this file "
+        "(default: a random token, written to ~/.multilaser.token)",
+    )
+    args = parser.parse_args()
+
+    if args.socket:
+        daemon_address = args.socket
+    elif args.tcp:
+        daemon_address = ("127.0.0.1", args.tcp)
+    else:
+        daemon_address = DEFAULT_ADDRESS
+
+    token = None
+    if args.token_file:
+        with open(args.token_file) as token_file:
+            token = token_file.read().strip()
+
+    daemon = LaserDaemon(
+        dict(_parse_box(value) for value in args.box),
+        address=daemon_address,
+        journal_dir=args.journal_dir,
+        metrics_port=args.metrics_port,
+        token=token,
+        baud_rate=args.baud,
+        num_lasers=args.lasers,
+        reset_on_connect=not args.no_reset,
+        watchdog_timeout=args.watchdog,
+        usage_path=args.usage,
+    )
+    daemon.serve_until_stopped()
+
+
+if __name__ == "__main__":
+    main()
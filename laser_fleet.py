@@ -0,0 +1,339 @@
+"""
+Multi-Box Laser Fleet Manager
+Drives several Multilaser Boxes, each with its own Arduino and
+MultiLaserController, concurrently from one object
+
+Lasers are addressed as (box, laser) pairs. Fleet-wide operations fan out
+to every box in parallel on a worker pool, so an "all off" costs the
+slowest box's latency rather than the sum of all of them. An emergency
+stop gets a thread of its own per box, so it never waits behind work
+already on the pool.
+
+Requirements:
+- pyserial: pip install pyserial
+
+Example:
+    fleet = LaserFleet({"bench_a": "/dev/ttyUSB0", "bench_b": "/dev/ttyUSB1"})
+    fleet.define_group("1550nm", [("bench_a", 3), ("bench_b", 3)])
+    with fleet:
+        fleet.set_group("1550nm", LaserState.ON)
+        results = fleet.emergency_stop()
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from laser_controller import LaserControllerError, LaserState, MultiLaserController
+
+# A single laser in the fleet: (box name, laser number)
+LaserAddress = Tuple[str, int]
+
+
+class BoxResult:
+    """
+    Outcome of one fleet operation on one box
+
+    Attributes:
+        box: Box name
+        success: True if the operation succeeded on this box
+        elapsed: Seconds the operation took on this box
+        error: Error message if the operation raised, otherwise None
+    """
+
+    def __init__(
+        self, box: str, success: bool, elapsed: float, error: Optional[str] = None
+    ):
+        self.box = box
+        self.success = success
+        self.elapsed = elapsed
+        self.error = error
+
+    def __repr__(self) -> str:
+        return (
+            f"BoxResult(box='{self.box}', success={self.success}, "
+            f"elapsed={self.elapsed * 1000:.1f}ms)"
+        )
+
+
+class LaserFleet:
+    """
+    Concurrent controller for a fleet of Multilaser Boxes
+
+    Each box keeps its own MultiLaserController; the fleet only schedules
+    calls on them. Calls to one box stay sequential, calls to different
+    boxes run in parallel.
+    """
+
+    def __init__(
+        self,
+        boxes: Optional[Dict[str, Union[str, MultiLaserController]]] = None,
+        max_workers: Optional[int] = None,
+        **controller_kwargs,
+    ):
+        """
+        Initialise the LaserFleet
+
+        Args:
+            boxes: Box name mapped to a serial port or an existing controller
+            max_workers: Worker pool size (default: one worker per box)
+            **controller_kwargs: Passed to MultiLaserController for boxes
+                given as port names (auto_connect is always False)
+        """
+        self.controllers: Dict[str, MultiLaserController] = {}
+        self.groups: Dict[str, List[LaserAddress]] = {}
+        self.max_workers = max_workers
+        self._controller_kwargs = controller_kwargs
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.logger = logging.getLogger(__name__)
+
+        for name, box in (boxes or {}).items():
+            self.add_box(name, box)
+
+    def add_box(self, name: str, box: Union[str, MultiLaserController]) -> None:
+        """
+        Add a box to the fleet
+
+        Args:
+            name: Unique box name used in addresses
+            box: Serial port name or an existing MultiLaserController
+        """
+        if name in self.controllers:
+            raise ValueError(f"Box '{name}' is already in the fleet")
+
+        if isinstance(box, MultiLaserController):
+            self.controllers[name] = box
+        else:
+            kwargs = dict(self._controller_kwargs, auto_connect=False)
+            self.controllers[name] = MultiLaserController(port=box, **kwargs)
+
+    def box(self, name: str) -> MultiLaserController:
+        """Get the controller for a named box"""
+        if name not in self.controllers:
+            raise KeyError(f"Unknown box '{name}'")
+        return self.controllers[name]
+
+    def define_group(self, name: str, lasers: Iterable[LaserAddress]) -> None:
+        """
+        Define a named group of lasers that can be switched in one call
+
+        Args:
+            name: Group name, e.g. "1550nm"
+            lasers: (box, laser) addresses in the group
+        """
+        members = list(lasers)
+        for box_name, laser_number in members:
+            self._check_address(box_name, laser_number)
+        self.groups[name] = members
+
+    def _check_address(self, box_name: str, laser_number: int) -> None:
+        controller = self.box(box_name)
+        if not (1 <= laser_number <= controller.num_lasers):
+            raise ValueError(
+                f"Laser number for box '{box_name}' must be between 1 and "
+                f"{controller.num_lasers}"
+            )
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            workers = self.max_workers or max(1, len(self.controllers))
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="laser-fleet"
+            )
+        return self._executor
+
+    def _fan_out(
+        self,
+        operation: Callable[[str, MultiLaserController], bool],
+        box_names: Optional[Iterable[str]] = None,
+        dedicated: bool = False,
+    ) -> Dict[str, BoxResult]:
+        """
+        Run an operation on several boxes in parallel
+
+        An exception on one box is reported in that box's result and does
+        not stop the operation on the others.
+
+        Args:
+            operation: Called with each box's name and controller; returns success
+            box_names: Boxes to run on (default: every box)
+            dedicated: Run on a new thread per box instead of the worker
+                pool, whose workers may all be busy (default: False)
+
+        Returns:
+            Dict[str, BoxResult]: Per-box outcome and timing
+        """
+        names = list(self.controllers if box_names is None else box_names)
+
+        def run(name: str) -> BoxResult:
+            start = time.perf_counter()
+            try:
+                success = bool(operation(name, self.controllers[name]))
+                error = None
+            except (LaserControllerError, ValueError) as e:
+                success, error = False, str(e)
+            except Exception as e:
+                self.logger.exception("Box '%s' raised", name)
+                success, error = False, f"{type(e).__name__}: {e}"
+            return BoxResult(name, success, time.perf_counter() - start, error)
+
+        if dedicated:
+            results: Dict[str, BoxResult] = {}
+
+            def run_into(name: str) -> None:
+                results[name] = run(name)
+
+            threads = [
+                threading.Thread(
+                    target=run_into,
+                    args=(name,),
+                    name=f"laser-fleet-{name}",
+                    daemon=True,
+                )
+                for name in names
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            results = {name: results[name] for name in names}
+        else:
+            futures = {name: self._pool().submit(run, name) for name in names}
+            results = {name: future.result() for name, future in futures.items()}
+
+        for result in results.values():
+            if not result.success:
+                self.logger.error(
+                    "Box '%s' failed: %s",
+                    result.box,
+                    result.error or "not acknowledged",
+                )
+        return results
+
+    def connect_all(self) -> Dict[str, BoxResult]:
+        """Connect every box concurrently"""
+        return self._fan_out(
+            lambda name, controller: controller.connected or controller.connect()
+        )
+
+    def disconnect_all(self) -> Dict[str, BoxResult]:
+        """Turn off and disconnect every box concurrently"""
+
+        def disconnect(name: str, controller: MultiLaserController) -> bool:
+            controller.disconnect()
+            return True
+
+        return self._fan_out(disconnect)
+
+    def turn_off_all(self) -> Dict[str, BoxResult]:
+        """Turn off every laser on every box concurrently"""
+        return self._fan_out(lambda name, controller: controller.turn_off_all())
+
+    def turn_on_all(self) -> Dict[str, BoxResult]:
+        """Turn on every laser on every box concurrently"""
+        return self._fan_out(lambda name, controller: controller.turn_on_all())
+
+    def emergency_stop(self) -> Dict[str, BoxResult]:
+        """Emergency stop every box concurrently, without waiting for the pool"""
+        results = self._fan_out(
+            lambda name, controller: controller.emergency_stop(), dedicated=True
+        )
+        self.logger.warning("Fleet emergency stop activated")
+        return results
+
+    def set_laser(self, address: LaserAddress, state: Union[bool, LaserState]) -> bool:
+        """
+        Set a single laser in the fleet
+
+        Args:
+            address: (box, laser) pair
+            state: Desired state (True/False or LaserState.ON/OFF)
+
+        Returns:
+            bool: True if command successful, False otherwise
+        """
+        box_name, laser_number = address
+        return self.box(box_name).set_laser(laser_number, state)
+
+    def set_lasers(
+        self, states: Dict[LaserAddress, Union[bool, LaserState]]
+    ) -> Dict[str, BoxResult]:
+        """
+        Set many lasers across the fleet, one transaction per box in parallel
+
+        Args:
+            states: Desired states keyed by (box, laser) address
+
+        Returns:
+            Dict[str, BoxResult]: Per-box outcome and timing
+        """
+        per_box: Dict[str, Dict[int, Union[bool, LaserState]]] = {}
+        for (box_name, laser_number), state in states.items():
+            self._check_address(box_name, laser_number)
+            per_box.setdefault(box_name, {})[laser_number] = state
+
+        return self._fan_out(
+            lambda name, controller: controller.set_states(per_box[name]),
+            per_box.keys(),
+        )
+
+    def set_group(
+        self, group: str, state: Union[bool, LaserState]
+    ) -> Dict[str, BoxResult]:
+        """
+        Switch every laser in a named group
+
+        Args:
+            group: Group name given to define_group
+            state: Desired state for every member
+
+        Returns:
+            Dict[str, BoxResult]: Per-box outcome and timing
+        """
+        if group not in self.groups:
+            raise KeyError(f"Unknown group '{group}'")
+        return self.set_lasers({address: state for address in self.groups[group]})
+
+    def get_laser_state(self, address: LaserAddress) -> LaserState:
+        """Get the cached state of a single laser in the fleet"""
+        box_name, laser_number = address
+        return self.box(box_name).get_laser_state(laser_number)
+
+    def get_all_laser_states(self) -> Dict[LaserAddress, LaserState]:
+        """Get the cached states of every laser in the fleet"""
+        return {
+            (name, laser_number): state
+            for name, controller in self.controllers.items()
+            for laser_number, state in controller.get_all_laser_states().items()
+        }
+
+    def close(self) -> None:
+        """Disconnect every box and shut down the worker pool"""
+        try:
+            self.disconnect_all()
+        finally:
+            if self._executor:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def __enter__(self):
+        """Context manager entry - connect every box"""
+        results = self.connect_all()
+        failed = [name for name, result in results.items() if not result.success]
+        if failed:
+            self.close()
+            raise LaserControllerError(f"Could not connect to boxes: {failed}")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit - ensure every laser is off"""
+        try:
+            self.emergency_stop()
+        finally:
+            self.close()
+
+    def __repr__(self) -> str:
+        return f"LaserFleet(boxes={list(self.controllers)}, groups={list(self.groups)})"
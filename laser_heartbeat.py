@@ -0,0 +1,174 @@
+"""
+Host Heartbeat for the Laser TTL Controller
+Keeps the firmware's watchdog fed, so lasers only stay lit while the host
+process is alive (protocol version 10 and later)
+
+Once armed with 'watchdog N', the firmware turns every laser OFF when no
+byte has arrived for N milliseconds. Any byte counts, so the heartbeat only
+writes the single laser_binary.KEEPALIVE_BYTE when the link has been quiet
+for a whole interval. While commands are flowing it sends nothing; on an
+idle 9600 baud link, one byte every 250 ms uses 0.4% of the bandwidth.
+
+Used by MultiLaserController when created with a watchdog_timeout.
+
+Example:
+    controller = MultiLaserController(port="/dev/ttyUSB0", watchdog_timeout=1.0)
+    controller.sequential_pattern(delay_seconds=0.5, cycles=100)
+    # If the process dies during the pattern, the lasers go OFF within 1 s
+    print(controller.heartbeat.summary(controller.link_baud_rate))
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from laser_scheduler import JitterHistogram
+
+# Bits on the wire per byte (start bit, 8 data bits, stop bit)
+_BITS_PER_BYTE = 10
+
+
+class Heartbeat:
+    """
+    Background thread that writes a keepalive whenever the link goes quiet
+
+    A keepalive falls due one interval after the last byte the host wrote.
+    How late each one is actually written is recorded in `lateness`; one
+    more than a whole interval late means at least one keepalive slot was
+    lost (e.g. to a stalled process) and counts as missed.
+
+    Attributes:
+        interval: Seconds of silence after which a keepalive is written
+        sent: Keepalives written
+        skipped: Keepalives not needed because other traffic was sent
+        missed: Keepalives written over an interval late, or not at all
+        lateness: Histogram of keepalive lateness
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        send: Callable[[], bool],
+        last_write: Callable[[], float],
+    ):
+        """
+        Initialise the Heartbeat
+
+        Args:
+            interval: Seconds of silence after which a keepalive is written
+            send: Writes one keepalive; returns False if the write failed
+            last_write: Time of the host's last write, on the
+                time.perf_counter() clock
+        """
+        self.interval = interval
+        self.sent = 0
+        self.skipped = 0
+        self.missed = 0
+        self._failed = 0
+        self.lateness = JitterHistogram(bin_width_us=1000)
+        self._send = send
+        self._last_write = last_write
+        self._running_time = 0.0
+        self._started_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start sending keepalives (does nothing if already running)"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="laser-heartbeat", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sending keepalives and wait for the thread to finish"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+        self._running_time += time.perf_counter() - self._started_at
+        self._started_at = None
+
+    @property
+    def running(self) -> bool:
+        """True while keepalives are being sent"""
+        return self._thread is not None
+
+    def _run(self) -> None:
+        """Write keepalives until stopped"""
+        woken = False
+        while True:
+            due = self._last_write() + self.interval
+            wait = due - time.perf_counter()
+            if wait > 0:
+                if woken:
+                    self.skipped += 1  # Other traffic moved the deadline
+                woken = True
+                if self._stop.wait(wait):
+                    return
+                continue
+
+            woken = False
+            if not self._send():
+                self._failed += 1
+                self.missed += 1
+                if self._stop.wait(self.interval):
+                    return
+                continue
+            self.sent += 1
+            self.lateness.record(round(-wait * 1e9))
+            if -wait > self.interval:
+                self.missed += 1
+
+    @property
+    def running_time(self) -> float:
+        """Total seconds the heartbeat has been running"""
+        if self._started_at is None:
+            return self._running_time
+        return self._running_time + time.perf_counter() - self._started_at
+
+    @property
+    def miss_rate(self) -> float:
+        """Fraction of keepalives that were missed"""
+        attempts = self.sent + self._failed
+        return self.missed / attempts if attempts else 0.0
+
+    def overhead(self, baud_rate: int) -> float:
+        """
+        Share of the link's bandwidth used by keepalives
+
+        Args:
+            baud_rate: Link rate the keepalives were sent at
+
+        Returns:
+            float: Fraction of the available bytes (0-1)
+        """
+        elapsed = self.running_time
+        if not elapsed:
+            return 0.0
+        return self.sent / (elapsed * baud_rate / _BITS_PER_BYTE)
+
+    def summary(self, baud_rate: int) -> Dict[str, float]:
+        """Heartbeat statistics, e.g. for logging or JSON"""
+        return {
+            "interval_s": self.interval,
+            "running_s": round(self.running_time, 1),
+            "sent": self.sent,
+            "skipped": self.skipped,
+            "missed": self.missed,
+            "miss_rate": round(self.miss_rate, 4),
+            "overhead": round(self.overhead(baud_rate), 5),
+            "max_late_ms": round(self.lateness.max_us / 1000, 1),
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"Heartbeat(interval={self.interval}s, sent={self.sent}, "
+            f"skipped={self.skipped}, missed={self.missed})"
+        )
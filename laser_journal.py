@@ -0,0 +1,346 @@
+"""
+Binary Command Journal for the Laser TTL Controller
+Records every command written and every reply read, with monotonic
+timestamps, in a fixed-size ring file
+
+Records are 64 bytes and written straight into a memory-mapped file, so
+appending one costs a struct.pack_into() and no system call. The file
+keeps the most recent records: once it is full, each new record replaces
+the oldest. The operating system writes the mapped pages back to disk on
+its own, so the journal survives the process crashing.
+
+Used by MultiLaserController when created with a journal_path.
+
+Decoding (prints the records oldest first):
+    python laser_journal.py laser.journal [--last N]
+
+Example:
+    controller = MultiLaserController(port="/dev/ttyUSB0", journal_path="laser.journal")
+    controller.set_laser(1, True)
+    for record in read_journal("laser.journal")[-2:]:
+        print(format_record(record))
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+import laser_binary
+
+# File header: magic, format version, record size, capacity in records,
+# records ever written, and a wall clock / monotonic clock pair taken when
+# the journal was last opened
+_HEADER = struct.Struct("<8sHHIQQQ")
+_HEADER_SIZE = 64
+_MAGIC = b"LASERJNL"
+_FORMAT_VERSION = 1
+_COUNT_OFFSET = 16  # Offset of the record count within the header
+
+# Record: monotonic time (ns), kind, binary sequence number (0 for text),
+# payload length before truncation, payload
+_RECORD = struct.Struct("<QBBH52s")
+RECORD_SIZE = 64
+MAX_PAYLOAD = 52
+
+# Record kinds
+KIND_SENT = 1  # Bytes written for one command (or the stop bytes)
+KIND_RECEIVED = 2  # A reply line or binary frame, including events
+KIND_NOTE = 3  # Connection events, as text
+KIND_OPEN = 4  # Journal opened; payload holds the wall clock time (ns)
+
+_KIND_NAMES = {KIND_SENT: "TX", KIND_RECEIVED: "RX", KIND_NOTE: "--", KIND_OPEN: "--"}
+
+_OPCODE_NAMES = {
+    laser_binary.OP_PING: "ping",
+    laser_binary.OP_TOGGLE: "toggle",
+    laser_binary.OP_ON: "on",
+    laser_binary.OP_OFF: "off",
+    laser_binary.OP_MASK: "mask",
+    laser_binary.OP_ALL_ON: "all_on",
+    laser_binary.OP_ALL_OFF: "all_off",
+    laser_binary.OP_STATUS: "status",
+}
+_EVENT_NAMES = {
+    laser_binary.EVENT_SWITCH: "switch",
+    laser_binary.EVENT_SEQUENCE_DONE: "sequence done",
+    laser_binary.EVENT_SEQUENCE_ABORTED: "sequence aborted",
+    laser_binary.EVENT_STOPPED: "stopped",
+    laser_binary.EVENT_WATCHDOG: "watchdog",
+}
+
+# 65536 records (4 MiB): hours of continuous traffic at 9600 baud
+DEFAULT_CAPACITY = 65536
+
+
+class JournalRecord:
+    """
+    One decoded journal record
+
+    Attributes:
+        index: Position in the sequence of all records ever written
+        timestamp_ns: time.monotonic_ns() when the record was written
+        wall_time: Wall clock time in seconds since the epoch, estimated from
+            the last open record before this one
+        kind: KIND_* constant
+        sequence: Binary sequence number, or 0 for text
+        length: Payload length before truncation
+        payload: Stored payload (the first MAX_PAYLOAD bytes)
+    """
+
+    def __init__(
+        self,
+        index: int,
+        timestamp_ns: int,
+        kind: int,
+        sequence: int,
+        length: int,
+        payload: bytes,
+    ):
+        self.index = index
+        self.timestamp_ns = timestamp_ns
+        self.wall_time: Optional[float] = None
+        self.kind = kind
+        self.sequence = sequence
+        self.length = length
+        self.payload = payload
+
+    @property
+    def truncated(self) -> bool:
+        """True if the payload was longer than MAX_PAYLOAD bytes"""
+        return self.length > len(self.payload)
+
+    def __repr__(self) -> str:
+        return (
+            f"JournalRecord(index={self.index}, kind={self.kind}, "
+            f"payload={self.payload!r})"
+        )
+
+
+class CommandJournal:
+    """
+    Append-only ring of command and reply records in a memory-mapped file
+
+    An existing journal with the same capacity is appended to; any other
+    file at the path is replaced. Appends are thread-safe.
+
+    Attributes:
+        path: Journal file path
+        capacity: Records kept before the oldest are overwritten
+    """
+
+    def __init__(self, path: str, capacity: int = DEFAULT_CAPACITY):
+        """
+        Open or create a journal
+
+        Args:
+            path: Journal file path
+            capacity: Records to keep (default: 65536, a 4 MiB file)
+        """
+        if capacity < 1:
+            raise ValueError("Journal capacity must be at least 1 record")
+        self.path = path
+        self.capacity = capacity
+        self._lock = threading.Lock()
+
+        size = _HEADER_SIZE + capacity * RECORD_SIZE
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)  # The mapping keeps its own reference
+
+        magic, version, record_size, stored_capacity, count, _, _ = _HEADER.unpack_from(
+            self._map, 0
+        )
+        if (magic, version, record_size, stored_capacity) != (
+            _MAGIC,
+            _FORMAT_VERSION,
+            RECORD_SIZE,
+            capacity,
+        ):
+            count = 0
+        self._count = count
+        _HEADER.pack_into(
+            self._map,
+            0,
+            _MAGIC,
+            _FORMAT_VERSION,
+            RECORD_SIZE,
+            capacity,
+            count,
+            time.time_ns(),
+            time.monotonic_ns(),
+        )
+        self.append(KIND_OPEN, struct.pack("<Q", time.time_ns()))
+
+    def append(self, kind: int, payload: bytes, sequence: int = 0) -> None:
+        """
+        Add a record, overwriting the oldest once the journal is full
+
+        Args:
+            kind: KIND_* constant
+            payload: Bytes to store; only the first MAX_PAYLOAD are kept
+            sequence: Binary sequence number (default: 0 for text)
+        """
+        timestamp = time.monotonic_ns()
+        with self._lock:
+            if self._map is None:
+                return
+            offset = _HEADER_SIZE + (self._count % self.capacity) * RECORD_SIZE
+            _RECORD.pack_into(
+                self._map,
+                offset,
+                timestamp,
+                kind,
+                sequence,
+                len(payload),
+                payload[:MAX_PAYLOAD],
+            )
+            self._count += 1
+            struct.pack_into("<Q", self._map, _COUNT_OFFSET, self._count)
+
+    def note(self, text: str) -> None:
+        """Add a text note, e.g. for a connection event"""
+        self.append(KIND_NOTE, text.encode("utf-8"))
+
+    @property
+    def count(self) -> int:
+        """Records written since the journal was created"""
+        return self._count
+
+    def flush(self) -> None:
+        """Write the mapped pages to disk now"""
+        with self._lock:
+            if self._map is not None:
+                self._map.flush()
+
+    def close(self) -> None:
+        """Flush and unmap the journal; later appends are ignored"""
+        with self._lock:
+            if self._map is None:
+                return
+            self._map.flush()
+            self._map.close()
+            self._map = None
+
+    def __repr__(self) -> str:
+        return (
+            f"CommandJournal(path='{self.path}', capacity={self.capacity}, "
+            f"count={self._count})"
+        )
+
+
+def read_journal(path: str) -> List[JournalRecord]:
+    """
+    Read every record still held in a journal, oldest first
+
+    Args:
+        path: Journal file path
+
+    Returns:
+        List[JournalRecord]: Records in the order they were written
+
+    Raises:
+        ValueError: If the file is not a journal
+    """
+    with open(path, "rb") as journal_file:
+        data = journal_file.read()
+    if len(data) < _HEADER_SIZE:
+        raise ValueError(f"{path} is not a laser journal")
+    magic, version, record_size, capacity, count, wall_ns, monotonic_ns = (
+        _HEADER.unpack_from(data, 0)
+    )
+    if magic != _MAGIC or version != _FORMAT_VERSION or record_size != RECORD_SIZE:
+        raise ValueError(f"{path} is not a laser journal")
+
+    # Until an open record is reached, estimate wall times from the header
+    clock_offset = wall_ns - monotonic_ns
+    records = []
+    for index in range(max(0, count - capacity), count):
+        offset = _HEADER_SIZE + (index % capacity) * RECORD_SIZE
+        timestamp, kind, sequence, length, payload = _RECORD.unpack_from(data, offset)
+        record = JournalRecord(
+            index,
+            timestamp,
+            kind,
+            sequence,
+            length,
+            payload[: min(length, MAX_PAYLOAD)],
+        )
+        if kind == KIND_OPEN:
+            clock_offset = struct.unpack("<Q", record.payload[:8])[0] - timestamp
+        record.wall_time = (timestamp + clock_offset) / 1e9
+        records.append(record)
+    return records
+
+
+def _describe_payload(record: JournalRecord) -> str:
+    """Human-readable payload: text as is, binary frames decoded"""
+    payload = record.payload
+    if record.kind == KIND_OPEN:
+        return "journal opened"
+    if payload and payload[0] & laser_binary.FRAME_FLAG:
+        if payload in (
+            bytes([laser_binary.STOP_BYTE]) * 2,
+            bytes([laser_binary.STOP_BYTE]),
+        ):
+            return f"[{payload.hex(' ')}] stop"
+        if len(payload) == laser_binary.FRAME_LENGTH:
+            if record.kind == KIND_SENT:
+                opcode, arg, sequence, crc_ok = laser_binary.decode_request(payload)
+                name = _OPCODE_NAMES.get(opcode, f"op {opcode}")
+                return (
+                    f"[{payload.hex(' ')}] {name} {arg} seq {sequence}"
+                    f"{'' if crc_ok else ' bad checksum'}"
+                )
+            decoded = laser_binary.decode_reply(payload)
+            if decoded is not None:
+                sequence, status, mask = decoded
+                if sequence == laser_binary.EVENT_SEQUENCE:
+                    name = _EVENT_NAMES.get(status, f"event {status}")
+                    return f"[{payload.hex(' ')}] {name} mask {mask:03b}"
+                error = laser_binary.STATUS_ERRORS.get(status, "ok")
+                return f"[{payload.hex(' ')}] seq {sequence} {error} mask {mask:03b}"
+        return f"[{payload.hex(' ')}]"
+    text = payload.decode("utf-8", errors="replace").rstrip("\n")
+    return text + ("..." if record.truncated else "")
+
+
+def format_record(record: JournalRecord) -> str:
+    """
+    One line of text for a record
+
+    Args:
+        record: Record from read_journal()
+
+    Returns:
+        str: Wall clock time, direction and payload
+    """
+    stamp = datetime.fromtimestamp(record.wall_time).strftime("%Y-%m-%d %H:%M:%S.%f")
+    kind = _KIND_NAMES.get(record.kind, f"?{record.kind}")
+    return f"{stamp} {kind} {_describe_payload(record)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a laser command journal")
+    parser.add_argument("path", help="Journal file")
+    parser.add_argument("--last", type=int, help="Only the most recent N records")
+    args = parser.parse_args()
+
+    records = read_journal(args.path)
+    if args.last is not None:
+        records = records[-args.last :]
+    for record in records:
+        print(format_record(record))
+
+
+if __name__ == "__main__":
+    main()
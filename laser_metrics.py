@@ -0,0 +1,519 @@
+"""
+Metrics and Tracing for the Laser TTL Controller
+Counters and latency histograms for MultiLaserController's command path,
+and an exporter that serves them to Prometheus and as JSON
+
+Every controller keeps a ControllerMetrics in `controller.metrics`. Updates
+are a few integer increments made where the controller already handles the
+command, so metrics cost nothing extra on the wire and next to nothing on
+the host. Link health, the emergency stop latency and the heartbeat are
+read from the controller's own statistics when a snapshot is taken.
+
+Example:
+    exporter = MetricsExporter({"bench_a": controller}, port=9731)
+    exporter.start()
+    # curl http://127.0.0.1:9731/metrics       (Prometheus text format)
+    # curl http://127.0.0.1:9731/metrics.json  (same data as JSON)
+"""
+
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from laser_scheduler import JitterHistogram
+
+if TYPE_CHECKING:
+    from laser_controller import MultiLaserController
+
+# Round trips are binned at 250 us up to 100 ms; anything slower has
+# already blown the latency budget and only counts as overflow
+_ROUND_TRIP_BIN_US = 250
+_ROUND_TRIP_BINS = 400
+
+# Prometheus bucket edges in seconds, chosen on histogram bin boundaries
+_ROUND_TRIP_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1)
+_STOP_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05)
+
+DEFAULT_EXPORTER_PORT = 9731
+
+# (start, end) trace callbacks; see ControllerMetrics.add_trace_hooks()
+TraceStart = Callable[[str], object]
+TraceEnd = Callable[[object, bool, float], None]
+
+
+def command_type(command: str) -> str:
+    """
+    Group a command for metrics by its verb
+
+    Args:
+        command: Text command, e.g. "on 2", "mask 5" or "1"
+
+    Returns:
+        str: "toggle" for the bare laser numbers, otherwise the first word
+    """
+    verb = command.split(" ", 1)[0]
+    return "toggle" if verb.isdigit() else verb
+
+
+class ControllerMetrics:
+    """
+    Command counters and round-trip histograms for one controller
+
+    Updated from the caller, writer and reader threads under a lock of its
+    own, which is never held while calling out.
+
+    Attributes:
+        sent: Commands written to the port, by command type
+        acked: Commands the firmware accepted, by command type
+        rejected: Commands the firmware answered with an error, by type
+        failed: Commands that timed out, were cancelled or lost with the
+            link, by type
+        bytes_written: Bytes written, including stop bytes and keepalives
+        bytes_read: Bytes read
+        round_trip: Round-trip histogram per command type (acked and
+            rejected commands)
+        switches: State changes per (laser number, "ON" or "OFF"), whether
+            from a command, a physical switch or the firmware
+        max_queue_depth: Most commands ever waiting or in flight at once
+    """
+
+    def __init__(self):
+        self.sent: Dict[str, int] = {}
+        self.acked: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+        self.failed: Dict[str, int] = {}
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self.round_trip: Dict[str, JitterHistogram] = {}
+        self.switches: Dict[Tuple[int, str], int] = {}
+        self.max_queue_depth = 0
+        self._trace_hooks: List[Tuple[TraceStart, TraceEnd]] = []
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def record_written(self, commands: List[str], byte_count: int) -> None:
+        """Count commands and bytes handed to one write() call"""
+        with self._lock:
+            self.bytes_written += byte_count
+            for command in commands:
+                kind = command_type(command)
+                self.sent[kind] = self.sent.get(kind, 0) + 1
+
+    def record_bytes_written(self, byte_count: int) -> None:
+        """Count bytes written outside a command (stop bytes, keepalives)"""
+        with self._lock:
+            self.bytes_written += byte_count
+
+    def record_bytes_read(self, byte_count: int) -> None:
+        """Count bytes read from the port"""
+        self.bytes_read += byte_count  # Only the reader thread updates this
+
+    def record_reply(self, command: str, ok: bool, round_trip: float) -> None:
+        """
+        Count a reply and record its round trip
+
+        Args:
+            command: Command that was answered
+            ok: True if the firmware accepted it
+            round_trip: Seconds from write to reply
+        """
+        kind = command_type(command)
+        with self._lock:
+            counts = self.acked if ok else self.rejected
+            counts[kind] = counts.get(kind, 0) + 1
+            histogram = self.round_trip.get(kind)
+            if histogram is None:
+                histogram = self.round_trip[kind] = JitterHistogram(
+                    _ROUND_TRIP_BIN_US, _ROUND_TRIP_BINS
+                )
+            histogram.record(round(round_trip * 1e9))
+
+    def record_failed(self, command: str) -> None:
+        """Count a command that never got a reply"""
+        kind = command_type(command)
+        with self._lock:
+            self.failed[kind] = self.failed.get(kind, 0) + 1
+
+    def record_switches(self, changes: Dict[int, str]) -> None:
+        """
+        Count laser state changes
+
+        Args:
+            changes: New state name ("ON" or "OFF"), keyed by laser number
+        """
+        with self._lock:
+            for laser_number, state in changes.items():
+                key = (laser_number, state)
+                self.switches[key] = self.switches.get(key, 0) + 1
+
+    def add_switches(self, counts: Dict[Tuple[int, str], int]) -> None:
+        """
+        Count many laser state changes at once, e.g. from a hardware sequence
+
+        Args:
+            counts: Number of changes per (laser number, "ON" or "OFF")
+        """
+        with self._lock:
+            for key, count in counts.items():
+                if count:
+                    self.switches[key] = self.switches.get(key, 0) + count
+
+    def record_queue_depth(self, depth: int) -> None:
+        """Note the number of commands waiting or in flight"""
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def add_trace_hooks(self, start: TraceStart, end: TraceEnd) -> None:
+        """
+        Register callbacks run around every blocking controller command
+
+        Covers toggle_laser(), set_laser(), turn_off_all() and the other
+        methods that wait for an acknowledgement; submit_command() and
+        send_command() are not traced. start(command) is called before the
+        command is sent, and whatever
+        it returns (e.g. a tracing span) is passed to end(context, success,
+        seconds) once the command has been answered or has failed. Both run
+        on the calling thread, so they add directly to command latency.
+
+        Args:
+            start: Called with the command string
+            end: Called with start's return value, whether the firmware
+                accepted the command, and the elapsed seconds
+        """
+        self._trace_hooks.append((start, end))
+
+    def remove_trace_hooks(self, start: TraceStart, end: TraceEnd) -> None:
+        """Unregister callbacks added with add_trace_hooks"""
+        if (start, end) in self._trace_hooks:
+            self._trace_hooks.remove((start, end))
+
+    @property
+    def tracing(self) -> bool:
+        """True if any trace hooks are registered"""
+        return bool(self._trace_hooks)
+
+    def trace_start(self, command: str) -> List[Tuple[TraceEnd, object]]:
+        """Run the start hooks, returning what trace_end() needs"""
+        contexts = []
+        for start, end in list(self._trace_hooks):
+            try:
+                contexts.append((end, start(command)))
+            except Exception as e:
+                self.logger.error("Trace hook failed: %s", e)
+        return contexts
+
+    def trace_end(
+        self, contexts: List[Tuple[TraceEnd, object]], success: bool, elapsed: float
+    ) -> None:
+        """Run the end hooks for a command started with trace_start()"""
+        for end, context in contexts:
+            try:
+                end(context, success, elapsed)
+            except Exception as e:
+                self.logger.error("Trace hook failed: %s", e)
+
+    def summary(self) -> Dict[str, object]:
+        """Counters and per-type round trips, e.g. for logging or JSON"""
+        with self._lock:
+            return {
+                "sent": dict(self.sent),
+                "acked": dict(self.acked),
+                "rejected": dict(self.rejected),
+                "failed": dict(self.failed),
+                "bytes_written": self.bytes_written,
+                "bytes_read": self.bytes_read,
+                "max_queue_depth": self.max_queue_depth,
+                "round_trip": {
+                    kind: histogram.summary()
+                    for kind, histogram in self.round_trip.items()
+                },
+                "switches": {
+                    f"{laser_number}_{state}": count
+                    for (laser_number, state), count in sorted(self.switches.items())
+                },
+            }
+
+    def __repr__(self) -> str:
+        return (
+            f"ControllerMetrics(sent={sum(self.sent.values())}, "
+            f"acked={sum(self.acked.values())}, "
+            f"failed={sum(self.failed.values())})"
+        )
+
+
+def _labels(**labels: object) -> str:
+    """Format Prometheus labels, escaping the values"""
+    parts = []
+    for name, value in labels.items():
+        text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        parts.append(f'{name}="{text}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class _PrometheusWriter:
+    """Collects samples for the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._families: Dict[str, Tuple[str, str, List[str]]] = {}
+
+    def add(
+        self, name: str, kind: str, help_text: str, labels: str, value: float
+    ) -> None:
+        """Add one sample to a metric family"""
+        family = self._families.setdefault(name, (kind, help_text, []))
+        family[2].append(f"{name}{labels} {value}")
+
+    def add_histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: Dict[str, object],
+        histogram: JitterHistogram,
+        buckets: Tuple[float, ...],
+    ) -> None:
+        """Add a JitterHistogram as a Prometheus histogram in seconds"""
+        family = self._families.setdefault(name, ("histogram", help_text, []))
+        samples = family[2]
+        for edge in buckets:
+            count = histogram.count_below_us(edge * 1e6)
+            samples.append(f"{name}_bucket{_labels(**labels, le=edge)} {count}")
+        samples.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {histogram.count}')
+        samples.append(f"{name}_sum{_labels(**labels)} {histogram.total_us / 1e6}")
+        samples.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+
+    def render(self) -> str:
+        """The exposition text, one HELP/TYPE block per family"""
+        lines = []
+        for name, (kind, help_text, samples) in self._families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """
+    Serves controller metrics over HTTP on localhost
+
+    GET /metrics returns the Prometheus text format and GET /metrics.json a
+    JSON snapshot. Every sample is labelled with the box name, so one
+    exporter can serve a whole fleet (e.g. MetricsExporter(fleet.controllers)).
+    """
+
+    def __init__(
+        self,
+        controllers: Dict[str, "MultiLaserController"],
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_EXPORTER_PORT,
+    ):
+        """
+        Initialise the MetricsExporter
+
+        Args:
+            controllers: Box name mapped to its controller; read at every
+                request, so boxes added to the dict later are included
+            host: Address to listen on (default: localhost only)
+            port: TCP port to listen on (default: 9731; 0 picks a free port)
+        """
+        self.controllers = controllers
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.logger = logging.getLogger(__name__)
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        """Every controller's metrics_snapshot(), keyed by box name"""
+        return {
+            name: controller.metrics_snapshot()
+            for name, controller in list(self.controllers.items())
+        }
+
+    def render_prometheus(self) -> str:
+        """Every controller's metrics in the Prometheus text format"""
+        out = _PrometheusWriter()
+        for box, controller in list(self.controllers.items()):
+            metrics = controller.metrics
+            with metrics._lock:
+                counters = [
+                    ("laser_commands_sent_total", "Commands written", metrics.sent),
+                    ("laser_commands_acked_total", "Commands accepted", metrics.acked),
+                    (
+                        "laser_commands_rejected_total",
+                        "Commands answered with an error",
+                        metrics.rejected,
+                    ),
+                    (
+                        "laser_commands_failed_total",
+                        "Commands with no reply (timeout, cancelled, link lost)",
+                        metrics.failed,
+                    ),
+                ]
+                for name, help_text, counts in counters:
+                    for kind, count in sorted(counts.items()):
+                        out.add(
+                            name,
+                            "counter",
+                            help_text,
+                            _labels(box=box, type=kind),
+                            count,
+                        )
+                for kind, histogram in sorted(metrics.round_trip.items()):
+                    out.add_histogram(
+                        "laser_command_round_trip_seconds",
+                        "Time from writing a command to its reply",
+                        {"box": box, "type": kind},
+                        histogram,
+                        _ROUND_TRIP_BUCKETS,
+                    )
+                for (laser_number, state), count in sorted(metrics.switches.items()):
+                    out.add(
+                        "laser_switches_total",
+                        "counter",
+                        "Laser state changes",
+                        _labels(box=box, laser=laser_number, state=state),
+                        count,
+                    )
+                bytes_written = metrics.bytes_written
+
+            labels = _labels(box=box)
+            out.add(
+                "laser_bytes_written_total",
+                "counter",
+                "Bytes written",
+                labels,
+                bytes_written,
+            )
+            out.add(
+                "laser_bytes_read_total",
+                "counter",
+                "Bytes read",
+                labels,
+                metrics.bytes_read,
+            )
+            out.add(
+                "laser_write_calls_total",
+                "counter",
+                "write() calls made by the writer thread",
+                labels,
+                controller.write_calls,
+            )
+            for stage, depth in controller.queue_depth().items():
+                out.add(
+                    "laser_queue_depth",
+                    "gauge",
+                    "Commands waiting or in flight",
+                    _labels(box=box, stage=stage),
+                    depth,
+                )
+            out.add(
+                "laser_queue_depth_max",
+                "gauge",
+                "Most commands ever waiting or in flight at once",
+                labels,
+                metrics.max_queue_depth,
+            )
+            out.add(
+                "laser_connected",
+                "gauge",
+                "1 while the controller is connected",
+                labels,
+                int(controller.connected),
+            )
+            out.add(
+                "laser_link_drops_total",
+                "counter",
+                "Times the serial link dropped",
+                labels,
+                controller.drops,
+            )
+            out.add(
+                "laser_reconnects_total",
+                "counter",
+                "Dropped links restored",
+                labels,
+                controller.recoveries,
+            )
+            out.add(
+                "laser_reconnect_failures_total",
+                "counter",
+                "Dropped links given up on",
+                labels,
+                controller.failed_recoveries,
+            )
+            out.add(
+                "laser_watchdog_trips_total",
+                "counter",
+                "Firmware watchdog trips",
+                labels,
+                controller.watchdog_trips,
+            )
+            out.add_histogram(
+                "laser_emergency_stop_seconds",
+                "Time from emergency_stop() to confirmed all-off",
+                {"box": box},
+                controller.stop_latency,
+                _STOP_BUCKETS,
+            )
+        return out.render()
+
+    def start(self) -> None:
+        """Start serving (does nothing if already running)"""
+        if self._server is not None:
+            return
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = exporter.render_prometheus()
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path == "/metrics.json":
+                    body = json.dumps(exporter.snapshot(), indent=2)
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                exporter.logger.debug("Metrics request: " + format, *args)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="laser-metrics", daemon=True
+        )
+        self._thread.start()
+        self.logger.info(
+            "Serving metrics on http://%s:%s/metrics", self.host, self.port
+        )
+
+    def stop(self) -> None:
+        """Stop serving and close the listening socket"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=1.0)
+        self._server = None
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        """True while the HTTP server is running"""
+        return self._server is not None
+
+    def __repr__(self) -> str:
+        return (
+            f"MetricsExporter(boxes={list(self.controllers)}, "
+            f"address='{self.host}:{self.port}')"
+        )
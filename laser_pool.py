@@ -0,0 +1,171 @@
+"""
+Warm Connection Pool for Multi-Laser Controllers
+Keeps MultiLaserController connections open for the life of the process and
+hands them out by port, so repeated sessions skip the port open, the board
+reset and the protocol handshake
+
+Requirements:
+- pyserial: pip install pyserial
+
+Example:
+    from laser_pool import connection_pool
+
+    for measurement in range(100):
+        with connection_pool.controller("/dev/ttyUSB0") as controller:
+            controller.turn_on_laser(1)
+            ...
+        # All lasers are off here, but the port stays open for the next one
+"""
+
+import atexit
+import inspect
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from laser_controller import LaserControllerError, MultiLaserController
+
+_CONTROLLER_SIGNATURE = inspect.signature(MultiLaserController.__init__)
+
+
+class ControllerPool:
+    """
+    Process-wide cache of connected controllers, keyed by serial port
+
+    Controllers are thread-safe, so the same controller may be handed to
+    several callers at once. Holders are counted per port: once the last
+    one leaves its controller() block (or calls release()), every laser is
+    turned off, like leaving a `with MultiLaserController(...)` block, but
+    the connection stays open.
+    """
+
+    def __init__(self):
+        self._controllers: Dict[str, MultiLaserController] = {}
+        self._settings: Dict[str, Dict[str, object]] = {}
+        self._holders: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def acquire(self, port: str, **controller_kwargs) -> MultiLaserController:
+        """
+        Get a connected controller for a port, connecting only if needed
+
+        Args:
+            port: Serial port name
+            **controller_kwargs: Passed to MultiLaserController when a new
+                connection is made. An open controller that nobody holds is
+                closed and replaced if it was made with any other setting.
+
+        Returns:
+            MultiLaserController: Connected controller; hand it back with
+                release()
+
+        Raises:
+            LaserControllerError: If a new connection fails, or the port is
+                held by another caller with different settings
+            TypeError: If a keyword is not a MultiLaserController argument
+        """
+        settings = self._settings_for(port, controller_kwargs)
+        with self._lock:
+            controller = self._controllers.get(port)
+            if controller is not None and self._settings.get(port) != settings:
+                if self._holders.get(port, 0):
+                    raise LaserControllerError(
+                        f"{port} is in use with different settings"
+                    )
+                self.logger.info("Reopening %s with new settings", port)
+                controller.disconnect()
+                controller = None
+
+            if controller is None:
+                kwargs = dict(controller_kwargs, auto_connect=False)
+                controller = MultiLaserController(port=port, **kwargs)
+                controller.connect()
+                self._controllers[port] = controller
+                self._settings[port] = settings
+            elif not controller.connected:
+                # Reconnect in place, so other holders' handles stay valid
+                controller.connect()
+            self._holders[port] = self._holders.get(port, 0) + 1
+            return controller
+
+    @staticmethod
+    def _settings_for(port: str, kwargs: Dict) -> Dict[str, object]:
+        """Every constructor argument, defaults filled in, for comparison"""
+        arguments = _CONTROLLER_SIGNATURE.bind(None, port, **kwargs)
+        arguments.apply_defaults()
+        settings = dict(arguments.arguments)
+        del settings["self"]
+        settings.pop("auto_connect", None)  # Always False for pooled controllers
+        return settings
+
+    def release(self, controller: MultiLaserController) -> None:
+        """
+        Hand back a controller from acquire()
+
+        The last holder to release a port turns every laser off, leaving the
+        connection open for reuse.
+        """
+        with self._lock:
+            port = controller.port
+            if self._controllers.get(port) is not controller:
+                return  # Closed since it was acquired
+            self._holders[port] = max(0, self._holders[port] - 1)
+            if self._holders[port]:
+                return  # Someone else is still using the lasers
+            # Under the lock, so a new holder cannot switch lasers on first
+            try:
+                controller.turn_off_all()
+            except LaserControllerError as e:
+                self.logger.error("Could not turn off lasers on %s: %s", port, e)
+
+    @contextmanager
+    def controller(
+        self, port: str, **controller_kwargs
+    ) -> Iterator[MultiLaserController]:
+        """
+        Use a pooled controller for the duration of a with block
+
+        Args:
+            port: Serial port name
+            **controller_kwargs: See acquire()
+
+        Yields:
+            MultiLaserController: Connected controller
+        """
+        controller = self.acquire(port, **controller_kwargs)
+        try:
+            yield controller
+        finally:
+            self.release(controller)
+
+    def close(self, port: str) -> None:
+        """Disconnect and forget the controller for one port"""
+        with self._lock:
+            controller = self._controllers.pop(port, None)
+            self._settings.pop(port, None)
+            self._holders.pop(port, None)
+        if controller is not None:
+            controller.disconnect()
+
+    def close_all(self) -> None:
+        """Disconnect every pooled controller"""
+        with self._lock:
+            controllers = list(self._controllers.values())
+            self._controllers.clear()
+            self._settings.clear()
+            self._holders.clear()
+        for controller in controllers:
+            controller.disconnect()
+
+    def __len__(self) -> int:
+        return len(self._controllers)
+
+    def __repr__(self) -> str:
+        return f"ControllerPool(ports={list(self._controllers)})"
+
+
+# Shared by the whole process; connections are closed (lasers off) at exit
+connection_pool = ControllerPool()
+atexit.register(connection_pool.close_all)
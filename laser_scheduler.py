@@ -0,0 +1,302 @@
+"""
+Deterministic Host Scheduler
+Runs timed laser patterns from the host on absolute deadlines
+
+Every edge is scheduled from the start of the run (time.perf_counter_ns),
+not from the end of the previous command, so the time spent sending
+commands and waiting for acks never accumulates into drift. Waits sleep
+until shortly before each deadline and spin for the remainder, and the
+lateness of every edge is recorded in a JitterHistogram.
+
+Used by MultiLaserController for patterns on firmware without hardware-timed
+sequences (protocol version 5 and earlier).
+
+Example:
+    scheduler = DeadlineScheduler()
+    scheduler.run([(laser_on, 0.5), (laser_off, 0.5)], repeats=1000)
+    print(scheduler.last_jitter)
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+# Default time before each deadline at which waiting switches from sleeping
+# to spinning. Sleep wake-up latency on desktop operating systems is usually
+# well under this, so spinning absorbs it.
+DEFAULT_SPIN_THRESHOLD = 0.002
+
+
+def sleep_until_ns(
+    deadline_ns: int,
+    spin_threshold_ns: int,
+    stop_event: Optional[threading.Event] = None,
+) -> bool:
+    """
+    Wait until time.perf_counter_ns() reaches a deadline
+
+    Sleeps while the deadline is more than spin_threshold_ns away, then
+    busy-waits for the remainder.
+
+    Args:
+        deadline_ns: Target time on the perf_counter_ns clock
+        spin_threshold_ns: Final stretch to busy-wait, in nanoseconds
+        stop_event: Optional event that cuts the sleeping phase short
+
+    Returns:
+        bool: True if the deadline was reached, False if stop_event was set
+    """
+    while True:
+        remaining = deadline_ns - time.perf_counter_ns()
+        if remaining <= spin_threshold_ns:
+            break
+        seconds = (remaining - spin_threshold_ns) / 1e9
+        if stop_event is None:
+            time.sleep(seconds)
+        elif stop_event.wait(seconds):
+            return False
+
+    # sleep(0) releases the GIL so the serial reader thread is not starved
+    while time.perf_counter_ns() < deadline_ns:
+        time.sleep(0)
+    return stop_event is None or not stop_event.is_set()
+
+
+class JitterHistogram:
+    """
+    Histogram of edge lateness (actual time minus deadline)
+
+    Samples go into fixed-width bins, with everything past the last bin
+    counted in an overflow bin, so memory use does not grow with run length.
+
+    Attributes:
+        bin_width_us: Bin width in microseconds
+        bins: Sample count per bin; bins[i] covers [i, i + 1) * bin_width_us
+        overflow: Samples later than the last bin
+        count: Total samples
+    """
+
+    def __init__(self, bin_width_us: int = 50, num_bins: int = 100):
+        """
+        Initialise an empty histogram
+
+        Args:
+            bin_width_us: Bin width in microseconds (default: 50)
+            num_bins: Number of bins before the overflow bin (default: 100)
+        """
+        self.bin_width_us = bin_width_us
+        self.bins: List[int] = [0] * num_bins
+        self.overflow = 0
+        self.count = 0
+        self._total_ns = 0
+        self._min_ns: Optional[int] = None
+        self._max_ns: Optional[int] = None
+
+    def record(self, lateness_ns: int) -> None:
+        """
+        Add one sample
+
+        Args:
+            lateness_ns: How late the edge was, in nanoseconds
+        """
+        self.count += 1
+        self._total_ns += lateness_ns
+        if self._min_ns is None or lateness_ns < self._min_ns:
+            self._min_ns = lateness_ns
+        if self._max_ns is None or lateness_ns > self._max_ns:
+            self._max_ns = lateness_ns
+
+        index = max(0, lateness_ns) // (self.bin_width_us * 1000)
+        if index < len(self.bins):
+            self.bins[index] += 1
+        else:
+            self.overflow += 1
+
+    @property
+    def mean_us(self) -> float:
+        """Mean lateness in microseconds"""
+        return self._total_ns / self.count / 1000 if self.count else 0.0
+
+    @property
+    def min_us(self) -> float:
+        """Smallest lateness in microseconds"""
+        return (self._min_ns or 0) / 1000
+
+    @property
+    def max_us(self) -> float:
+        """Largest lateness in microseconds"""
+        return (self._max_ns or 0) / 1000
+
+    @property
+    def total_us(self) -> float:
+        """Sum of all samples in microseconds"""
+        return self._total_ns / 1000
+
+    def count_below_us(self, edge_us: float) -> int:
+        """
+        Count samples in the bins that end at or before an edge
+
+        Args:
+            edge_us: Upper edge in microseconds, ideally a multiple of
+                bin_width_us so no bin is split
+
+        Returns:
+            int: Samples below the edge (e.g. for a Prometheus bucket)
+        """
+        whole_bins = int(edge_us // self.bin_width_us)
+        if whole_bins > len(self.bins):
+            return self.count - self.overflow
+        return sum(self.bins[:whole_bins])
+
+    def percentile_us(self, percent: float) -> float:
+        """
+        Approximate a lateness percentile from the bins
+
+        Args:
+            percent: Percentile to estimate (0-100)
+
+        Returns:
+            float: Upper edge of the bin holding the percentile, in
+                microseconds (the maximum if it falls in the overflow bin)
+        """
+        if not self.count:
+            return 0.0
+
+        target = percent / 100 * self.count
+        seen = 0
+        for index, samples in enumerate(self.bins):
+            seen += samples
+            if seen >= target:
+                return min((index + 1) * self.bin_width_us, self.max_us)
+        return self.max_us
+
+    def summary(self) -> Dict[str, float]:
+        """Headline statistics in microseconds, e.g. for logging or JSON"""
+        return {
+            "edges": self.count,
+            "mean_us": round(self.mean_us, 1),
+            "min_us": round(self.min_us, 1),
+            "p50_us": round(self.percentile_us(50), 1),
+            "p99_us": round(self.percentile_us(99), 1),
+            "max_us": round(self.max_us, 1),
+            "overflow": self.overflow,
+        }
+
+    def __str__(self) -> str:
+        lines = [
+            f"{self.count} edges, mean {self.mean_us:.1f} us, "
+            f"max {self.max_us:.1f} us"
+        ]
+        peak = max(self.bins + [self.overflow, 1])
+        for index, samples in enumerate(self.bins):
+            if samples:
+                start = index * self.bin_width_us
+                bar = "#" * max(1, round(40 * samples / peak))
+                lines.append(
+                    f"{start:>7}-{start + self.bin_width_us:<7} us {bar} {samples}"
+                )
+        if self.overflow:
+            start = len(self.bins) * self.bin_width_us
+            bar = "#" * max(1, round(40 * self.overflow / peak))
+            lines.append(f"{start:>7}+{'':<7} us {bar} {self.overflow}")
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return (
+            f"JitterHistogram(edges={self.count}, mean={self.mean_us:.1f}us, "
+            f"max={self.max_us:.1f}us)"
+        )
+
+
+class DeadlineScheduler:
+    """
+    Plays a list of timed steps on absolute deadlines
+
+    Step n of cycle c starts at start + c * period + sum(durations before n).
+    If an action overruns into the next step, that edge fires late but the
+    schedule does not shift, so later edges return to their nominal times.
+
+    Each run has its own stop event, which stop() sets for every run begun
+    and not yet finished. A caller that must not miss a stop issued while
+    it prepares its steps takes the event from begin() first and passes it
+    to run().
+    """
+
+    def __init__(self, spin_threshold: float = DEFAULT_SPIN_THRESHOLD):
+        """
+        Initialise the DeadlineScheduler
+
+        Args:
+            spin_threshold: Seconds before each deadline to stop sleeping and
+                busy-wait (default: 2 ms; 0 disables spinning)
+        """
+        self.spin_threshold = spin_threshold
+        self.last_jitter: Optional[JitterHistogram] = None
+        self._runs: Set[threading.Event] = set()
+        self._runs_lock = threading.Lock()
+
+    def begin(self) -> threading.Event:
+        """
+        Register a run before it starts, so stop() reaches it from now on
+
+        Returns:
+            threading.Event: Stop event to pass to run(); setting it stops
+                only this run
+        """
+        stop_event = threading.Event()
+        with self._runs_lock:
+            self._runs.add(stop_event)
+        return stop_event
+
+    def stop(self) -> None:
+        """Abandon every run begun and not yet finished (thread-safe)"""
+        with self._runs_lock:
+            for stop_event in self._runs:
+                stop_event.set()
+
+    def run(
+        self,
+        steps: Sequence[Tuple[Callable[[], object], float]],
+        repeats: int = 1,
+        histogram: Optional[JitterHistogram] = None,
+        stop_event: Optional[threading.Event] = None,
+    ) -> bool:
+        """
+        Run the steps, blocking until the final step has elapsed
+
+        Args:
+            steps: (action, duration in seconds) pairs; each action is called
+                at the start of its step
+            repeats: Times to play the whole list
+            histogram: Histogram to record lateness into (default: a new one,
+                available as last_jitter)
+            stop_event: Event from begin() (default: None, begin one now)
+
+        Returns:
+            bool: True if the schedule ran to the end, False if stopped
+        """
+        durations_ns = [round(duration * 1e9) for _, duration in steps]
+        spin_ns = round(self.spin_threshold * 1e9)
+        jitter = histogram if histogram is not None else JitterHistogram()
+        self.last_jitter = jitter
+        if stop_event is None:
+            stop_event = self.begin()
+
+        try:
+            deadline = time.perf_counter_ns()
+            for _ in range(repeats):
+                for (action, _), duration_ns in zip(steps, durations_ns):
+                    if not sleep_until_ns(deadline, spin_ns, stop_event):
+                        return False
+                    jitter.record(time.perf_counter_ns() - deadline)
+                    action()
+                    deadline += duration_ns
+
+            # Hold the final step for its full duration
+            return sleep_until_ns(deadline, spin_ns, stop_event)
+        finally:
+            with self._runs_lock:
+                self._runs.discard(stop_event)
+
+    def __repr__(self) -> str:
+        return f"DeadlineScheduler(spin_threshold={self.spin_threshold})"
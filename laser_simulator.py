@@ -0,0 +1,862 @@
+"""
+Simulated Laser TTL Controller Board
+Emulates the Arduino laser TTL firmware behind a pseudo-terminal so that
+MultiLaserController and LaserControlGUI can be exercised without hardware
+
+Both sketches are emulated: laser_ttl_controller.ino, and with
+with_switches=True laser_ttl_controller_with_switches.ino, whose physical
+switches can be operated from Python. Serial byte timing at a given baud
+rate can be reproduced as well, for realistic latency and throughput
+figures, including 'baud N' rate switches and the garbled link a host sees
+when its port is set to a different rate than the board.
+
+Requirements:
+- POSIX operating system (uses pty)
+
+Example:
+    with SimulatedLaserBoard(with_switches=True, baud_rate=9600) as board:
+        with MultiLaserController(port=board.port) as controller:
+            controller.toggle_laser(1)
+            board.set_switch(2, True)
+
+Run standalone to get a port the GUI can connect to:
+    python laser_simulator.py --switches --baud 9600
+"""
+
+import argparse
+import os
+import pty
+import select
+import termios
+import threading
+import time
+import tty
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import laser_binary
+
+# Protocol versions understood by the simulator (see laser_ttl_controller.ino)
+PROTOCOL_LEGACY = 1
+PROTOCOL_LINE = 2
+PROTOCOL_MASK = 3
+PROTOCOL_ABSOLUTE = 4
+PROTOCOL_EVENTS = 5
+PROTOCOL_SEQUENCE = 6
+PROTOCOL_BINARY = 7
+PROTOCOL_BAUD = 8
+PROTOCOL_STOP = 9
+PROTOCOL_WATCHDOG = 10
+PROTOCOL_SEQUENCE_END = 11
+PROTOCOL_VERSION = PROTOCOL_SEQUENCE_END  # Version of the firmware in this repository
+
+MAX_SEQUENCE_STEPS = 64
+
+# Pin assignments and TTL logic matching the firmware defaults
+DEFAULT_LASER_PINS = [8, 9, 10]
+LASER_ON_SIGNAL_HIGH = False  # Firmware default: LOW turns laser ON
+
+# Switch sampling period of laser_ttl_controller_with_switches.ino
+SWITCH_POLL_INTERVAL = 0.010
+
+# Bits per byte on the wire: start bit, 8 data bits, stop bit (8N1)
+_BITS_PER_BYTE = 10
+
+# Longest the firmware loop sleeps waiting for input
+_LOOP_INTERVAL = 0.005
+
+# Partial binary frames are dropped after this long (BINARY_FRAME_TIMEOUT_MS)
+BINARY_FRAME_TIMEOUT = 0.050
+
+# Serial rates accepted by 'baud N' (SUPPORTED_BAUD_RATES in the firmware)
+DEFAULT_BAUD_RATE = 9600
+SUPPORTED_BAUD_RATES = (9600, 19200, 38400, 57600, 115200)
+
+# An unconfirmed rate switch reverts after this long (BAUD_CONFIRM_TIMEOUT_MS)
+BAUD_CONFIRM_TIMEOUT = 1.0
+
+# termios speed constants for the supported rates, to read the host's setting
+_TERMIOS_RATES: Dict[int, int] = {
+    getattr(termios, f"B{rate}"): rate for rate in SUPPORTED_BAUD_RATES
+}
+
+# Command summary printed by setup() in both sketches
+_HELP_LINES = [
+    "  '1', '2', '3'     - Toggle individual lasers",
+    "  'on N', 'off N'   - Turn laser N ON or OFF",
+    "  'all_on'          - Turn all lasers ON",
+    "  'all_off'         - Turn all lasers OFF",
+    "  'mask N'          - Set all lasers from bitmask N (bit 0 = laser 1)",
+    "  'status'          - Show current laser states",
+    "  'config'          - Display configuration",
+    "  'set_pin X Y'     - Set laser X to use pin Y",
+    "  'set_logic X Y'   - Set laser ON signal (0=LOW, 1=HIGH)",
+    "  'seq_add M:D ...' - Append sequence steps (mask M for D microseconds)",
+    "  'seq_run [R] [M]' - Play the sequence R times (0 = until aborted), then set mask M",
+    "  'seq_abort'       - Stop the sequence and turn all lasers OFF",
+    "  'seq_clear'       - Remove all sequence steps",
+    "  'baud N'          - Switch the serial rate to N baud",
+    "  'watchdog N'      - Turn all lasers OFF after N ms without input (0 = off)",
+    "  'version'         - Show serial protocol version",
+]
+
+
+class SimulatedLaserBoard:
+    """
+    In-process emulation of laser_ttl_controller.ino (and its switch variant)
+
+    The board exposes the slave side of a pseudo-terminal as `port`, which can
+    be opened with pyserial like a real device. Replies use the same strings
+    as the firmware, and command framing follows the selected protocol
+    version: legacy boards wait for `read_timeout` of silence like
+    Serial.readString(), newer boards act on each line ending immediately.
+
+    With a baud_rate, bytes in both directions take as long as they would on
+    the wire, so reply length and baud rate show up in measured latency.
+    Bytes are then also lost, as framing errors would lose them, whenever
+    the host's port is set to a different rate than the board.
+    """
+
+    def __init__(
+        self,
+        num_lasers: int = 3,
+        protocol_version: int = PROTOCOL_VERSION,
+        read_timeout: float = 1.0,
+        with_switches: bool = False,
+        baud_rate: Optional[int] = None,
+    ):
+        """
+        Initialise the simulated board
+
+        Args:
+            num_lasers: Number of active lasers (1-3)
+            protocol_version: Firmware protocol version to emulate
+            read_timeout: Serial.readString() timeout in seconds (default: 1.0)
+            with_switches: Emulate laser_ttl_controller_with_switches.ino
+            baud_rate: Emulate serial byte timing, starting at this rate
+                (default: None, bytes are delivered as fast as the pty allows
+                and the host's port rate is not checked)
+        """
+        self.num_lasers = num_lasers
+        self.protocol_version = protocol_version
+        self.read_timeout = read_timeout
+        self.with_switches = with_switches
+        self.baud_rate = baud_rate
+
+        # Current rate of the emulated Serial port, changed by 'baud N'
+        self.serial_rate = baud_rate or DEFAULT_BAUD_RATE
+        self._previous_serial_rate = self.serial_rate
+        self._baud_unconfirmed = False
+        self._baud_change_time = 0.0
+
+        # Host watchdog set by 'watchdog N' (0 = disabled, as at boot)
+        self.watchdog_timeout = 0.0
+        self.watchdog_trips = 0
+        self.keepalives_received = 0
+        self._watchdog_tripped = False
+        self._last_byte_time = time.monotonic()
+
+        self.laser_pins: List[int] = DEFAULT_LASER_PINS[:num_lasers]
+        self.laser_on: List[bool] = [False] * num_lasers
+        self.commands_received: List[str] = []
+
+        # Serial traffic counters, for measuring bytes per operation
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.framing_errors = 0
+
+        # Physical switch inputs (True = closed) and the last sampled levels
+        self.switch_closed: List[bool] = [False] * num_lasers
+        self._last_switch_closed: List[bool] = [False] * num_lasers
+        self._last_switch_poll = 0.0
+
+        # Bytes in transit, each released once its wire time has passed
+        # (replies also carry the rate they were sent at)
+        self._rx_pending: Deque[Tuple[float, int]] = deque()
+        self._tx_pending: Deque[Tuple[float, bytes, int]] = deque()
+        self._rx_free_at = 0.0
+        self._tx_free_at = 0.0
+        self._tx_lock = threading.Lock()
+
+        # Binary framing state; events go binary once a host has used it
+        self._binary_frame = bytearray()
+        self.binary_events = False
+
+        # Hardware-timed sequence state, mirroring the firmware globals
+        self.sequence: List[Tuple[int, int]] = []
+        self.sequence_running = False
+        self._sequence_step = 0
+        self._sequence_repeats = 0
+        self._sequence_end_mask = 0
+        self._sequence_cycle = 0
+        self._sequence_step_start = 0
+
+        self._master_fd: Optional[int] = None
+        self._slave_fd: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.port: Optional[str] = None
+
+    def start(self) -> "SimulatedLaserBoard":
+        """Create the pseudo-terminal and start the firmware loop"""
+        self._master_fd, self._slave_fd = pty.openpty()
+        tty.setraw(self._slave_fd)
+        self.port = os.ttyname(self._slave_fd)
+
+        self._print_banner()
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="simulated-laser-board", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the firmware loop and close the pseudo-terminal"""
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        for fd in (self._master_fd, self._slave_fd):
+            if fd is not None:
+                os.close(fd)
+        self._master_fd = self._slave_fd = None
+
+    def set_switch(self, laser_number: int, closed: bool) -> None:
+        """
+        Operate a physical switch (laser_ttl_controller_with_switches.ino only)
+
+        The firmware samples the switches every SWITCH_POLL_INTERVAL, so the
+        laser changes and the 'SW N ON|OFF' event is sent on the next poll.
+
+        Args:
+            laser_number: Switch to operate (1-num_lasers)
+            closed: True to close the switch (laser ON), False to open it
+        """
+        if not self.with_switches:
+            raise RuntimeError("Board was created without physical switches")
+        if not (1 <= laser_number <= self.num_lasers):
+            raise ValueError(f"Laser number must be between 1 and {self.num_lasers}")
+        self.switch_closed[laser_number - 1] = closed
+
+    def flip_switch(self, laser_number: int) -> None:
+        """Toggle a physical switch, like flicking it on the front panel"""
+        self.set_switch(laser_number, not self.switch_closed[laser_number - 1])
+
+    @property
+    def byte_time(self) -> float:
+        """Seconds one byte occupies the wire (0 without baud timing)"""
+        return _BITS_PER_BYTE / self.serial_rate if self.baud_rate else 0.0
+
+    def _host_rate(self, speed_index: int) -> Optional[int]:
+        """
+        Rate the host has set on its end of the pty
+
+        Args:
+            speed_index: 4 for the input speed, 5 for the output speed
+
+        Returns:
+            Optional[int]: Baud rate (always the board's rate without baud
+                timing), or None for a rate the firmware does not support
+        """
+        if not self.baud_rate or self._slave_fd is None:
+            return self.serial_rate
+        try:
+            speed = termios.tcgetattr(self._slave_fd)[speed_index]
+        except termios.error:
+            return None
+        return _TERMIOS_RATES.get(speed)
+
+    def _run(self) -> None:
+        """Firmware loop: collect bytes and dispatch complete commands"""
+        buffer = bytearray()
+
+        while self._running:
+            readable, _, _ = select.select(
+                [self._master_fd], [], [], self._loop_timeout()
+            )
+            if readable:
+                try:
+                    data = os.read(self._master_fd, 1024)
+                except OSError:
+                    data = b""  # No process has the port open
+                self._receive(data)
+
+            # Bytes whose wire time has passed reach the firmware one at a
+            # time, as in readSerialCommands()
+            now = time.monotonic()
+            while self._rx_pending and self._rx_pending[0][0] <= now:
+                arrival, byte = self._rx_pending.popleft()
+                self._last_byte_time = arrival
+                self._watchdog_tripped = False
+
+                if (
+                    self.protocol_version >= PROTOCOL_STOP
+                    and byte == laser_binary.STOP_BYTE
+                    and len(self._binary_frame) != laser_binary.FRAME_LENGTH - 1
+                ):
+                    # Emergency stop, ahead of any other parsing
+                    buffer.clear()
+                    self._emergency_stop()
+                elif (
+                    self.protocol_version >= PROTOCOL_WATCHDOG
+                    and byte == laser_binary.KEEPALIVE_BYTE
+                    and len(self._binary_frame) != laser_binary.FRAME_LENGTH - 1
+                ):
+                    self.keepalives_received += 1
+                elif self.protocol_version >= PROTOCOL_BINARY and (
+                    self._binary_frame
+                    or (byte & laser_binary.FRAME_FLAG and not buffer)
+                ):
+                    self._binary_frame.append(byte)
+                    if len(self._binary_frame) == laser_binary.FRAME_LENGTH:
+                        frame = bytes(self._binary_frame)
+                        self._binary_frame.clear()
+                        self._handle_binary_frame(frame)
+                elif self.protocol_version >= PROTOCOL_LINE and byte in b"\r\n":
+                    # Terminated-line framing - act on every line ending
+                    if buffer:
+                        self._dispatch(bytes(buffer))
+                        buffer.clear()
+                else:
+                    buffer.append(byte)
+
+            # Unterminated input (legacy framing) completes after idle timeout
+            idle = time.monotonic() - self._last_byte_time
+            if buffer and idle >= self.read_timeout:
+                self._dispatch(bytes(buffer))
+                buffer.clear()
+            if self._binary_frame and idle >= BINARY_FRAME_TIMEOUT:
+                self._binary_frame.clear()
+
+            self._update_sequence()
+            self._check_baud_confirmation()
+            self._check_watchdog()
+            if self.with_switches:
+                self._poll_switches()
+            self._flush_tx()
+
+    def _loop_timeout(self) -> float:
+        """Time until the loop next has work, capped at _LOOP_INTERVAL"""
+        due = [
+            pending[0][0] for pending in (self._rx_pending, self._tx_pending) if pending
+        ]
+        if not due:
+            return _LOOP_INTERVAL
+        return min(_LOOP_INTERVAL, max(0.0, min(due) - time.monotonic()))
+
+    def _receive(self, data: bytes) -> None:
+        """Queue bytes from the host, one byte time apart at the baud rate"""
+        self.bytes_received += len(data)
+        if self._host_rate(5) != self.serial_rate:
+            self.framing_errors += len(data)  # Sent at the wrong rate
+            return
+        now = time.monotonic()
+        arrival = max(now, self._rx_free_at)
+        for byte in data:
+            arrival += self.byte_time
+            self._rx_pending.append((arrival, byte))
+        self._rx_free_at = arrival
+
+    def _flush_tx(self) -> None:
+        """Hand replies to the host once their wire time has passed"""
+        with self._tx_lock:
+            now = time.monotonic()
+            while self._tx_pending and self._tx_pending[0][0] <= now:
+                _, data, rate = self._tx_pending.popleft()
+                if self._master_fd is None:
+                    continue
+                if self._host_rate(4) != rate:
+                    self.framing_errors += len(data)  # Host reads another rate
+                    continue
+                os.write(self._master_fd, data)
+
+    def _poll_switches(self) -> None:
+        """Emulate checkSwitchChanges(): a switch edge takes control"""
+        now = time.monotonic()
+        if now - self._last_switch_poll < SWITCH_POLL_INTERVAL:
+            return
+        self._last_switch_poll = now
+
+        for index, closed in enumerate(self.switch_closed):
+            if closed != self._last_switch_closed[index]:
+                self._last_switch_closed[index] = closed
+                self.laser_on[index] = closed
+                self._send_event(
+                    f"SW {index + 1} {'ON' if closed else 'OFF'}",
+                    laser_binary.EVENT_SWITCH,
+                )
+
+    def _handle_binary_frame(self, frame: bytes) -> None:
+        """Emulate handleBinaryFrame()"""
+        opcode, arg, sequence, crc_ok = laser_binary.decode_request(frame)
+        if not crc_ok:
+            self._send_binary(sequence, laser_binary.STATUS_BAD_CRC)
+            return
+        self.binary_events = True
+        self._baud_unconfirmed = False
+        self.commands_received.append(f"<binary {opcode}:{arg}>")
+
+        status = laser_binary.STATUS_OK
+        valid_laser = 1 <= arg <= self.num_lasers
+        if opcode in (laser_binary.OP_PING, laser_binary.OP_STATUS):
+            pass
+        elif opcode in (
+            laser_binary.OP_TOGGLE,
+            laser_binary.OP_ON,
+            laser_binary.OP_OFF,
+        ):
+            if not valid_laser:
+                status = laser_binary.STATUS_INVALID
+            elif opcode == laser_binary.OP_TOGGLE:
+                self.laser_on[arg - 1] = not self.laser_on[arg - 1]
+            else:
+                self.laser_on[arg - 1] = opcode == laser_binary.OP_ON
+        elif opcode == laser_binary.OP_MASK:
+            if arg > (1 << self.num_lasers) - 1:
+                status = laser_binary.STATUS_INVALID
+            else:
+                self._write_mask(arg)
+        elif opcode == laser_binary.OP_ALL_ON:
+            self.laser_on = [True] * self.num_lasers
+        elif opcode == laser_binary.OP_ALL_OFF:
+            self._abort_sequence()
+            self.laser_on = [False] * self.num_lasers
+        else:
+            status = laser_binary.STATUS_UNKNOWN
+
+        self._send_binary(sequence, status)
+
+    def _emergency_stop(self) -> None:
+        """Emulate emergencyStop(): all off, confirmed by a binary event"""
+        self.commands_received.append("<stop>")
+        self._binary_frame.clear()
+        self._abort_sequence()
+        self.laser_on = [False] * self.num_lasers
+        self._send_binary(laser_binary.EVENT_SEQUENCE, laser_binary.EVENT_STOPPED)
+
+    def _send_binary(self, sequence: int, status: int) -> None:
+        """Emulate sendBinaryReply(): the reply carries the current mask"""
+        mask = sum(1 << i for i, laser_on in enumerate(self.laser_on) if laser_on)
+        self._write_bytes(laser_binary.encode_reply(sequence, status, mask))
+
+    def _send_event(self, text: str, binary_event: int) -> None:
+        """Report an event in the framing the host is using"""
+        if self.binary_events:
+            self._send_binary(laser_binary.EVENT_SEQUENCE, binary_event)
+        else:
+            self._write_line(text)
+
+    def _dispatch(self, raw: bytes) -> None:
+        """Trim, lowercase and process a framed command"""
+        command = raw.decode("utf-8", errors="replace").strip().lower()
+        self.commands_received.append(command)
+        self.process_command(command)
+
+    def _write_line(self, text: str = "") -> None:
+        """Emulate Serial.println(), paced at the baud rate if one is set"""
+        self._write_bytes((text + "\r\n").encode("utf-8"))
+
+    def _write_bytes(self, data: bytes) -> None:
+        """Emulate Serial.write(), paced at the baud rate if one is set"""
+        with self._tx_lock:
+            self.bytes_sent += len(data)
+            now = time.monotonic()
+            self._tx_free_at = max(now, self._tx_free_at) + len(data) * self.byte_time
+            self._tx_pending.append((self._tx_free_at, data, self.serial_rate))
+        if not self.byte_time:
+            self._flush_tx()
+
+    def _signal_name(self, laser_on: bool) -> str:
+        """Pin level name for a laser state under the configured TTL logic"""
+        return "HIGH" if laser_on == LASER_ON_SIGNAL_HIGH else "LOW"
+
+    def process_command(self, cmd: str) -> None:
+        """
+        Handle a command exactly as processCommand() in the firmware does
+
+        Args:
+            cmd: Trimmed, lowercase command string
+        """
+        if cmd in ("1", "2", "3") and int(cmd) <= self.num_lasers:
+            self._toggle_laser(int(cmd))
+        elif cmd == "all_on":
+            self.laser_on = [True] * self.num_lasers
+            self._write_line("All active lasers turned ON")
+        elif cmd == "all_off" or (
+            cmd == "seq_abort" and self.protocol_version >= PROTOCOL_SEQUENCE
+        ):
+            self._abort_sequence()
+            self.laser_on = [False] * self.num_lasers
+            self._write_line("All lasers turned OFF")
+        elif cmd == "status":
+            self._print_status()
+        elif cmd == "config":
+            self._print_configuration()
+        elif (
+            cmd.startswith(("on ", "off "))
+            and self.protocol_version >= PROTOCOL_ABSOLUTE
+        ):
+            self._set_laser(cmd)
+        elif cmd.startswith("mask ") and self.protocol_version >= PROTOCOL_MASK:
+            self._set_mask(cmd)
+        elif cmd == "seq_clear" and self.protocol_version >= PROTOCOL_SEQUENCE:
+            self._sequence_clear()
+        elif cmd.startswith("seq_add ") and self.protocol_version >= PROTOCOL_SEQUENCE:
+            self._sequence_add(cmd)
+        elif (
+            cmd == "seq_run" or cmd.startswith("seq_run ")
+        ) and self.protocol_version >= PROTOCOL_SEQUENCE:
+            self._sequence_run(cmd)
+        elif cmd.startswith("baud ") and self.protocol_version >= PROTOCOL_BAUD:
+            self._set_baud_rate(cmd)
+        elif cmd.startswith("watchdog ") and self.protocol_version >= PROTOCOL_WATCHDOG:
+            self._set_watchdog(cmd)
+        elif cmd == "version" and self.protocol_version >= PROTOCOL_LINE:
+            self._baud_unconfirmed = False
+            self._write_line(f"Protocol version: {self.protocol_version}")
+        elif cmd.startswith("set_pin "):
+            self._set_pin(cmd)
+        elif cmd.startswith("set_logic "):
+            self._set_logic(cmd)
+        else:
+            self._write_line(
+                "Unknown command. Type 'config' to see available commands."
+            )
+
+    def _toggle_laser(self, laser_number: int) -> None:
+        index = laser_number - 1
+        self.laser_on[index] = not self.laser_on[index]
+        self._print_laser_state(laser_number)
+
+    def _set_laser(self, cmd: str) -> None:
+        command, value = cmd.split(" ", 1)
+        value = value.strip()
+        if not value.isdigit() or not (1 <= int(value) <= self.num_lasers):
+            self._write_line(f"Invalid laser number. Use 1-{self.num_lasers}")
+            return
+
+        self.laser_on[int(value) - 1] = command == "on"
+        self._print_laser_state(int(value))
+
+    def _print_laser_state(self, laser_number: int) -> None:
+        index = laser_number - 1
+        state = "ON" if self.laser_on[index] else "OFF"
+        self._write_line(
+            f"Laser {laser_number} (Pin {self.laser_pins[index]}) is now {state} "
+            f"(Signal: {self._signal_name(self.laser_on[index])})"
+        )
+
+    def _set_mask(self, cmd: str) -> None:
+        value = cmd.split(" ", 1)[1].strip()
+        max_mask = (1 << self.num_lasers) - 1
+        if not value.isdigit() or int(value) > max_mask:
+            self._write_line(f"Invalid laser mask. Use 0-{max_mask}")
+            return
+
+        mask = int(value)
+        self._write_mask(mask)
+        states = " ".join(
+            f"{i + 1}={'ON' if laser_on else 'OFF'}"
+            for i, laser_on in enumerate(self.laser_on)
+        )
+        self._write_line(f"Laser mask {mask}: {states}")
+
+    def _set_baud_rate(self, cmd: str) -> None:
+        """Emulate handleBaudCommand(): reply at the old rate, then switch"""
+        value = cmd.split(" ", 1)[1].strip()
+        if not value.isdigit() or int(value) not in SUPPORTED_BAUD_RATES:
+            self._write_line(
+                "Invalid baud rate. Use 9600, 19200, 38400, 57600 or 115200"
+            )
+            return
+
+        rate = int(value)
+        self._write_line(f"Baud rate: {rate}")
+        self._previous_serial_rate = self.serial_rate
+        self._switch_serial_rate(rate)
+        self._baud_unconfirmed = rate != DEFAULT_BAUD_RATE
+        self._baud_change_time = time.monotonic()
+
+    def _switch_serial_rate(self, rate: int) -> None:
+        """Emulate switchBaudRate(): restart Serial and drop partial input"""
+        self.serial_rate = rate
+        self._rx_pending.clear()
+        self._binary_frame.clear()
+
+    def _check_baud_confirmation(self) -> None:
+        """Emulate checkBaudConfirmation(): revert an unconfirmed rate"""
+        if (
+            self._baud_unconfirmed
+            and time.monotonic() - self._baud_change_time >= BAUD_CONFIRM_TIMEOUT
+        ):
+            self._baud_unconfirmed = False
+            self._switch_serial_rate(self._previous_serial_rate)
+
+    def _set_watchdog(self, cmd: str) -> None:
+        """Emulate handleWatchdogCommand(): arm or disarm the host watchdog"""
+        value = cmd.split(" ", 1)[1].strip()
+        if not value.isdigit() or (value != "0" and not 100 <= int(value) <= 60000):
+            self._write_line("Invalid watchdog timeout. Use 0 or 100-60000 ms")
+            return
+
+        self.watchdog_timeout = int(value) / 1000
+        self._watchdog_tripped = False
+        self._last_byte_time = time.monotonic()
+        if self.watchdog_timeout:
+            self._write_line(f"Watchdog: {value} ms")
+        else:
+            self._write_line("Watchdog disabled")
+
+    def _check_watchdog(self) -> None:
+        """Emulate checkWatchdog(): all off once the host has gone silent"""
+        if (
+            not self.watchdog_timeout
+            or self._watchdog_tripped
+            or time.monotonic() - self._last_byte_time < self.watchdog_timeout
+        ):
+            return
+        self._watchdog_tripped = True
+        self.watchdog_trips += 1
+        self._abort_sequence()
+        self.laser_on = [False] * self.num_lasers
+        self._send_event("WATCHDOG TRIPPED", laser_binary.EVENT_WATCHDOG)
+
+    def _set_pin(self, cmd: str) -> None:
+        parts = cmd.split(" ")
+        if len(parts) < 3:
+            self._write_line("Usage: set_pin <laser_number> <pin_number>")
+            self._write_line("Example: set_pin 1 12")
+            return
+
+        laser_number = int(parts[1]) if parts[1].isdigit() else 0
+        new_pin = int(parts[2]) if parts[2].isdigit() else 0
+        if not (1 <= laser_number <= self.num_lasers):
+            self._write_line(f"Invalid laser number. Use 1-{self.num_lasers}")
+            return
+        if not (2 <= new_pin <= 13):
+            self._write_line("Invalid pin number. Use pins 2-13")
+            return
+
+        # The new pin starts in the OFF state
+        old_pin = self.laser_pins[laser_number - 1]
+        self.laser_pins[laser_number - 1] = new_pin
+        self.laser_on[laser_number - 1] = False
+        self._write_line(
+            f"Laser {laser_number} moved from pin {old_pin} to pin {new_pin}"
+        )
+
+    def _set_logic(self, cmd: str) -> None:
+        parts = cmd.split(" ")
+        if len(parts) < 3:
+            self._write_line(
+                "Usage: set_logic 0 <signal> (0=reserved, signal: 0=LOW, 1=HIGH)"
+            )
+            self._write_line("Example: set_logic 0 1  (sets laser ON signal to HIGH)")
+            return
+        if parts[2] not in ("0", "1"):
+            self._write_line("Invalid logic level. Use 0 for LOW or 1 for HIGH")
+            return
+
+        on_name = "HIGH" if LASER_ON_SIGNAL_HIGH else "LOW"
+        off_name = "LOW" if LASER_ON_SIGNAL_HIGH else "HIGH"
+        self._write_line(
+            "Note: Logic levels are set at compile time in configuration section."
+        )
+        self._write_line(
+            f"To change logic: Set LASER_ON_SIGNAL = "
+            f"{'HIGH' if parts[2] == '1' else 'LOW'} and recompile."
+        )
+        self._write_line(f"Currently: ON={on_name}, OFF={off_name}")
+
+    def _sequence_clear(self) -> None:
+        if self.sequence_running:
+            self._write_line(
+                "Invalid while a sequence is running. Send 'seq_abort' first"
+            )
+            return
+        self.sequence = []
+        self._write_line("Sequence length: 0")
+
+    def _sequence_add(self, cmd: str) -> None:
+        if self.sequence_running:
+            self._write_line(
+                "Invalid while a sequence is running. Send 'seq_abort' first"
+            )
+            return
+
+        max_mask = (1 << self.num_lasers) - 1
+        for step in cmd.split()[1:]:
+            if ":" not in step:
+                self._write_line(
+                    "Usage: seq_add <mask>:<duration_us> [<mask>:<duration_us> ...]"
+                )
+                self._write_line("Example: seq_add 1:500000 0:500000")
+                return
+            mask, duration = step.split(":", 1)
+            mask = int(mask) if mask.isdigit() else 0
+            duration = int(duration) if duration.isdigit() else 0
+            if mask > max_mask or duration == 0:
+                self._write_line(
+                    f"Invalid sequence step. Use mask 0-{max_mask} "
+                    "and a duration above 0 us"
+                )
+                return
+            if len(self.sequence) >= MAX_SEQUENCE_STEPS:
+                self._write_line(
+                    f"Invalid sequence length. Maximum is {MAX_SEQUENCE_STEPS}"
+                )
+                return
+            self.sequence.append((mask, duration))
+
+        self._write_line(f"Sequence length: {len(self.sequence)}")
+
+    def _sequence_run(self, cmd: str) -> None:
+        if not self.sequence:
+            self._write_line("Invalid sequence: no steps loaded")
+            return
+
+        values = cmd[len("seq_run") :].split()
+        end_mask = 0
+        if len(values) > 1 and self.protocol_version >= PROTOCOL_SEQUENCE_END:
+            max_mask = (1 << self.num_lasers) - 1
+            if not values[1].isdigit() or int(values[1]) > max_mask:
+                self._write_line(f"Invalid laser mask. Use 0-{max_mask}")
+                return
+            end_mask = int(values[1])
+            values = values[:1]
+        value = " ".join(values)
+        self._sequence_repeats = int(value) if value.isdigit() else (0 if value else 1)
+        self._sequence_end_mask = end_mask
+        self._sequence_cycle = 0
+        self._sequence_step = 0
+        self.sequence_running = True
+        self._write_line(
+            f"Sequence started: {len(self.sequence)} steps x {self._sequence_repeats}"
+        )
+        self._sequence_step_start = time.perf_counter_ns() // 1000
+        self._write_mask(self.sequence[0][0])
+
+    def _update_sequence(self) -> None:
+        """Emulate updateSequence(): advance every step whose time has passed"""
+        while self.sequence_running:
+            now = time.perf_counter_ns() // 1000
+            duration = self.sequence[self._sequence_step][1]
+            if now - self._sequence_step_start < duration:
+                return
+
+            # Schedule from the nominal edge so timing does not drift
+            self._sequence_step_start += duration
+            self._sequence_step += 1
+            if self._sequence_step >= len(self.sequence):
+                self._sequence_step = 0
+                self._sequence_cycle += 1
+                if (
+                    self._sequence_repeats > 0
+                    and self._sequence_cycle >= self._sequence_repeats
+                ):
+                    self.sequence_running = False
+                    self._write_mask(self._sequence_end_mask)
+                    self._send_event("SEQ DONE", laser_binary.EVENT_SEQUENCE_DONE)
+                    return
+            self._write_mask(self.sequence[self._sequence_step][0])
+
+    def _abort_sequence(self) -> None:
+        if not self.sequence_running:
+            return
+        self.sequence_running = False
+        self._write_mask(0)
+        self._send_event("SEQ ABORTED", laser_binary.EVENT_SEQUENCE_ABORTED)
+
+    def _write_mask(self, mask: int) -> None:
+        self.laser_on = [bool(mask & (1 << i)) for i in range(self.num_lasers)]
+
+    def _print_status(self) -> None:
+        self._write_line("=== Current Laser Status ===")
+        for i, laser_on in enumerate(self.laser_on):
+            self._write_line(
+                f"Laser {i + 1} (Pin {self.laser_pins[i]}): "
+                f"{'ON ' if laser_on else 'OFF'} [Signal: {self._signal_name(laser_on)}]"
+            )
+
+    def _print_configuration(self) -> None:
+        on_signal = "HIGH (5V)" if LASER_ON_SIGNAL_HIGH else "LOW (0V)"
+        off_signal = "LOW (0V)" if LASER_ON_SIGNAL_HIGH else "HIGH (5V)"
+        self._write_line("=== Current Configuration ===")
+        self._write_line(f"Number of active lasers: {self.num_lasers}")
+        self._write_line(f"Laser ON signal: {on_signal}")
+        self._write_line(f"Laser OFF signal: {off_signal}")
+        self._write_line()
+        self._write_line("Pin Assignments:")
+        for i, pin in enumerate(self.laser_pins):
+            self._write_line(f"  Laser {i + 1}: Pin {pin}")
+        self._write_line("==============================")
+        self._write_line()
+
+    def _print_banner(self) -> None:
+        """Emulate the output of setup() after a reset"""
+        on_signal = "HIGH (5V)" if LASER_ON_SIGNAL_HIGH else "LOW (0V)"
+        off_signal = "LOW (0V)" if LASER_ON_SIGNAL_HIGH else "HIGH (5V)"
+        self._write_line("=== Configurable Arduino Laser TTL Controller ===")
+        self._print_configuration()
+        self._write_line("TTL Logic Configuration:")
+        self._write_line(f"  Laser ON signal: {on_signal}")
+        self._write_line(f"  Laser OFF signal: {off_signal}")
+        self._write_line()
+        self._write_line()
+        self._write_line("Available Commands:")
+        for help_line in _HELP_LINES:
+            self._write_line(help_line)
+        self._write_line("Setup complete.")
+        self._write_line()
+
+    def __enter__(self):
+        """Context manager entry"""
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.stop()
+
+    def __repr__(self) -> str:
+        return (
+            f"SimulatedLaserBoard(port='{self.port}', lasers={self.num_lasers}, "
+            f"protocol={self.protocol_version}, switches={self.with_switches}, "
+            f"baud={self.serial_rate if self.baud_rate else None})"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a simulated laser TTL controller on a pseudo-terminal"
+    )
+    parser.add_argument("--lasers", type=int, default=3)
+    parser.add_argument("--protocol", type=int, default=PROTOCOL_VERSION)
+    parser.add_argument("--switches", action="store_true")
+    parser.add_argument("--baud", type=int, default=None)
+    args = parser.parse_args()
+
+    board = SimulatedLaserBoard(
+        num_lasers=args.lasers,
+        protocol_version=args.protocol,
+        with_switches=args.switches,
+        baud_rate=args.baud,
+    )
+    with board:
+        print(f"Simulated board on {board.port} - press Ctrl+C to stop")
+        if args.switches:
+            print("Enter a laser number to flip its physical switch")
+        try:
+            while True:
+                if not args.switches:
+                    time.sleep(1.0)
+                    continue
+                entry = input().strip()
+                if entry.isdigit() and 1 <= int(entry) <= board.num_lasers:
+                    board.flip_switch(int(entry))
+        except (KeyboardInterrupt, EOFError):
+            pass
+
+
+if __name__ == "__main__":
+    main()
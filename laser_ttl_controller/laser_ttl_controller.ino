@@ -41,12 +41,112 @@ const int STATUS_LED = 13;
 unsigned long previousMillis = 0;
 int patternStep = 0;
 
+// Serial protocol version reported by the 'version' command
+// 1 = commands framed by Serial.readString() (no 'version' command)
+// 2 = newline-terminated commands are processed as soon as they arrive
+// 3 = adds 'mask N' to set every laser in one command
+// 4 = adds absolute 'on N' / 'off N' commands
+// 5 = physical switch changes are reported as "SW <laser> <ON|OFF>" events
+// 6 = adds hardware-timed sequences ('seq_clear', 'seq_add', 'seq_run', 'seq_abort')
+// 7 = adds 3-byte binary command frames alongside the text commands
+// 8 = adds 'baud N' to switch to a faster serial rate after connecting
+// 9 = adds the single-byte emergency stop (STOP_BYTE)
+// 10 = adds the host watchdog ('watchdog N') and its KEEPALIVE_BYTE
+// 11 = 'seq_run R M' leaves the lasers in mask M when the sequence ends
+const int PROTOCOL_VERSION = 11;
+
+// Serial rates accepted by 'baud N'; the board always boots at the default
+const long DEFAULT_BAUD_RATE = 9600;
+const long SUPPORTED_BAUD_RATES[] = {9600, 19200, 38400, 57600, 115200};
+const int NUM_BAUD_RATES = 5;
+
+// A new rate must be confirmed (by 'version' or a valid binary frame) within
+// this time, otherwise the previous rate is restored
+const unsigned long BAUD_CONFIRM_TIMEOUT_MS = 1000;
+long currentBaudRate = DEFAULT_BAUD_RATE;
+long previousBaudRate = DEFAULT_BAUD_RATE;
+bool baudUnconfirmed = false;
+unsigned long baudChangeMillis = 0;
+
+// Host watchdog set by 'watchdog N': if no byte arrives for this many
+// milliseconds, every laser is turned OFF (0 = disabled, as at boot)
+const long MIN_WATCHDOG_TIMEOUT_MS = 100;
+const long MAX_WATCHDOG_TIMEOUT_MS = 60000;
+unsigned long watchdogTimeoutMs = 0;
+bool watchdogTripped = false;
+
+// Commands sent without a line ending (e.g. Serial Monitor set to
+// "No line ending") are processed after this much idle time instead
+const unsigned long COMMAND_IDLE_TIMEOUT_MS = 1000;
+
+// Incoming command buffer
+const int MAX_COMMAND_LENGTH = 64;
+char commandBuffer[MAX_COMMAND_LENGTH + 1];
+int commandLength = 0;
+unsigned long lastCommandByteMillis = 0;
+
+// Binary protocol (see laser_binary.py for the host side)
+// Request: [0x80 | opcode << 3 | arg] [sequence] [CRC8 of bytes 0-1]
+// Reply:   [0x80 | sequence] [status << 4 | laser mask] [CRC8 of bytes 0-1]
+// Text commands are plain ASCII, so a byte with the top bit set can only
+// start a binary frame. Replies with sequence 0 are events.
+const byte BINARY_FLAG = 0x80;
+const int BINARY_FRAME_LENGTH = 3;
+const unsigned long BINARY_FRAME_TIMEOUT_MS = 50;
+
+const byte OP_PING = 0;
+const byte OP_TOGGLE = 1;
+const byte OP_ON = 2;
+const byte OP_OFF = 3;
+const byte OP_MASK = 4;
+const byte OP_ALL_ON = 5;
+const byte OP_ALL_OFF = 6;
+const byte OP_STATUS = 7;
+
+// Emergency stop: this single byte (opcode 15, argument 7) turns every
+// laser OFF as soon as it is read, even in the middle of a text command.
+// It is only taken as data when it is the checksum byte of a binary frame,
+// so hosts send it twice.
+const byte STOP_BYTE = 0xFF;
+
+// Keepalive: this single byte (opcode 15, argument 6) does nothing except
+// count as host activity for the watchdog
+const byte KEEPALIVE_BYTE = 0xFE;
+
+const byte STATUS_OK = 0;
+const byte STATUS_INVALID = 1;
+const byte STATUS_UNKNOWN = 2;
+const byte STATUS_BAD_CRC = 3;
+const byte EVENT_SWITCH = 8;
+const byte EVENT_SEQUENCE_DONE = 9;
+const byte EVENT_SEQUENCE_ABORTED = 10;
+const byte EVENT_STOPPED = 11;
+const byte EVENT_WATCHDOG = 12;
+
+byte binaryFrame[BINARY_FRAME_LENGTH];
+int binaryLength = 0;
+unsigned long binaryFrameStartMillis = 0;
+bool binaryEvents = false;  // Set once a host has spoken binary
+
+// Hardware-timed sequence table: each step holds a laser bitmask for a
+// duration in microseconds, played back from loop() using micros()
+const int MAX_SEQUENCE_STEPS = 64;
+byte sequenceMasks[MAX_SEQUENCE_STEPS];
+unsigned long sequenceDurations[MAX_SEQUENCE_STEPS];
+int sequenceLength = 0;
+bool sequenceRunning = false;
+int sequenceStep = 0;
+unsigned long sequenceRepeats = 0;  // 0 = repeat until aborted
+byte sequenceEndMask = 0;  // Lasers left on when the sequence completes
+unsigned long sequenceCycle = 0;
+unsigned long sequenceStepStart = 0;
+
 // Array to store laser pin numbers for easier iteration
 int laserPins[] = {LASER1_PIN, LASER2_PIN, LASER3_PIN};
 
 void setup() {
   // Initialize serial communication
-  Serial.begin(9600);
+  Serial.begin(DEFAULT_BAUD_RATE);
   Serial.println("=== Configurable Arduino Laser TTL Controller ===");
   
   // Display current configuration
@@ -71,28 +171,181 @@ void setup() {
   Serial.println();
   Serial.println("Available Commands:");
   Serial.println("  '1', '2', '3'     - Toggle individual lasers");
+  Serial.println("  'on N', 'off N'   - Turn laser N ON or OFF");
   Serial.println("  'all_on'          - Turn all lasers ON");
   Serial.println("  'all_off'         - Turn all lasers OFF");
+  Serial.println("  'mask N'          - Set all lasers from bitmask N (bit 0 = laser 1)");
   Serial.println("  'status'          - Show current laser states");
   Serial.println("  'config'          - Display configuration");
   Serial.println("  'set_pin X Y'     - Set laser X to use pin Y");
   Serial.println("  'set_logic X Y'   - Set laser ON signal (0=LOW, 1=HIGH)");
+  Serial.println("  'seq_add M:D ...' - Append sequence steps (mask M for D microseconds)");
+  Serial.println("  'seq_run [R] [M]' - Play the sequence R times (0 = until aborted), then set mask M");
+  Serial.println("  'seq_abort'       - Stop the sequence and turn all lasers OFF");
+  Serial.println("  'seq_clear'       - Remove all sequence steps");
+  Serial.println("  'baud N'          - Switch the serial rate to N baud");
+  Serial.println("  'watchdog N'      - Turn all lasers OFF after N ms without input (0 = off)");
+  Serial.println("  'version'         - Show serial protocol version");
   Serial.println("Setup complete.");
   Serial.println();
 }
 
 void loop() {
   // Check for serial commands
-  if (Serial.available() > 0) {
-    String command = Serial.readString();
-    command.trim(); // Remove whitespace
-    command.toLowerCase(); // Convert to lowercase for consistency
+  readSerialCommands();
+  
+  // Advance a running hardware-timed sequence
+  updateSequence();
+  
+  // Fall back if the host never confirmed a baud rate change
+  checkBaudConfirmation();
+  
+  // Turn every laser off if the host has gone silent
+  checkWatchdog();
+}
+
+void readSerialCommands() {
+  // Collect bytes without blocking; a line ending completes the command
+  while (Serial.available() > 0) {
+    byte c = Serial.read();
+    lastCommandByteMillis = millis();
+    watchdogTripped = false;
+    
+    // Emergency stop comes before any other parsing
+    if (c == STOP_BYTE && binaryLength != BINARY_FRAME_LENGTH - 1) {
+      emergencyStop();
+      continue;
+    }
+    
+    // A keepalive has done its job just by arriving
+    if (c == KEEPALIVE_BYTE && binaryLength != BINARY_FRAME_LENGTH - 1) {
+      continue;
+    }
     
-    processCommand(command);
+    // Binary frames start with the top bit set, between text commands
+    if (binaryLength > 0 || ((c & BINARY_FLAG) && commandLength == 0)) {
+      if (binaryLength == 0) {
+        binaryFrameStartMillis = millis();
+      }
+      binaryFrame[binaryLength++] = c;
+      if (binaryLength == BINARY_FRAME_LENGTH) {
+        binaryLength = 0;
+        handleBinaryFrame();
+      }
+    }
+    else if (c == '\n' || c == '\r') {
+      if (commandLength > 0) {
+        dispatchCommandBuffer();
+      }
+    }
+    else if (commandLength < MAX_COMMAND_LENGTH) {
+      commandBuffer[commandLength++] = c;
+    }
+  }
+  
+  // Drop a binary frame that never completed
+  if (binaryLength > 0 && millis() - binaryFrameStartMillis >= BINARY_FRAME_TIMEOUT_MS) {
+    binaryLength = 0;
+  }
+  
+  // Fall back to idle-timeout framing for unterminated commands
+  if (commandLength > 0 && millis() - lastCommandByteMillis >= COMMAND_IDLE_TIMEOUT_MS) {
+    dispatchCommandBuffer();
+  }
+}
+
+void dispatchCommandBuffer() {
+  commandBuffer[commandLength] = '\0';
+  commandLength = 0;
+  
+  String command = String(commandBuffer);
+  command.trim(); // Remove whitespace
+  command.toLowerCase(); // Convert to lowercase for consistency
+  
+  processCommand(command);
+}
+
+byte crc8(const byte *data, int length) {
+  // CRC-8/SMBUS: polynomial 0x07, initial value 0
+  byte crc = 0;
+  for (int i = 0; i < length; i++) {
+    crc ^= data[i];
+    for (int bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x80) ? (crc << 1) ^ 0x07 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+int readLaserMask() {
+  int mask = 0;
+  for (int i = 0; i < NUM_LASERS; i++) {
+    if (digitalRead(laserPins[i]) == LASER_ON_SIGNAL) {
+      mask |= 1 << i;
+    }
+  }
+  return mask;
+}
+
+void sendBinaryReply(byte sequence, byte status) {
+  byte reply[BINARY_FRAME_LENGTH];
+  reply[0] = BINARY_FLAG | (sequence & 0x7F);
+  reply[1] = (status << 4) | (readLaserMask() & 0x0F);
+  reply[2] = crc8(reply, 2);
+  Serial.write(reply, BINARY_FRAME_LENGTH);
+}
+
+void handleBinaryFrame() {
+  byte sequence = binaryFrame[1] & 0x7F;
+  if (crc8(binaryFrame, 2) != binaryFrame[2]) {
+    sendBinaryReply(sequence, STATUS_BAD_CRC);
+    return;
+  }
+  binaryEvents = true;
+  baudUnconfirmed = false;
+  
+  byte opcode = (binaryFrame[0] >> 3) & 0x0F;
+  int arg = binaryFrame[0] & 0x07;
+  bool validLaser = (arg >= 1 && arg <= NUM_LASERS);
+  byte status = STATUS_OK;
+  
+  switch (opcode) {
+    case OP_PING:
+    case OP_STATUS:
+      break;
+    case OP_TOGGLE:
+    case OP_ON:
+    case OP_OFF:
+      if (!validLaser) {
+        status = STATUS_INVALID;
+      }
+      else if (opcode == OP_TOGGLE) {
+        setLaser(arg, digitalRead(laserPins[arg - 1]) != LASER_ON_SIGNAL);
+      }
+      else {
+        setLaser(arg, opcode == OP_ON);
+      }
+      break;
+    case OP_MASK:
+      if (arg > (1 << NUM_LASERS) - 1) {
+        status = STATUS_INVALID;
+      }
+      else {
+        setLaserMask(arg);
+      }
+      break;
+    case OP_ALL_ON:
+      setAllLasers(true);
+      break;
+    case OP_ALL_OFF:
+      abortSequence();
+      setAllLasers(false);
+      break;
+    default:
+      status = STATUS_UNKNOWN;
   }
   
-  // Brief delay to prevent overwhelming the system
-  delay(10);
+  sendBinaryReply(sequence, status);
 }
 
 void processCommand(String cmd) {
@@ -111,6 +364,8 @@ void processCommand(String cmd) {
     Serial.println("All active lasers turned ON");
   }
   else if (cmd == "all_off") {
+    // All off always wins over a running sequence
+    abortSequence();
     setAllLasers(false);
     Serial.println("All lasers turned OFF");
   }
@@ -120,7 +375,41 @@ void processCommand(String cmd) {
   else if (cmd == "config") {
     printConfiguration();
   }
+  else if (cmd == "seq_clear") {
+    handleSequenceClearCommand();
+  }
+  else if (cmd.startsWith("seq_add ")) {
+    handleSequenceAddCommand(cmd);
+  }
+  else if (cmd == "seq_run" || cmd.startsWith("seq_run ")) {
+    handleSequenceRunCommand(cmd);
+  }
+  else if (cmd == "seq_abort") {
+    abortSequence();
+    setAllLasers(false);
+    Serial.println("All lasers turned OFF");
+  }
+  else if (cmd.startsWith("baud ")) {
+    handleBaudCommand(cmd);
+  }
+  else if (cmd.startsWith("watchdog ")) {
+    handleWatchdogCommand(cmd);
+  }
+  else if (cmd == "version") {
+    baudUnconfirmed = false;
+    Serial.print("Protocol version: ");
+    Serial.println(PROTOCOL_VERSION);
+  }
   // Handle multi-parameter commands
+  else if (cmd.startsWith("on ")) {
+    handleOnOffCommand(cmd, true);
+  }
+  else if (cmd.startsWith("off ")) {
+    handleOnOffCommand(cmd, false);
+  }
+  else if (cmd.startsWith("mask ")) {
+    handleMaskCommand(cmd);
+  }
   else if (cmd.startsWith("set_pin ")) {
     handleSetPinCommand(cmd);
   }
@@ -145,8 +434,15 @@ void toggleLaser(int laserNumber) {
   
   digitalWrite(pin, newState);
   
+  printLaserState(laserNumber);
+}
+
+void printLaserState(int laserNumber) {
+  int pin = laserPins[laserNumber - 1];
+  bool pinState = digitalRead(pin);
+  
   // Determine if laser is now ON or OFF based on configured logic
-  bool laserIsOn = (newState == LASER_ON_SIGNAL);
+  bool laserIsOn = (pinState == LASER_ON_SIGNAL);
   
   Serial.print("Laser ");
   Serial.print(laserNumber);
@@ -155,7 +451,7 @@ void toggleLaser(int laserNumber) {
   Serial.print(") is now ");
   Serial.print(laserIsOn ? "ON" : "OFF");
   Serial.print(" (Signal: ");
-  Serial.print(newState == HIGH ? "HIGH" : "LOW");
+  Serial.print(pinState == HIGH ? "HIGH" : "LOW");
   Serial.println(")");
 }
 
@@ -170,6 +466,21 @@ void setAllLasers(bool turnOn) {
   digitalWrite(STATUS_LED, turnOn ? HIGH : LOW);
 }
 
+void writeLaserMask(int mask) {
+  // Write every channel back-to-back so all lasers change together
+  for (int i = 0; i < NUM_LASERS; i++) {
+    bool turnOn = (mask >> i) & 1;
+    digitalWrite(laserPins[i], turnOn ? LASER_ON_SIGNAL : LASER_OFF_SIGNAL);
+  }
+}
+
+void setLaserMask(int mask) {
+  writeLaserMask(mask);
+  
+  // Status LED shows whether any laser is on
+  digitalWrite(STATUS_LED, mask != 0 ? HIGH : LOW);
+}
+
 void setLaser(int laserNumber, bool state) {
   if (laserNumber < 1 || laserNumber > NUM_LASERS) {
     return; // Invalid laser number
@@ -222,6 +533,289 @@ void printConfiguration() {
   Serial.println();
 }
 
+void handleOnOffCommand(String cmd, bool turnOn) {
+  // Parse "on N" / "off N" - absolute, so repeating a command is harmless
+  int firstSpace = cmd.indexOf(' ');
+  int laserNum = cmd.substring(firstSpace + 1).toInt();
+  
+  if (laserNum < 1 || laserNum > NUM_LASERS) {
+    Serial.print("Invalid laser number. Use 1-");
+    Serial.println(NUM_LASERS);
+    return;
+  }
+  
+  setLaser(laserNum, turnOn);
+  printLaserState(laserNum);
+}
+
+void handleMaskCommand(String cmd) {
+  // Parse "mask N" command, where bit i of N is the state of laser i + 1
+  int firstSpace = cmd.indexOf(' ');
+  String value = cmd.substring(firstSpace + 1);
+  value.trim();
+  int mask = value.toInt();
+  int maxMask = (1 << NUM_LASERS) - 1;
+  
+  if (value.length() == 0 || (mask == 0 && value != "0") || mask < 0 || mask > maxMask) {
+    Serial.print("Invalid laser mask. Use 0-");
+    Serial.println(maxMask);
+    return;
+  }
+  
+  setLaserMask(mask);
+  
+  // Report the resulting state of every laser on one line
+  Serial.print("Laser mask ");
+  Serial.print(mask);
+  Serial.print(":");
+  for (int i = 0; i < NUM_LASERS; i++) {
+    bool laserIsOn = (digitalRead(laserPins[i]) == LASER_ON_SIGNAL);
+    Serial.print(" ");
+    Serial.print(i + 1);
+    Serial.print("=");
+    Serial.print(laserIsOn ? "ON" : "OFF");
+  }
+  Serial.println();
+}
+
+void handleSequenceClearCommand() {
+  if (sequenceRunning) {
+    Serial.println("Invalid while a sequence is running. Send 'seq_abort' first");
+    return;
+  }
+  
+  sequenceLength = 0;
+  Serial.println("Sequence length: 0");
+}
+
+void handleSequenceAddCommand(String cmd) {
+  // Parse "seq_add M:D [M:D ...]" - laser bitmask and duration in microseconds
+  if (sequenceRunning) {
+    Serial.println("Invalid while a sequence is running. Send 'seq_abort' first");
+    return;
+  }
+  
+  int maxMask = (1 << NUM_LASERS) - 1;
+  int start = cmd.indexOf(' ');
+  
+  while (start != -1) {
+    int end = cmd.indexOf(' ', start + 1);
+    String step = (end == -1) ? cmd.substring(start + 1) : cmd.substring(start + 1, end);
+    start = end;
+    if (step.length() == 0) {
+      continue;
+    }
+    
+    int colon = step.indexOf(':');
+    if (colon == -1) {
+      Serial.println("Usage: seq_add <mask>:<duration_us> [<mask>:<duration_us> ...]");
+      Serial.println("Example: seq_add 1:500000 0:500000");
+      return;
+    }
+    
+    int mask = step.substring(0, colon).toInt();
+    unsigned long duration = strtoul(step.substring(colon + 1).c_str(), NULL, 10);
+    
+    if (mask < 0 || mask > maxMask || duration == 0) {
+      Serial.print("Invalid sequence step. Use mask 0-");
+      Serial.print(maxMask);
+      Serial.println(" and a duration above 0 us");
+      return;
+    }
+    
+    if (sequenceLength >= MAX_SEQUENCE_STEPS) {
+      Serial.print("Invalid sequence length. Maximum is ");
+      Serial.println(MAX_SEQUENCE_STEPS);
+      return;
+    }
+    
+    sequenceMasks[sequenceLength] = mask;
+    sequenceDurations[sequenceLength] = duration;
+    sequenceLength++;
+  }
+  
+  Serial.print("Sequence length: ");
+  Serial.println(sequenceLength);
+}
+
+void handleSequenceRunCommand(String cmd) {
+  // Parse "seq_run [R] [M]" - R repeats of the whole table, 0 = until
+  // aborted, then leave the lasers in mask M (default: all OFF)
+  if (sequenceLength == 0) {
+    Serial.println("Invalid sequence: no steps loaded");
+    return;
+  }
+  
+  int firstSpace = cmd.indexOf(' ');
+  int secondSpace = (firstSpace == -1) ? -1 : cmd.indexOf(' ', firstSpace + 1);
+  int endMask = (secondSpace == -1) ? 0 : cmd.substring(secondSpace + 1).toInt();
+  if (endMask < 0 || endMask > (1 << NUM_LASERS) - 1) {
+    Serial.print("Invalid laser mask. Use 0-");
+    Serial.println((1 << NUM_LASERS) - 1);
+    return;
+  }
+  sequenceRepeats = (firstSpace == -1) ? 1 : strtoul(cmd.substring(firstSpace + 1).c_str(), NULL, 10);
+  sequenceEndMask = endMask;
+  sequenceCycle = 0;
+  sequenceStep = 0;
+  sequenceRunning = true;
+  
+  Serial.print("Sequence started: ");
+  Serial.print(sequenceLength);
+  Serial.print(" steps x ");
+  Serial.println(sequenceRepeats);
+  
+  sequenceStepStart = micros();
+  writeLaserMask(sequenceMasks[0]);
+}
+
+void updateSequence() {
+  if (!sequenceRunning) {
+    return;
+  }
+  
+  unsigned long now = micros();
+  if (now - sequenceStepStart < sequenceDurations[sequenceStep]) {
+    return;
+  }
+  
+  // Schedule from the nominal edge, not from now, so timing does not drift
+  sequenceStepStart += sequenceDurations[sequenceStep];
+  sequenceStep++;
+  
+  if (sequenceStep >= sequenceLength) {
+    sequenceStep = 0;
+    sequenceCycle++;
+    if (sequenceRepeats > 0 && sequenceCycle >= sequenceRepeats) {
+      sequenceRunning = false;
+      setLaserMask(sequenceEndMask);
+      if (binaryEvents) {
+        sendBinaryReply(0, EVENT_SEQUENCE_DONE);
+      }
+      else {
+        Serial.println("SEQ DONE");
+      }
+      return;
+    }
+  }
+  
+  writeLaserMask(sequenceMasks[sequenceStep]);
+}
+
+void emergencyStop() {
+  // Discard partial input so nothing sent before the stop runs after it
+  commandLength = 0;
+  binaryLength = 0;
+  abortSequence();
+  setAllLasers(false);
+  
+  // Always confirmed in binary, since only a binary-capable host sends it
+  sendBinaryReply(0, EVENT_STOPPED);
+}
+
+void abortSequence() {
+  if (!sequenceRunning) {
+    return;
+  }
+  
+  sequenceRunning = false;
+  writeLaserMask(0);
+  if (binaryEvents) {
+    sendBinaryReply(0, EVENT_SEQUENCE_ABORTED);
+  }
+  else {
+    Serial.println("SEQ ABORTED");
+  }
+}
+
+void handleBaudCommand(String cmd) {
+  // Parse "baud N" - reply at the old rate, then switch
+  long rate = cmd.substring(cmd.indexOf(' ') + 1).toInt();
+  bool supported = false;
+  for (int i = 0; i < NUM_BAUD_RATES; i++) {
+    if (SUPPORTED_BAUD_RATES[i] == rate) {
+      supported = true;
+    }
+  }
+  
+  if (!supported) {
+    Serial.println("Invalid baud rate. Use 9600, 19200, 38400, 57600 or 115200");
+    return;
+  }
+  
+  Serial.print("Baud rate: ");
+  Serial.println(rate);
+  Serial.flush(); // Finish the reply before the rate changes
+  
+  previousBaudRate = currentBaudRate;
+  switchBaudRate(rate);
+  
+  // The default rate is always safe, so only faster rates need confirming
+  baudUnconfirmed = (rate != DEFAULT_BAUD_RATE);
+  baudChangeMillis = millis();
+}
+
+void switchBaudRate(long rate) {
+  Serial.end();
+  Serial.begin(rate);
+  currentBaudRate = rate;
+  
+  // Discard anything half-received at the old rate
+  commandLength = 0;
+  binaryLength = 0;
+}
+
+void checkBaudConfirmation() {
+  if (baudUnconfirmed && millis() - baudChangeMillis >= BAUD_CONFIRM_TIMEOUT_MS) {
+    baudUnconfirmed = false;
+    switchBaudRate(previousBaudRate);
+  }
+}
+
+void handleWatchdogCommand(String cmd) {
+  // Parse "watchdog N" - N in milliseconds, 0 disables the watchdog
+  String value = cmd.substring(cmd.indexOf(' ') + 1);
+  long timeoutMs = value.toInt();
+  
+  if (value != "0" && (timeoutMs < MIN_WATCHDOG_TIMEOUT_MS || timeoutMs > MAX_WATCHDOG_TIMEOUT_MS)) {
+    Serial.println("Invalid watchdog timeout. Use 0 or 100-60000 ms");
+    return;
+  }
+  
+  watchdogTimeoutMs = timeoutMs;
+  watchdogTripped = false;
+  lastCommandByteMillis = millis();
+  
+  if (watchdogTimeoutMs == 0) {
+    Serial.println("Watchdog disabled");
+  }
+  else {
+    Serial.print("Watchdog: ");
+    Serial.print(watchdogTimeoutMs);
+    Serial.println(" ms");
+  }
+}
+
+void checkWatchdog() {
+  if (watchdogTimeoutMs == 0 || watchdogTripped) {
+    return;
+  }
+  
+  if (millis() - lastCommandByteMillis >= watchdogTimeoutMs) {
+    // Trips once per silence; the next byte from the host re-arms it
+    watchdogTripped = true;
+    abortSequence();
+    setAllLasers(false);
+    
+    if (binaryEvents) {
+      sendBinaryReply(0, EVENT_WATCHDOG);
+    }
+    else {
+      Serial.println("WATCHDOG TRIPPED");
+    }
+  }
+}
+
 void handleSetPinCommand(String cmd) {
   // Parse "set_pin X Y" command
   int firstSpace = cmd.indexOf(' ');
@@ -0,0 +1,536 @@
+"""
+Laser Usage Accounting
+Accumulates the on-time, switch-on count and longest continuous on-period of
+every laser, and keeps them across sessions in a small SQLite file keyed by
+box serial number
+
+Diode lifetime depends on hours of operation and on the number of power
+cycles, so these numbers are what diode replacement is scheduled from. The
+tracker is fed the acknowledged state changes the controller already works
+out, which costs a few additions per change and no I/O. A background thread
+writes the totals to disk every flush_interval seconds, and again when the
+controller disconnects or the process exits.
+
+History is kept in one-hour buckets (UTC) and can be read back in buckets
+of any whole number of hours.
+
+Used by MultiLaserController when created with a usage_path.
+
+Example:
+    controller = MultiLaserController(port="/dev/ttyUSB0", usage_path="usage.db")
+    controller.turn_on_laser(3)
+    ...
+    print(controller.usage.totals()[3])
+    week = controller.usage.history(bucket_hours=24, since=time.time() - 7 * 86400)
+"""
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Dict, List, Optional, Tuple
+
+import serial.tools.list_ports
+
+# Per-user default store, shared by every box (rows are keyed by serial)
+DEFAULT_USAGE_PATH = os.path.join(os.path.expanduser("~"), ".multilaser_usage.db")
+
+DEFAULT_FLUSH_INTERVAL = 60.0
+
+_HOUR = 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage_totals (
+    serial TEXT NOT NULL,
+    laser INTEGER NOT NULL,
+    on_seconds REAL NOT NULL,
+    switch_ons INTEGER NOT NULL,
+    longest_on REAL NOT NULL,
+    PRIMARY KEY (serial, laser)
+);
+CREATE TABLE IF NOT EXISTS usage_hours (
+    serial TEXT NOT NULL,
+    laser INTEGER NOT NULL,
+    hour INTEGER NOT NULL,
+    on_seconds REAL NOT NULL,
+    switch_ons INTEGER NOT NULL,
+    PRIMARY KEY (serial, laser, hour)
+) WITHOUT ROWID;
+"""
+
+# (history bucket start as a Unix time, on seconds, switch-ons)
+UsageBucket = Tuple[float, float, int]
+
+
+def find_box_serial(port: str) -> Optional[str]:
+    """
+    Look up the USB serial number of the device behind a serial port
+
+    Args:
+        port: Serial port name, or a symlink to one (e.g. /dev/serial/by-id/...)
+
+    Returns:
+        Optional[str]: Serial number, or None if the port has none
+    """
+    device = os.path.realpath(port) if os.path.exists(port) else port
+    for info in serial.tools.list_ports.comports():
+        if info.device in (port, device) and info.serial_number:
+            return info.serial_number
+    return None
+
+
+class LaserUsage:
+    """
+    Accumulated usage of one laser
+
+    Attributes:
+        laser: Laser number (1-based index)
+        on_seconds: Total time switched on
+        switch_ons: Times switched on
+        longest_on: Longest continuous on-period in seconds
+    """
+
+    def __init__(
+        self,
+        laser: int,
+        on_seconds: float = 0.0,
+        switch_ons: int = 0,
+        longest_on: float = 0.0,
+    ):
+        self.laser = laser
+        self.on_seconds = on_seconds
+        self.switch_ons = switch_ons
+        self.longest_on = longest_on
+
+    @property
+    def on_hours(self) -> float:
+        """Total time switched on, in hours"""
+        return self.on_seconds / _HOUR
+
+    def summary(self) -> Dict[str, float]:
+        """Usage as a dictionary, e.g. for logging or JSON"""
+        return {
+            "laser": self.laser,
+            "on_hours": round(self.on_hours, 3),
+            "switch_ons": self.switch_ons,
+            "longest_on_s": round(self.longest_on, 1),
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"LaserUsage(laser={self.laser}, on_hours={self.on_hours:.3f}, "
+            f"switch_ons={self.switch_ons}, longest_on={self.longest_on:.1f}s)"
+        )
+
+
+class UsageStore:
+    """
+    SQLite file holding usage totals and hourly history for any number of boxes
+
+    Each operation opens its own connection, so a store can be shared by
+    threads and by several processes.
+    """
+
+    def __init__(self, path: str = DEFAULT_USAGE_PATH):
+        """
+        Open or create a usage store
+
+        Args:
+            path: SQLite file (default: ~/.multilaser_usage.db)
+        """
+        self.path = path
+        with closing(self._connect()) as db:
+            db.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection that waits for other writers instead of failing"""
+        return sqlite3.connect(self.path, timeout=10.0)
+
+    def add(
+        self,
+        serial_number: str,
+        totals: Dict[int, LaserUsage],
+        hours: Dict[Tuple[int, int], Tuple[float, int]],
+    ) -> None:
+        """
+        Add usage to the stored totals and history in one transaction
+
+        Args:
+            serial_number: Box serial number
+            totals: Usage to add, keyed by laser number; longest_on replaces
+                the stored value if it is longer
+            hours: (on seconds, switch-ons) to add, keyed by (laser number,
+                hours since the Unix epoch)
+        """
+        with closing(self._connect()) as db, db:
+            db.executemany(
+                "INSERT INTO usage_totals VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (serial, laser) DO UPDATE SET "
+                "on_seconds = on_seconds + excluded.on_seconds, "
+                "switch_ons = switch_ons + excluded.switch_ons, "
+                "longest_on = MAX(longest_on, excluded.longest_on)",
+                [
+                    (serial_number, u.laser, u.on_seconds, u.switch_ons, u.longest_on)
+                    for u in totals.values()
+                ],
+            )
+            db.executemany(
+                "INSERT INTO usage_hours VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (serial, laser, hour) DO UPDATE SET "
+                "on_seconds = on_seconds + excluded.on_seconds, "
+                "switch_ons = switch_ons + excluded.switch_ons",
+                [
+                    (serial_number, laser, hour, on_seconds, switch_ons)
+                    for (laser, hour), (on_seconds, switch_ons) in hours.items()
+                ],
+            )
+
+    def totals(self, serial_number: str) -> Dict[int, LaserUsage]:
+        """
+        Stored totals for one box
+
+        Returns:
+            Dict[int, LaserUsage]: Usage keyed by laser number (lasers never
+                switched on are missing)
+        """
+        with closing(self._connect()) as db:
+            rows = db.execute(
+                "SELECT laser, on_seconds, switch_ons, longest_on "
+                "FROM usage_totals WHERE serial = ?",
+                (serial_number,),
+            ).fetchall()
+        return {row[0]: LaserUsage(*row) for row in rows}
+
+    def hours(
+        self, serial_number: str, first_hour: int, last_hour: int
+    ) -> List[Tuple[int, int, float, int]]:
+        """
+        Stored hourly history for one box
+
+        Args:
+            serial_number: Box serial number
+            first_hour: First hour to include, in hours since the Unix epoch
+            last_hour: Last hour to include
+
+        Returns:
+            List[Tuple[int, int, float, int]]: (laser, hour, on seconds,
+                switch-ons) for every hour with any usage
+        """
+        with closing(self._connect()) as db:
+            return db.execute(
+                "SELECT laser, hour, on_seconds, switch_ons FROM usage_hours "
+                "WHERE serial = ? AND hour BETWEEN ? AND ? ORDER BY hour",
+                (serial_number, first_hour, last_hour),
+            ).fetchall()
+
+    def serials(self) -> List[str]:
+        """Serial numbers of every box with stored usage"""
+        with closing(self._connect()) as db:
+            rows = db.execute("SELECT DISTINCT serial FROM usage_totals").fetchall()
+        return [row[0] for row in rows]
+
+    def __repr__(self) -> str:
+        return f"UsageStore(path='{self.path}')"
+
+
+class UsageTracker:
+    """
+    Turns one box's laser state changes into usage, flushed to a UsageStore
+
+    On-periods are accounted as they happen: time is added to the current
+    hour's bucket when a laser turns off, and for lasers still on at every
+    flush, so a crash loses at most one flush_interval of usage. Queries
+    combine the store with what has not been flushed yet.
+
+    Attributes:
+        store: Where usage is persisted
+        serial_number: Box the usage belongs to
+        flush_interval: Seconds between writes to the store
+    """
+
+    def __init__(
+        self,
+        store: UsageStore,
+        serial_number: str,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        """
+        Initialise the UsageTracker
+
+        Args:
+            store: Where usage is persisted
+            serial_number: Box the usage belongs to
+            flush_interval: Seconds between writes to the store (default: 60)
+        """
+        self.store = store
+        self.serial_number = serial_number
+        self.flush_interval = flush_interval
+        self._on_since: Dict[int, float] = {}  # Start of each on-period
+        self._accounted_to: Dict[int, float] = {}  # On-time added up to here
+        self._totals: Dict[int, LaserUsage] = {}  # Not yet flushed
+        self._hours: Dict[Tuple[int, int], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._exit_hook_registered = False
+        self.logger = logging.getLogger(__name__)
+
+    def record(self, changes: Dict[int, bool], now: Optional[float] = None) -> None:
+        """
+        Account for laser state changes
+
+        Args:
+            changes: True for ON, keyed by laser number; lasers already in
+                that state are ignored
+            now: Time of the change (default: time.time())
+        """
+        if now is None:
+            now = time.time()
+        with self._lock:
+            for laser, on in changes.items():
+                if on and laser not in self._on_since:
+                    self._on_since[laser] = self._accounted_to[laser] = now
+                    self._pending(laser).switch_ons += 1
+                    self._add_hour(laser, int(now // _HOUR), 0.0, 1)
+                elif not on and laser in self._on_since:
+                    self._accrue(laser, now)
+                    self._end_period(laser, now)
+
+    def record_played(
+        self,
+        start: float,
+        end: float,
+        on_seconds: Dict[int, float],
+        switch_ons: Dict[int, int],
+        longest_on: Dict[int, float],
+        still_on: Dict[int, float],
+    ) -> None:
+        """
+        Account for switching the firmware did on its own, e.g. a hardware
+        sequence, from totals rather than one change at a time
+
+        The lasers must have been recorded as off at start. On-time is
+        spread evenly over the hours from start to end; switch-ons count in
+        the hour the run started.
+
+        Args:
+            start: Time the run started
+            end: Time the run ended
+            on_seconds: On-time during the run, keyed by laser number
+            switch_ons: Times each laser was turned on during the run
+            longest_on: Longest on-period of each laser during the run
+            still_on: Lasers still on at end, with how long they had been on;
+                their on-period carries on as if begun with record()
+        """
+        span = end - start
+        with self._lock:
+            for laser in set(on_seconds) | set(switch_ons):
+                seconds = on_seconds.get(laser, 0.0)
+                count = switch_ons.get(laser, 0)
+                if not seconds and not count:
+                    continue
+                usage = self._pending(laser)
+                usage.on_seconds += seconds
+                usage.switch_ons += count
+                usage.longest_on = max(usage.longest_on, longest_on.get(laser, 0.0))
+                self._add_hour(laser, int(start // _HOUR), 0.0, count)
+                if span <= 0:
+                    self._add_hour(laser, int(end // _HOUR), seconds, 0)
+                    continue
+                hour_start = start
+                while hour_start < end:
+                    hour = int(hour_start // _HOUR)
+                    hour_end = min(end, (hour + 1) * _HOUR)
+                    share = seconds * (hour_end - hour_start) / span
+                    self._add_hour(laser, hour, share, 0)
+                    hour_start = hour_end
+            for laser, on_for in still_on.items():
+                if laser not in self._on_since:
+                    self._on_since[laser] = end - on_for
+                    self._accounted_to[laser] = end
+
+    def _pending(self, laser: int) -> LaserUsage:
+        """Unflushed totals for a laser (lock held)"""
+        usage = self._totals.get(laser)
+        if usage is None:
+            usage = self._totals[laser] = LaserUsage(laser)
+        return usage
+
+    def _add_hour(self, laser: int, hour: int, seconds: float, switch_ons: int) -> None:
+        """Add to an unflushed hourly bucket (lock held)"""
+        on_seconds, count = self._hours.get((laser, hour), (0.0, 0))
+        self._hours[(laser, hour)] = (on_seconds + seconds, count + switch_ons)
+
+    def _accrue(self, laser: int, now: float) -> None:
+        """Add on-time since it was last accounted, split by hour (lock held)"""
+        start = self._accounted_to[laser]
+        if now <= start:
+            return
+        self._pending(laser).on_seconds += now - start
+        while start < now:
+            hour = int(start // _HOUR)
+            end = min(now, (hour + 1) * _HOUR)
+            self._add_hour(laser, hour, end - start, 0)
+            start = end
+        self._accounted_to[laser] = now
+
+    def _end_period(self, laser: int, now: float) -> None:
+        """Close a laser's on-period, noting it if it is the longest (lock held)"""
+        usage = self._pending(laser)
+        usage.longest_on = max(usage.longest_on, now - self._on_since.pop(laser))
+        del self._accounted_to[laser]
+
+    def _checkpoint(self, now: float) -> None:
+        """Account on-time so far for lasers that are still on (lock held)"""
+        for laser, since in self._on_since.items():
+            self._accrue(laser, now)
+            usage = self._pending(laser)
+            usage.longest_on = max(usage.longest_on, now - since)
+
+    def flush(self) -> bool:
+        """
+        Write unflushed usage to the store
+
+        Returns:
+            bool: False if the store could not be written (the usage is kept
+                for the next flush)
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._checkpoint(time.time())
+                totals, self._totals = self._totals, {}
+                hours, self._hours = self._hours, {}
+            if not totals and not hours:
+                return True
+            try:
+                self.store.add(self.serial_number, totals, hours)
+                return True
+            except sqlite3.Error as e:
+                self.logger.error("Could not save laser usage: %s", e)
+                with self._lock:
+                    for laser, usage in totals.items():
+                        pending = self._pending(laser)
+                        pending.on_seconds += usage.on_seconds
+                        pending.switch_ons += usage.switch_ons
+                        pending.longest_on = max(pending.longest_on, usage.longest_on)
+                    for (laser, hour), (on_seconds, switch_ons) in hours.items():
+                        self._add_hour(laser, hour, on_seconds, switch_ons)
+                return False
+
+    def start(self) -> None:
+        """Start flushing in the background (does nothing if already running)"""
+        if self._thread is not None:
+            return
+        if not self._exit_hook_registered:
+            atexit.register(self.flush)
+            self._exit_hook_registered = True
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="laser-usage", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and flush what is left"""
+        if self._thread is not None:
+            self._stop.set()
+            if self._thread is not threading.current_thread():
+                self._thread.join(timeout=1.0)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        """Flush every flush_interval until stopped"""
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def totals(self) -> Dict[int, LaserUsage]:
+        """
+        Usage of every laser on this box, over all sessions
+
+        Returns:
+            Dict[int, LaserUsage]: Usage keyed by laser number, including
+                time not yet flushed and on-periods still in progress
+        """
+        # Holding the flush lock keeps usage from moving to the store between
+        # reading the store and adding what is still pending
+        with self._flush_lock:
+            totals = self.store.totals(self.serial_number)
+            with self._lock:
+                self._checkpoint(time.time())
+                for laser, pending in self._totals.items():
+                    usage = totals.setdefault(laser, LaserUsage(laser))
+                    usage.on_seconds += pending.on_seconds
+                    usage.switch_ons += pending.switch_ons
+                    usage.longest_on = max(usage.longest_on, pending.longest_on)
+        return totals
+
+    def history(
+        self,
+        bucket_hours: int = 24,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> Dict[int, List[UsageBucket]]:
+        """
+        Usage per time bucket
+
+        Args:
+            bucket_hours: Bucket width in hours; buckets are aligned to
+                whole multiples of it since the Unix epoch, so 24 gives UTC
+                days (default: 24)
+            since: Unix time to start from (default: 30 buckets ago)
+            until: Unix time to end at (default: now)
+
+        Returns:
+            Dict[int, List[UsageBucket]]: (bucket start, on seconds,
+                switch-ons) for every bucket with any usage, oldest first,
+                keyed by laser number
+        """
+        if bucket_hours < 1:
+            raise ValueError("Buckets must be at least one hour wide")
+        now = time.time()
+        if until is None:
+            until = now
+        if since is None:
+            since = until - 30 * bucket_hours * _HOUR
+        first_hour, last_hour = int(since // _HOUR), int(until // _HOUR)
+
+        hours: Dict[Tuple[int, int], Tuple[float, int]] = {}
+        with self._flush_lock:
+            for laser, hour, on_seconds, switch_ons in self.store.hours(
+                self.serial_number, first_hour, last_hour
+            ):
+                hours[(laser, hour)] = (on_seconds, switch_ons)
+            with self._lock:
+                self._checkpoint(now)
+                for (laser, hour), (on_seconds, switch_ons) in self._hours.items():
+                    if first_hour <= hour <= last_hour:
+                        stored_on, stored_count = hours.get((laser, hour), (0.0, 0))
+                        hours[(laser, hour)] = (
+                            stored_on + on_seconds,
+                            stored_count + switch_ons,
+                        )
+
+        buckets: Dict[int, Dict[int, Tuple[float, int]]] = {}
+        for (laser, hour), (on_seconds, switch_ons) in hours.items():
+            bucket = hour - hour % bucket_hours
+            laser_buckets = buckets.setdefault(laser, {})
+            total_on, total_count = laser_buckets.get(bucket, (0.0, 0))
+            laser_buckets[bucket] = (total_on + on_seconds, total_count + switch_ons)
+        return {
+            laser: [
+                (bucket * _HOUR, on_seconds, switch_ons)
+                for bucket, (on_seconds, switch_ons) in sorted(laser_buckets.items())
+            ]
+            for laser, laser_buckets in sorted(buckets.items())
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"UsageTracker(serial_number='{self.serial_number}', "
+            f"lasers_on={sorted(self._on_since)})"
+        )